@@ -1,10 +1,11 @@
 import logging
-from typing import TypedDict, Annotated, Dict, Any, Optional
+from array import array
+from dataclasses import field
+from typing import TypedDict, Annotated, Dict, Any, List, NamedTuple, Optional, Tuple
 import operator
 from datetime import datetime
 import requests
 
-from langchain_openai import ChatOpenAI
 from langchain.tools import StructuredTool
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolExecutor
@@ -12,57 +13,125 @@ from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.agents import AgentAction
 from langchain.prompts import PromptTemplate
 from core.config import settings
+from core.log_config import log_payload
+from core.token_metrics import fetch_token_metrics
+from core.tracing import start_span
+from core.metrics import timed_node
+from core.llm import EXPLANATION, get_chat_model
+from core.llm_gateway import llm_gateway
+from core.input_memo import input_digest, price_bucket, recall_analysis, remember_analysis, recall_reasoning, remember_reasoning
+from core.analysis_result import AnalysisResult, result_type
+
+AGENT_NAME = "bounce_hunter_agent"
 
 # Logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
 # --- Configuration ---
 PROXIMITY_THRESHOLD = 0.05  # 5%
 
-# --- Bounce Hunter Tool (Returns Dict) ---
-def bounce_hunter_analysis(token_id: str, token_symbol: str) -> Dict[str, Any]:
+# --- Result ---
+class NearbyLevel(NamedTuple):
+    level: float
+    date: str
+    distance: float
+    proximity_percent: float
+    type: str  # "support" (price above the level) or "resistance" (price below)
+
+    @property
+    def distance_str(self) -> str:
+        return f"${self.distance:.2f} ({self.proximity_percent:.2%})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"level": self.level, "date": self.date, "distance": self.distance,
+                "proximity_percent": self.proximity_percent, "distance_str": self.distance_str, "type": self.type}
+
+
+@result_type
+class BounceResult(AnalysisResult):
+    token_symbol: Optional[str] = None
+    current_price: Optional[float] = None
+    proximity_threshold: float = PROXIMITY_THRESHOLD
+    level_prices: bytes = field(default=b"", repr=False)  # historical levels as packed float64
+    level_dates: Tuple[str, ...] = field(default=(), repr=False)  # date of each level, same order
+
+    def levels(self) -> memoryview:
+        return memoryview(self.level_prices).cast("d")
+
+    def nearby_levels(self) -> List[NearbyLevel]:
+        """Historical levels within the proximity threshold of the current price, in level order."""
+        if self.current_price is None:
+            return []
+        price = self.current_price
+        nearby = []
+        for level, date in zip(self.levels(), self.level_dates):
+            distance = abs(price - level)
+            proximity = distance / level if level != 0 else 0
+            if proximity <= self.proximity_threshold:
+                nearby.append(NearbyLevel(level, date, distance, proximity, "support" if price > level else "resistance"))
+        return nearby
+
+    def reasoning_components(self) -> Dict[str, Any]:
+        if self.error_detail or not self.level_prices:
+            return AnalysisResult.reasoning_components(self)
+        nearby = [level.to_dict() for level in self.nearby_levels()]
+        return {
+            "historical_levels": [{"level": level, "date": date} for level, date in zip(self.levels(), self.level_dates)],
+            "proximity_threshold": self.proximity_threshold,
+            "bounce_levels": [level for level in nearby if level["type"] == "support"],
+            "breakout_levels": [level for level in nearby if level["type"] == "resistance"],
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = AnalysisResult.to_dict(self)
+        for name in ("level_prices", "level_dates", "proximity_threshold"):
+            del data[name]
+        data["nearby_levels"] = [level.to_dict() for level in self.nearby_levels()]
+        return data
+
+    def pack(self) -> Dict[str, Any]:
+        data = AnalysisResult.pack(self)
+        data["level_prices"] = self.levels().tolist()
+        return data
+
+    @classmethod
+    def unpack(cls, data: Dict[str, Any]) -> "BounceResult":
+        data["level_prices"] = array("d", data["level_prices"]).tobytes()
+        data["level_dates"] = tuple(data["level_dates"])
+        return cls(**data)
+
+
+# --- Bounce Hunter Tool ---
+def bounce_hunter_analysis(token_id: str, token_symbol: str) -> BounceResult:
     """
     Analyzes if a crypto token's current price is near historical support or resistance levels.
-    Returns a dictionary containing detected levels, signals, and reasoning components, or an error.
+    Returns a BounceResult with the historical levels, the signal and its reason, or an error.
     """
     symbol_cleaned = token_symbol.strip().upper()
     logger.info(f"Starting bounce hunter analysis for symbol: '{symbol_cleaned}' (ID: {token_id})")
     
-    # Initialize result dictionary
-    analysis_result: Dict[str, Any] = {
-        "token_id": token_id,
-        "token_symbol": symbol_cleaned,
-        "current_price": None,
-        "nearby_levels": [],
-        "signal": "NO SIGNAL",  # Default signal
-        "reasoning_components": {},
-        "reason_string": "Analysis did not complete.",
-        "error": None
-    }
+    analysis_result = BounceResult(token_id=token_id, token_symbol=symbol_cleaned, signal="NO SIGNAL",
+                                   reason_string="Analysis did not complete.")
 
     # --- Check API Key ---
     api_key = settings.TOKEN_METRICS_API_KEY
     if not api_key or api_key == "YOUR_TOKEN_METRICS_API_KEY":
         logger.error("Token Metrics API key not configured.")
-        analysis_result["error"] = "API key missing"
-        analysis_result["reasoning_components"]["error"] = "Internal configuration error: API key missing."
+        analysis_result.error = "API key missing"
+        analysis_result.error_detail = "Internal configuration error: API key missing."
         return analysis_result
 
     if not token_id:
         logger.error(f"Missing token_id for analysis of symbol '{symbol_cleaned}'")
-        analysis_result["error"] = "Missing token_id input"
-        analysis_result["reasoning_components"]["error"] = "Input error: Token ID was not provided."
+        analysis_result.error = "Missing token_id input"
+        analysis_result.error_detail = "Input error: Token ID was not provided."
         return analysis_result
 
     # Fetch current price from Token Metrics API
-    headers = {"accept": "application/json", "api_key": api_key}
-    price_url = f"https://api.tokenmetrics.com/v2/price?token_id={token_id}"
     current_price = None
     
     try:
-        price_response = requests.get(price_url, headers=headers, timeout=10)
+        price_response = fetch_token_metrics("price", {"token_id": token_id}, timeout=10)
         price_response.raise_for_status()
         price_data = price_response.json()
         
@@ -70,39 +139,36 @@ def bounce_hunter_analysis(token_id: str, token_symbol: str) -> Dict[str, Any]:
             if price_data["data"]:
                 # Extract the current price from the API response
                 current_price = float(price_data["data"][0].get("CURRENT_PRICE", 0))
-                logger.info(f"Successfully fetched current price for {symbol_cleaned} (ID: {token_id}): ${current_price:.2f}")
+                logger.debug("Fetched current price for %s (ID: %s): $%.2f", symbol_cleaned, token_id, current_price)
             else:
-                analysis_result["error"] = "No price data found"
-                analysis_result["reasoning_components"]["error"] = "No price data found in API response."
-                analysis_result["reason_string"] = f"Could not retrieve current price for {symbol_cleaned}."
+                analysis_result.error = "No price data found"
+                analysis_result.error_detail = "No price data found in API response."
+                analysis_result.reason_string = f"Could not retrieve current price for {symbol_cleaned}."
                 return analysis_result
         else:
             api_msg = price_data.get('message', 'Unknown API error')
-            analysis_result["error"] = f"API Error: {api_msg}"
-            analysis_result["reasoning_components"]["error"] = f"API Error: Could not fetch price data ({api_msg})."
-            analysis_result["reason_string"] = f"Failed to retrieve current price for {symbol_cleaned} from Token Metrics API."
+            analysis_result.error = f"API Error: {api_msg}"
+            analysis_result.error_detail = f"API Error: Could not fetch price data ({api_msg})."
+            analysis_result.reason_string = f"Failed to retrieve current price for {symbol_cleaned} from Token Metrics API."
             return analysis_result
     except requests.exceptions.RequestException as req_e:
         logger.exception(f"API Request error fetching price for {symbol_cleaned} (ID: {token_id}): {req_e}")
-        analysis_result["error"] = "API request failed"
-        analysis_result["reasoning_components"]["error"] = f"Network error: Failed to connect to the price API ({type(req_e).__name__})."
-        analysis_result["reason_string"] = f"Failed to connect to Token Metrics API to fetch current price for {symbol_cleaned}."
+        analysis_result.error = "API request failed"
+        analysis_result.error_detail = f"Network error: Failed to connect to the price API ({type(req_e).__name__})."
+        analysis_result.reason_string = f"Failed to connect to Token Metrics API to fetch current price for {symbol_cleaned}."
         return analysis_result
     except Exception as e:
         logger.exception(f"Unexpected error processing price data for {symbol_cleaned} (ID: {token_id}): {e}")
-        analysis_result["error"] = "Price data processing failed"
-        analysis_result["reasoning_components"]["error"] = f"Internal error: Failed processing price data ({type(e).__name__})."
-        analysis_result["reason_string"] = f"An error occurred while retrieving current price for {symbol_cleaned}."
+        analysis_result.error = "Price data processing failed"
+        analysis_result.error_detail = f"Internal error: Failed processing price data ({type(e).__name__})."
+        analysis_result.reason_string = f"An error occurred while retrieving current price for {symbol_cleaned}."
         return analysis_result
         
-    analysis_result["current_price"] = current_price
+    analysis_result.current_price = current_price
 
     # --- Fetch Historical Levels from Token Metrics API ---
-    headers = {"accept": "application/json", "api_key": api_key}
-    url = f"https://api.tokenmetrics.com/v2/resistance-support?token_id={token_id}&limit=100&page=0"
-    
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = fetch_token_metrics("resistance-support", {"token_id": token_id, "limit": 100, "page": 0}, timeout=10)
         response.raise_for_status()
         response_data = response.json()
         
@@ -110,129 +176,106 @@ def bounce_hunter_analysis(token_id: str, token_symbol: str) -> Dict[str, Any]:
             if response_data["data"]:
                 token_data = response_data["data"][0]
                 raw_levels = token_data.get("HISTORICAL_RESISTANCE_SUPPORT_LEVELS", [])
-                historical_levels = [{"level": float(lvl["level"]), "date": lvl["date"]} 
+                historical_levels = [(float(lvl["level"]), lvl["date"])
                                      for lvl in raw_levels if "level" in lvl and "date" in lvl]
-                logger.info(f"Successfully fetched {len(historical_levels)} levels for {symbol_cleaned} (ID: {token_id})")
+                logger.debug("Fetched %d levels for %s (ID: %s)", len(historical_levels), symbol_cleaned, token_id)
                 
                 if not historical_levels:
-                    analysis_result["error"] = "No historical levels found"
-                    analysis_result["reasoning_components"]["error"] = "No historical support/resistance levels found for this token."
-                    analysis_result["reason_string"] = f"No historical support/resistance levels found for {symbol_cleaned}."
+                    analysis_result.error = "No historical levels found"
+                    analysis_result.error_detail = "No historical support/resistance levels found for this token."
+                    analysis_result.reason_string = f"No historical support/resistance levels found for {symbol_cleaned}."
                     return analysis_result
+
+                # Price still in the same bucket and the same levels: reuse the last result
+                digest = input_digest(symbol_cleaned, price_bucket(current_price), historical_levels)
+                previous = recall_analysis(AGENT_NAME, token_id, digest)
+                if previous is not None:
+                    logger.info(f"Bounce Hunter inputs unchanged for {symbol_cleaned} (ID: {token_id}); reusing previous analysis")
+                    return previous
                 
-                # Store all historical levels in reasoning components
-                analysis_result["reasoning_components"]["historical_levels"] = historical_levels
-                analysis_result["reasoning_components"]["proximity_threshold"] = PROXIMITY_THRESHOLD
-                
+                analysis_result.level_prices = array("d", (level for level, _ in historical_levels)).tobytes()
+                analysis_result.level_dates = tuple(date for _, date in historical_levels)
+
                 # Find nearby levels
-                nearby_levels = []
-                bounce_levels = []  # Support levels (price above)
-                breakout_levels = []  # Resistance levels (price below)
-                
-                for level_data in historical_levels:
-                    level = level_data["level"]
-                    level_date = level_data["date"]
-                    price_diff = abs(current_price - level)
-                    proximity_percent = (price_diff / level) if level != 0 else 0
-                    
-                    if proximity_percent <= PROXIMITY_THRESHOLD:
-                        distance_str = f"${price_diff:.2f} ({proximity_percent:.2%})"
-                        level_info = {
-                            "level": level,
-                            "date": level_date,
-                            "distance": price_diff,
-                            "proximity_percent": proximity_percent,
-                            "distance_str": distance_str
-                        }
-                        
-                        if current_price > level:
-                            level_info["type"] = "support"
-                            bounce_levels.append(level_info)
-                        else:
-                            level_info["type"] = "resistance"
-                            breakout_levels.append(level_info)
-                        
-                        nearby_levels.append(level_info)
-                
-                # Store nearby levels in result
-                analysis_result["nearby_levels"] = nearby_levels
-                analysis_result["reasoning_components"]["bounce_levels"] = bounce_levels
-                analysis_result["reasoning_components"]["breakout_levels"] = breakout_levels
+                nearby_levels = analysis_result.nearby_levels()
+                bounce_levels = [level for level in nearby_levels if level.type == "support"]  # Support levels (price above)
+                breakout_levels = [level for level in nearby_levels if level.type == "resistance"]  # Resistance levels (price below)
                 
                 # Determine signal based on nearby levels
                 if bounce_levels and breakout_levels:
                     # If both support and resistance are nearby, the one closest to price takes precedence
-                    closest_bounce = min(bounce_levels, key=lambda x: x["proximity_percent"])
-                    closest_breakout = min(breakout_levels, key=lambda x: x["proximity_percent"])
+                    closest_bounce = min(bounce_levels, key=lambda x: x.proximity_percent)
+                    closest_breakout = min(breakout_levels, key=lambda x: x.proximity_percent)
                     
-                    if closest_bounce["proximity_percent"] <= closest_breakout["proximity_percent"]:
-                        analysis_result["signal"] = "BUY"
-                        analysis_result["reason_string"] = (
-                            f"Price (${current_price:.2f}) is {closest_bounce['distance_str']} above support at "
-                            f"${closest_bounce['level']:.2f} from {closest_bounce['date']}. "
+                    if closest_bounce.proximity_percent <= closest_breakout.proximity_percent:
+                        analysis_result.signal = "BUY"
+                        analysis_result.reason_string = (
+                            f"Price (${current_price:.2f}) is {closest_bounce.distance_str} above support at "
+                            f"${closest_bounce.level:.2f} from {closest_bounce.date}. "
                             f"A potential bounce may be forming."
                         )
                     else:
-                        analysis_result["signal"] = "SELL"
-                        analysis_result["reason_string"] = (
-                            f"Price (${current_price:.2f}) is {closest_breakout['distance_str']} below resistance at "
-                            f"${closest_breakout['level']:.2f} from {closest_breakout['date']}. "
+                        analysis_result.signal = "SELL"
+                        analysis_result.reason_string = (
+                            f"Price (${current_price:.2f}) is {closest_breakout.distance_str} below resistance at "
+                            f"${closest_breakout.level:.2f} from {closest_breakout.date}. "
                             f"A potential breakout may be forming."
                         )
                 
                 elif bounce_levels:
-                    analysis_result["signal"] = "BUY"
-                    closest_bounce = min(bounce_levels, key=lambda x: x["proximity_percent"])
-                    analysis_result["reason_string"] = (
-                        f"Price (${current_price:.2f}) is {closest_bounce['distance_str']} above support at "
-                        f"${closest_bounce['level']:.2f} from {closest_bounce['date']}. "
+                    analysis_result.signal = "BUY"
+                    closest_bounce = min(bounce_levels, key=lambda x: x.proximity_percent)
+                    analysis_result.reason_string = (
+                        f"Price (${current_price:.2f}) is {closest_bounce.distance_str} above support at "
+                        f"${closest_bounce.level:.2f} from {closest_bounce.date}. "
                         f"A potential bounce may be forming."
                     )
                 
                 elif breakout_levels:
-                    analysis_result["signal"] = "SELL"
-                    closest_breakout = min(breakout_levels, key=lambda x: x["proximity_percent"])
-                    analysis_result["reason_string"] = (
-                        f"Price (${current_price:.2f}) is {closest_breakout['distance_str']} below resistance at "
-                        f"${closest_breakout['level']:.2f} from {closest_breakout['date']}. "
+                    analysis_result.signal = "SELL"
+                    closest_breakout = min(breakout_levels, key=lambda x: x.proximity_percent)
+                    analysis_result.reason_string = (
+                        f"Price (${current_price:.2f}) is {closest_breakout.distance_str} below resistance at "
+                        f"${closest_breakout.level:.2f} from {closest_breakout.date}. "
                         f"A potential breakout may be forming."
                     )
                 
                 else:
-                    analysis_result["signal"] = "HOLD"
-                    analysis_result["reason_string"] = (
+                    analysis_result.signal = "HOLD"
+                    analysis_result.reason_string = (
                         f"Current price (${current_price:.2f}) is not within {PROXIMITY_THRESHOLD:.1%} "
                         f"of any historical support or resistance levels for {symbol_cleaned}."
                     )
             
             else:
-                analysis_result["error"] = "No data found"
-                analysis_result["reasoning_components"]["error"] = "No token data found in API response."
-                analysis_result["reason_string"] = f"No data found for {symbol_cleaned} in Token Metrics API response."
+                analysis_result.error = "No data found"
+                analysis_result.error_detail = "No token data found in API response."
+                analysis_result.reason_string = f"No data found for {symbol_cleaned} in Token Metrics API response."
                 return analysis_result
         
         else:
             api_msg = response_data.get('message', 'Unknown API error')
-            analysis_result["error"] = f"API Error: {api_msg}"
-            analysis_result["reasoning_components"]["error"] = f"API Error: Could not fetch support/resistance data ({api_msg})."
-            analysis_result["reason_string"] = f"Failed to retrieve support/resistance data for {symbol_cleaned} from Token Metrics API."
+            analysis_result.error = f"API Error: {api_msg}"
+            analysis_result.error_detail = f"API Error: Could not fetch support/resistance data ({api_msg})."
+            analysis_result.reason_string = f"Failed to retrieve support/resistance data for {symbol_cleaned} from Token Metrics API."
             return analysis_result
     
     except requests.exceptions.RequestException as req_e:
         logger.exception(f"API Request error fetching levels for {symbol_cleaned} (ID: {token_id}): {req_e}")
-        analysis_result["error"] = "API request failed"
-        analysis_result["reasoning_components"]["error"] = f"Network error: Failed to connect to the support/resistance API ({type(req_e).__name__})."
-        analysis_result["reason_string"] = f"Failed to connect to Token Metrics API to fetch support/resistance data for {symbol_cleaned}."
+        analysis_result.error = "API request failed"
+        analysis_result.error_detail = f"Network error: Failed to connect to the support/resistance API ({type(req_e).__name__})."
+        analysis_result.reason_string = f"Failed to connect to Token Metrics API to fetch support/resistance data for {symbol_cleaned}."
         return analysis_result
     
     except Exception as e:
         logger.exception(f"Unexpected error processing data for {symbol_cleaned} (ID: {token_id}): {e}")
-        analysis_result["error"] = "Data processing failed"
-        analysis_result["reasoning_components"]["error"] = f"Internal error: Failed processing support/resistance data ({type(e).__name__})."
-        analysis_result["reason_string"] = f"An error occurred while analyzing support/resistance levels for {symbol_cleaned}."
+        analysis_result.error = "Data processing failed"
+        analysis_result.error_detail = f"Internal error: Failed processing support/resistance data ({type(e).__name__})."
+        analysis_result.reason_string = f"An error occurred while analyzing support/resistance levels for {symbol_cleaned}."
         return analysis_result
     
-    logger.info(f"Bounce Hunter analysis complete for {symbol_cleaned} (ID: {token_id}): Signal={analysis_result['signal']}")
+    remember_analysis(AGENT_NAME, token_id, digest, analysis_result)
+    logger.info(f"Bounce Hunter analysis complete for {symbol_cleaned} (ID: {token_id}): Signal={analysis_result.signal}")
     return analysis_result
 
 
@@ -240,16 +283,12 @@ def bounce_hunter_analysis(token_id: str, token_symbol: str) -> Dict[str, Any]:
 bounce_hunter_tool = StructuredTool.from_function(
     func=bounce_hunter_analysis,
     name="bounce_hunter_analyzer",
-    description="Analyzes if a token's current price is near historical support or resistance levels (within 5% proximity) using Token Metrics data. Returns a dictionary with detected levels, signal, and reasoning components or an error.",
+    description="Analyzes if a token's current price is near historical support or resistance levels (within 5% proximity) using Token Metrics data. Returns the detected levels, signal, and reason or an error.",
 )
 tool_executor = ToolExecutor([bounce_hunter_tool])
 
 # --- LLM and Prompt ---
-llm = ChatOpenAI(
-    temperature=0.1,
-    api_key=settings.OPENAI_API_KEY,
-    model="gpt-4-0125-preview"
-)
+llm = get_chat_model(AGENT_NAME, EXPLANATION)
 
 reasoning_prompt = PromptTemplate.from_template(
     """You are a crypto analysis assistant explaining the result of the Bounce Hunter strategy for {token_symbol}.
@@ -289,12 +328,12 @@ reasoning_prompt = PromptTemplate.from_template(
 
 # --- LangGraph State ---
 class AgentState(TypedDict):
-    input: Dict[str, str]  # Expects {"token_id": "...", "token_name": "..."}
+    input: Dict[str, str]  # Expects {"token_id": "...", "token_name": "..."}, optionally "token_symbol"
     action: AgentAction | None
-    analysis_data: Optional[Dict[str, Any]]  # Result from bounce_hunter_analysis tool
+    analysis_data: Optional[BounceResult]  # Result from bounce_hunter_analysis tool
     reason_string: Optional[str]  # Pre-LLM reason string from tool
     llm_reasoning: Optional[str]  # Final explanation from LLM
-    intermediate_steps: Annotated[list[tuple[AgentAction, Dict[str, Any]]], operator.add]
+    intermediate_steps: Annotated[list[tuple[AgentAction, BounceResult]], operator.add]
 
 
 # --- Nodes ---
@@ -302,17 +341,17 @@ def prepare_tool_call_node(state: AgentState):
     logger.info("--- Bounce Hunter: Preparing Tool Call Node ---")
     input_data = state['input']
     token_id = input_data.get('token_id')
-    token_name = input_data.get('token_name', 'UnknownSymbol')
-    logger.info(f"Input token_id: {token_id}, token_name/symbol: {token_name}")
+    token_name = input_data.get('token_symbol') or input_data.get('token_name', 'UnknownSymbol')
+    logger.debug("Input token_id: %s, token_name/symbol: %s", token_id, token_name)
 
     if not token_id:
         logger.error("Missing 'token_id' in input for prepare_tool_call_node")
         # Return error state that skips tool execution
         return {
-            "analysis_data": {
-                 "token_id": token_id, "token_symbol": token_name, "error": "Missing 'token_id' in input.",
-                 "reasoning_components": {"error": "Input error: Token ID was not provided."}
-            }
+            "analysis_data": BounceResult(
+                 token_id=token_id, token_symbol=token_name, error="Missing 'token_id' in input.",
+                 error_detail="Input error: Token ID was not provided."
+            )
         }
 
     tool_input = {"token_id": token_id, "token_symbol": token_name}
@@ -321,7 +360,7 @@ def prepare_tool_call_node(state: AgentState):
         tool_input=tool_input,
         log=f"Preparing Bounce Hunter analysis for {token_name} (ID: {token_id})"
     )
-    logger.info(f"Prepared action: {action}")
+    logger.debug("Prepared action: %s", action)
     return {"action": action, "intermediate_steps": []}
 
 
@@ -331,45 +370,43 @@ def execute_tool_node(state: AgentState):
     analysis_result_data = None
 
     # Check if prepare_node already put an error in analysis_data
-    if state.get("analysis_data") and state["analysis_data"].get("error"):
-         logger.warning(f"Skipping tool execution due to error in prepare step: {state['analysis_data']['error']}")
+    if state.get("analysis_data") and state["analysis_data"].error:
+         logger.warning(f"Skipping tool execution due to error in prepare step: {state['analysis_data'].error}")
          return {}  # No changes needed
 
     if not isinstance(action, AgentAction):
          logger.error(f"execute_tool_node received non-action: {action}")
          error_message = f"Internal error: Tool execution step received invalid action state."
-         analysis_result_data = {
-             "error": error_message,
-             "reasoning_components": {"error": error_message}
-         }
+         analysis_result_data = BounceResult(error=error_message, error_detail=error_message)
          dummy_action = AgentAction(tool="error_state", tool_input={}, log=error_message)
          return {"analysis_data": analysis_result_data, "intermediate_steps": [(dummy_action, analysis_result_data)]}
     else:
-        logger.info(f"Executing tool: {action.tool} with input {action.tool_input}")
+        logger.debug("Executing tool: %s with input %s", action.tool, action.tool_input)
         try:
-            output_dict = tool_executor.invoke(action)
-            logger.info(f"Tool output dictionary: {output_dict}")
+            with start_span(f"tool.{action.tool}", **action.tool_input):
+                output_dict = tool_executor.invoke(action)
+            log_payload(logger, "Tool output", output_dict)
             analysis_result_data = output_dict
 
-            if isinstance(output_dict, dict) and output_dict.get("error"):
-                 logger.warning(f"Bounce Hunter tool reported an error: {output_dict['error']}")
+            if isinstance(output_dict, BounceResult) and output_dict.error:
+                 logger.warning(f"Bounce Hunter tool reported an error: {output_dict.error}")
 
         except Exception as e:
             logger.exception(f"Error executing tool {action.tool}: {e}")
             error_message = f"Tool execution failed: {type(e).__name__}"
-            analysis_result_data = {
-                 "error": error_message,
-                 "reasoning_components": {"error": f"Internal error during tool execution: {str(e)}"},
-                 "token_id": action.tool_input.get("token_id"),
-                 "token_symbol": action.tool_input.get("token_symbol")
-            }
-
-    # Log the actual action and the dictionary result
+            analysis_result_data = BounceResult(
+                 error=error_message,
+                 error_detail=f"Internal error during tool execution: {str(e)}",
+                 token_id=action.tool_input.get("token_id"),
+                 token_symbol=action.tool_input.get("token_symbol")
+            )
+
+    # Log the actual action and the result
     intermediate_steps = state.get("intermediate_steps", [])
     intermediate_steps.append((action, analysis_result_data))
 
     # Extract reason_string and store in state
-    reason_string = analysis_result_data.get("reason_string") if isinstance(analysis_result_data, dict) else None
+    reason_string = analysis_result_data.reason_string if isinstance(analysis_result_data, BounceResult) else None
 
     return {
         "analysis_data": analysis_result_data,
@@ -378,7 +415,7 @@ def execute_tool_node(state: AgentState):
     }
 
 
-def generate_llm_reasoning_node(state: AgentState):
+async def generate_llm_reasoning_node(state: AgentState):
     logger.info("--- Bounce Hunter: Generating LLM Reasoning Node ---")
     analysis_data = state.get("analysis_data")
     reason_string = state.get("reason_string")
@@ -388,30 +425,34 @@ def generate_llm_reasoning_node(state: AgentState):
         logger.error("No analysis data found in state for LLM reasoning.")
         return {"llm_reasoning": final_explanation}
 
-    if analysis_data.get("error"):
-        error_msg = analysis_data["error"]
-        reasoning_error = reason_string or analysis_data.get("reasoning_components", {}).get("error", "Unknown calculation error")
+    if analysis_data.error:
+        error_msg = analysis_data.error
+        reasoning_error = reason_string or analysis_data.error_detail or "Unknown calculation error"
         logger.warning(f"Skipping LLM reasoning due to previous error: {error_msg}")
-        final_explanation = f"Analysis Error for {analysis_data.get('token_symbol', 'token')}: {reasoning_error}"
+        final_explanation = f"Analysis Error for {analysis_data.token_symbol or 'token'}: {reasoning_error}"
         return {"llm_reasoning": final_explanation}
 
     # Prepare data for prompt
-    signal = analysis_data.get("signal", "UNKNOWN")
-    current_price = analysis_data.get("current_price")
-    nearby_levels = analysis_data.get("nearby_levels", [])
+    signal = analysis_data.signal or "UNKNOWN"
+    current_price = analysis_data.current_price
     
     if current_price is None or reason_string is None:
          logger.error(f"LLM Node: Missing required data (price or reason string) in state")
          final_explanation = f"Analysis Error: Could not generate explanation due to missing core data."
          return {"llm_reasoning": final_explanation}
 
+    previous_reasoning = await recall_reasoning(AGENT_NAME, analysis_data)
+    if previous_reasoning is not None:
+        logger.info("Reusing bounce hunter LLM reasoning; analysis inputs unchanged")
+        return {"llm_reasoning": previous_reasoning}
+
     # Format values for prompt
     current_price_str = f"{current_price:.2f}" if current_price is not None else "N/A"
-    level_count = len(nearby_levels)
+    level_count = len(analysis_data.nearby_levels())
 
     # Prepare final input for the prompt
     prompt_input = {
-        "token_symbol": analysis_data.get("token_symbol", "this token"),
+        "token_symbol": analysis_data.token_symbol or "this token",
         "current_price_str": current_price_str,
         "proximity_threshold": PROXIMITY_THRESHOLD,
         "level_count": level_count,
@@ -420,19 +461,21 @@ def generate_llm_reasoning_node(state: AgentState):
     }
 
     # Log the input data for the LLM (similar to crypto_oracle.py's step 3)
-    logger.info(f"Input data for LLM reasoning: {prompt_input}")
+    log_payload(logger, "Input data for LLM reasoning", prompt_input)
 
     try:
         reasoning_chain = reasoning_prompt | llm
-        logger.info(f"Invoking LLM with data: {prompt_input}")
-        llm_response = reasoning_chain.invoke(prompt_input)
+        logger.info("Invoking LLM for bounce hunter reasoning")
+        async with llm_gateway.slot(AGENT_NAME):
+            llm_response = await reasoning_chain.ainvoke(prompt_input)
 
         if hasattr(llm_response, 'content'):
              final_explanation = llm_response.content
         else:
              final_explanation = str(llm_response)
 
-        logger.info(f"LLM generated reasoning: {final_explanation}")
+        log_payload(logger, "LLM generated reasoning", final_explanation)
+        await remember_reasoning(AGENT_NAME, analysis_data, final_explanation.strip())
         return {"llm_reasoning": final_explanation.strip()}
 
     except Exception as e:
@@ -443,9 +486,9 @@ def generate_llm_reasoning_node(state: AgentState):
 
 # --- Build Graph ---
 workflow = StateGraph(AgentState)
-workflow.add_node("prepare_tool_call_node", prepare_tool_call_node)
-workflow.add_node("execute_tool_node", execute_tool_node)
-workflow.add_node("generate_llm_reasoning_node", generate_llm_reasoning_node)
+workflow.add_node("prepare_tool_call_node", timed_node(AGENT_NAME, prepare_tool_call_node))
+workflow.add_node("execute_tool_node", timed_node(AGENT_NAME, execute_tool_node))
+workflow.add_node("generate_llm_reasoning_node", timed_node(AGENT_NAME, generate_llm_reasoning_node))
 workflow.set_entry_point("prepare_tool_call_node")
 workflow.add_edge("prepare_tool_call_node", "execute_tool_node")
 workflow.add_edge("execute_tool_node", "generate_llm_reasoning_node")
@@ -457,6 +500,7 @@ app = workflow.compile(checkpointer=memory)
 
 # --- Manual Test ---
 if __name__ == "__main__":
+    import asyncio
     from uuid import uuid4
     print("--- Testing Bounce Hunter Agent (with LLM Reasoning) ---")
     config = {"configurable": {"thread_id": str(uuid4())}}
@@ -467,7 +511,7 @@ if __name__ == "__main__":
     print(f"Invoking agent with input: {test_input} and config: {config}")
 
     try:
-        result_state = app.invoke({"input": test_input}, config=config)
+        result_state = asyncio.run(app.ainvoke({"input": test_input}, config=config))
         print("--- Agent Execution Result State ---")
         print(f"Input: {result_state.get('input')}")
         print(f"Analysis Data: {result_state.get('analysis_data')}")
@@ -100,7 +100,7 @@ def run_agent_node(state: AgentState):
             "intermediate_steps": state["intermediate_steps"],
         }
     )
-    logger.info(f"Agent decision: {agent_decision}")
+    logger.debug("Agent decision: %s", agent_decision)
     # Return the decision to be added to the state
     return {"agent_decision": agent_decision}
 
@@ -115,7 +115,7 @@ def execute_tool_node(state: AgentState):
 
     # Use the ToolExecutor to run the tool with the provided input
     output = tool_executor.invoke(agent_action)
-    logger.info(f"Tool output: {output}")
+    logger.debug("Tool output: %s", output)
     # Return the action and its output to be added to intermediate_steps
     return {"intermediate_steps": [(agent_action, str(output))]} # Appends this tuple
 
@@ -0,0 +1,48 @@
+import asyncio
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Agent name -> module that builds the agent's LLM client, tool executor and compiled graph as `app`
+AGENT_MODULES = {
+    "sma_agent": "agents.sma_agent",
+    "bounce_hunter_agent": "agents.bounce_hunter",
+    "crypto_oracle_agent": "agents.crypto_oracle",
+    "momentum_quant_agent": "agents.momentum_quant_agent",
+    "analysis_manager": "agents.manager_agent",
+}
+
+_apps = {}
+_lock = threading.Lock()
+
+
+def get_agent_app(name: str):
+    """Imports the agent module on first use and returns its compiled graph."""
+    app = _apps.get(name)
+    if app is not None:
+        return app
+    with _lock:
+        app = _apps.get(name)
+        if app is None:
+            started = time.perf_counter()
+            module = importlib.import_module(AGENT_MODULES[name])
+            app = _apps[name] = module.app
+            logger.info(f"Loaded agent '{name}' in {time.perf_counter() - started:.2f}s")
+    return app
+
+
+async def load_agent_app(name: str):
+    """Async variant of get_agent_app; a cold load runs in a worker thread so the event loop stays free."""
+    app = _apps.get(name)
+    if app is not None:
+        return app
+    return await asyncio.to_thread(get_agent_app, name)
+
+
+async def preload_agents(names):
+    """Builds the given agents up front (e.g. on worker startup when lazy loading is not wanted)."""
+    for name in names:
+        await load_agent_app(name)
@@ -1,68 +1,83 @@
 # apps/backend/agents/manager_agent.py
 import logging
 import asyncio
-from typing import TypedDict, Annotated, Dict, Any, List, Optional
+from typing import TypedDict, Annotated, Callable, Dict, Any, List, Optional, Tuple
 import operator
 from uuid import uuid4
 
-from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 
-# Import the compiled apps from the other agents
-from .sma_agent import app as sma_app
-from .bounce_hunter import app as bounce_hunter_app
-from .crypto_oracle import app as crypto_oracle_app
-from .momentum_quant_agent import app as momentum_quant_app
+# Sub-agent graphs are resolved through the loader so each is built once, on first use
+from .loader import load_agent_app
 from core.config import settings
+from core.log_config import log_payload
+from core.tracing import start_span
+from core.metrics import MANAGER_SPECULATIVE_SYNTHESIS, SUB_AGENT_RETRIES, timed_node
+from core.llm import SYNTHESIS, get_chat_model
+from core.llm_gateway import LLMPriority, llm_gateway
+from core.analysis_result import AnalysisResult
+
+AGENT_NAME = "analysis_manager"
 
 # Logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
 # --- LLM for Final Synthesis ---
-llm = ChatOpenAI(
-    temperature=0.1,
-    api_key=settings.OPENAI_API_KEY,
-    model="gpt-4-0125-preview" # Or your preferred model
-)
+llm = get_chat_model(AGENT_NAME, SYNTHESIS)
 
 # --- Synthesis Prompt ---
+# Sub-agents are summarized as one line each (signal | key metrics | reason) built from their tool
+# output, not their prose explanations, which keeps the synthesis prompt to a few hundred tokens
 synthesis_prompt = PromptTemplate.from_template(
-    """You are a senior financial analyst synthesizing analyses from specialist agents for {token_name} (ID: {token_id}). Provide a final recommendation (Strong Buy, Buy, Hold, Sell, Strong Sell) based on their insights and your own expertise.
-
-**Agent Analyses:**
-
-1.  **SMA Crossover Analysis:**
-    *   Result: {sma_result}
+    """You are a senior financial analyst combining the signals of specialist agents for {token_name} (ID: {token_id}).
 
-2.  **Bounce Hunter Analysis (Support/Resistance):**
-    *   Result: {bounce_result}
+Agent signals (agent: signal | key metrics | reason):
+{agent_briefs}
 
-3.  **Crypto Oracle Analysis (Trader Grade & Momentum):**
-    *   Result: {oracle_result}
+In a few short paragraphs, note where the agents agree or conflict, weigh the evidence, add your own view of {token_name}'s outlook, and justify a final recommendation (Strong Buy, Buy, Hold, Sell, Strong Sell).
 
-4.  **Momentum Quant Analysis (Trader Grade % Change & Quant Grade):**
-    *   Result: {momentum_result}
-
-**Your Task:**
-
-1.  **Summarize:** Briefly state the signal/key finding from each agent.
-2.  **Compare:** Note agreements or disagreements in signals/reasoning.
-3.  **Synthesize:** Weigh the evidence. Do signals reinforce or conflict?
-4.  **Form Your Opinion:** Using your expertise, add your own assessment of {token_name}'s outlook.
-5.  **Conclude:** State your final recommendation (Strong Buy, Buy, Hold, Sell, Strong Sell).
-6.  **Explain:** Justify your recommendation by referencing specific findings about {token_name} and how they collectively support your conclusion. Address any conflicting signals and your reasoning for weighing them.
-
-Your response MUST include a clear final signal in this format at the end:
+Your response MUST end with a clear final signal in this format:
 "FINAL RECOMMENDATION: [Strong Buy/Buy/Hold/Sell/Strong Sell]"
-
-**Final Synthesized Analysis for {token_name}:**
 """
 )
 
+# Sub-agent -> (label in the synthesis prompt, analysis_data keys shown as key metrics)
+SUB_AGENT_BRIEFS = {
+    "sma_agent": ("SMA crossover", ("current_price", "sma20", "sma50")),
+    "bounce_hunter_agent": ("Support/resistance bounce", ("current_price", "nearby_levels")),
+    "crypto_oracle_agent": ("Trader grade oracle", ("latest_tg", "tgc_24h", "avg_tg_5d")),
+    "momentum_quant_agent": ("Momentum quant", ("latest_tg", "pct_change_tg", "quant_grade")),
+}
+BRIEF_REASON_MAX_CHARS = 240
+
+
+def _one_line(text: Any, max_chars: int = BRIEF_REASON_MAX_CHARS) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+
+def _metric(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    if isinstance(value, (list, tuple)):
+        return str(len(value))
+    return str(value)
+
+
+def brief_sub_result(agent_name: str, analysis_data: Optional[AnalysisResult], result_text: Optional[str]) -> str:
+    """One prompt line for a sub-agent: its tool signal, key metrics and reason, or its error."""
+    label, metric_keys = SUB_AGENT_BRIEFS[agent_name]
+    if not isinstance(analysis_data, AnalysisResult):
+        return f"- {label}: UNAVAILABLE | {_one_line(result_text or 'no result')}"
+    if analysis_data.error:
+        return f"- {label}: ERROR | {_one_line(analysis_data.error_detail or analysis_data.error)}"
+    data = analysis_data.to_dict()
+    metrics = ", ".join(f"{key}={_metric(data[key])}" for key in metric_keys if data.get(key) is not None)
+    reason = data.get("reason_string") or data.get("comparison") or ""
+    return f"- {label}: {analysis_data.signal or 'UNKNOWN'} | {metrics or 'n/a'} | {_one_line(reason)}"
+
 # --- LangGraph State ---
 class ManagerAgentState(TypedDict):
     input: Dict[str, str] # {"token_id": "...", "token_name": "..."}
@@ -70,6 +85,8 @@ class ManagerAgentState(TypedDict):
     bounce_result: Optional[str]
     oracle_result: Optional[str]
     momentum_result: Optional[str]
+    sub_analysis_data: Dict[str, Optional[AnalysisResult]] # Sub-agent name -> its tool output, for the synthesis prompt
+    speculative_synthesis: Optional[Dict[str, Any]] # Synthesis started from the tool outputs, with the briefs it assumed
     error_messages: List[str] # Collect errors from sub-agents
     final_summary: Optional[str]
     final_signal: Optional[str] # Added field to store the final signal
@@ -77,24 +94,38 @@ class ManagerAgentState(TypedDict):
 # --- Nodes ---
 
 # Helper Function to invoke a sub-agent asynchronously
-async def invoke_sub_agent(agent_app, input_data: Dict[str, Any], agent_name: str) -> str:
-    """Invokes a sub-agent graph and returns its final analysis string or an error message."""
+async def invoke_sub_agent(agent_app, input_data: Dict[str, Any], agent_name: str,
+                           on_tool_result: Optional[Callable[[AnalysisResult], None]] = None) -> Tuple[str, Optional[AnalysisResult]]:
+    """
+    Invokes a sub-agent graph and returns its final analysis string (or an error message)
+    together with the tool's analysis_data from the last attempt, if any.
+    on_tool_result is called with analysis_data as soon as the tool node produces it,
+    before the sub-agent's own LLM explanation runs.
+    """
     logger.info(f"--- Manager: Invoking {agent_name} ---")
     
     max_retries = 3
     retry_count = 0
     retry_delay = 2  # Initial delay in seconds
+    analysis_data = None
     
     while retry_count < max_retries:
         try:
             if retry_count > 0:
                 logger.info(f"--- Manager: Retry #{retry_count} for {agent_name} ---")
+                SUB_AGENT_RETRIES.labels(agent_name).inc()
                 
             # Use a unique thread_id for each sub-invocation
             config = {"configurable": {"thread_id": f"sub_{agent_name}_{str(uuid4())}"}}
             # Prepare input for the sub-agent
             sub_input = {"input": input_data}
-            final_state = await agent_app.ainvoke(sub_input, config=config)
+            with start_span(f"sub_agent.{agent_name}", agent=agent_name, attempt=retry_count + 1):
+                async for update in agent_app.astream(sub_input, config=config, stream_mode="updates"):
+                    for node_output in update.values():
+                        if on_tool_result and isinstance(node_output, dict) and isinstance(node_output.get("analysis_data"), AnalysisResult):
+                            on_tool_result(node_output["analysis_data"])
+                final_state = (await agent_app.aget_state(config)).values
+            analysis_data = final_state.get("analysis_data")
 
             # Extract result based on the agent's known output key
             if agent_name == "sma_agent":
@@ -122,37 +153,30 @@ async def invoke_sub_agent(agent_app, input_data: Dict[str, Any], agent_name: st
                             break
                 
                 # Last resort: try to extract and summarize from analysis_data if available
-                if result is None and "analysis_data" in final_state:
-                    analysis_data = final_state["analysis_data"]
-                    if isinstance(analysis_data, dict):
-                        # Try to create a basic summary from the analysis data
-                        summary_parts = []
-                        
-                        # Signal
-                        if "signal" in analysis_data:
-                            summary_parts.append(f"Signal: {analysis_data['signal']}")
-                        
-                        # Trader grade
-                        if "trader_grade" in analysis_data:
-                            summary_parts.append(f"Trader Grade: {analysis_data['trader_grade']}")
+                if result is None and isinstance(analysis_data, AnalysisResult):
+                    # Try to create a basic summary from the analysis data
+                    summary_parts = []
+                    
+                    # Signal
+                    if analysis_data.signal is not None:
+                        summary_parts.append(f"Signal: {analysis_data.signal}")
+                    
+                    # Trader grade
+                    if getattr(analysis_data, "latest_tg", None) is not None:
+                        summary_parts.append(f"Trader Grade: {analysis_data.latest_tg}")
+                    
+                    # Percent change
+                    if getattr(analysis_data, "pct_change_tg", None) is not None:
+                        summary_parts.append(f"Percent Change: {analysis_data.pct_change_tg:.2%}")
                         
-                        # Percent change
-                        if "percent_change" in analysis_data:
-                            summary_parts.append(f"Percent Change: {analysis_data['percent_change']}%")
-                            
-                        # Quant grade
-                        if "quant_grade" in analysis_data:
-                            summary_parts.append(f"Quant Grade: {analysis_data['quant_grade']}")
+                    # Quant grade
+                    if getattr(analysis_data, "quant_grade", None) is not None:
+                        summary_parts.append(f"Quant Grade: {analysis_data.quant_grade}")
                             
-                        # Additional metrics
-                        for key in ["momentum", "volatility", "trend", "volume"]:
-                            if key in analysis_data:
-                                summary_parts.append(f"{key.capitalize()}: {analysis_data[key]}")
-                                
-                        # Put together a basic fallback summary
-                        if summary_parts:
-                            result = f"Momentum Quant Analysis (Fallback Summary):\n" + "\n".join(summary_parts)
-                            logger.info(f"Created fallback summary for momentum agent from analysis_data")
+                    # Put together a basic fallback summary
+                    if summary_parts:
+                        result = f"Momentum Quant Analysis (Fallback Summary):\n" + "\n".join(summary_parts)
+                        logger.info(f"Created fallback summary for momentum agent from analysis_data")
             else:
                 result = None # Should not happen
 
@@ -169,7 +193,7 @@ async def invoke_sub_agent(agent_app, input_data: Dict[str, Any], agent_name: st
                     retry_delay *= 2  # Exponential backoff
                     continue
                 else:
-                    return f"{agent_name} Error: {error_msg} (After {max_retries} attempts)"
+                    return f"{agent_name} Error: {error_msg} (After {max_retries} attempts)", analysis_data
                     
             elif not isinstance(result, str):
                 # Handle unexpected type - retry
@@ -183,7 +207,7 @@ async def invoke_sub_agent(agent_app, input_data: Dict[str, Any], agent_name: st
                     retry_delay *= 2  # Exponential backoff
                     continue
                 else:
-                    return f"{agent_name} Error: {error_msg} (After {max_retries} attempts)"
+                    return f"{agent_name} Error: {error_msg} (After {max_retries} attempts)", analysis_data
                     
             elif result.startswith("Error:") or result.startswith("Failed") or result.startswith("Analysis Error"):
                 # Handle errors reported by the sub-agent itself - retry
@@ -196,12 +220,12 @@ async def invoke_sub_agent(agent_app, input_data: Dict[str, Any], agent_name: st
                     retry_delay *= 2  # Exponential backoff
                     continue
                 else:
-                    return f"{agent_name} Error: {result} (After {max_retries} attempts)"
+                    return f"{agent_name} Error: {result} (After {max_retries} attempts)", analysis_data
                     
             else:
                 # Successful result
                 logger.info(f"--- Manager: {agent_name} Completed Successfully ---")
-                return result
+                return result, analysis_data
 
         except Exception as e:
             logger.exception(f"Manager: Unhandled error invoking {agent_name}")
@@ -213,10 +237,62 @@ async def invoke_sub_agent(agent_app, input_data: Dict[str, Any], agent_name: st
                 retry_delay *= 2  # Exponential backoff
                 continue
             else:
-                return f"{agent_name} Invocation Error: {type(e).__name__} - {str(e)} (After {max_retries} attempts)"
+                return f"{agent_name} Invocation Error: {type(e).__name__} - {str(e)} (After {max_retries} attempts)", analysis_data
     
     # Should never reach here, but just in case
-    return f"{agent_name} Error: Maximum retries reached with no successful response"
+    return f"{agent_name} Error: Maximum retries reached with no successful response", analysis_data
+
+SUB_AGENT_NAMES = ["sma_agent", "bounce_hunter_agent", "crypto_oracle_agent", "momentum_quant_agent"]
+
+
+def _agent_briefs(sub_analysis_data: Dict[str, Optional[AnalysisResult]], sub_results: Dict[str, Optional[str]]) -> str:
+    return "\n".join(brief_sub_result(name, sub_analysis_data.get(name), sub_results.get(name))
+                     for name in SUB_AGENT_NAMES)
+
+
+def _final_briefs(state: Dict[str, Any]) -> str:
+    sub_results = {"sma_agent": state.get("sma_result", "Analysis unavailable."),
+                   "bounce_hunter_agent": state.get("bounce_result", "Analysis unavailable."),
+                   "crypto_oracle_agent": state.get("oracle_result", "Analysis unavailable."),
+                   "momentum_quant_agent": state.get("momentum_result", "Analysis unavailable.")}
+    return _agent_briefs(state.get("sub_analysis_data") or {}, sub_results)
+
+
+async def _speculative_synthesis(token_id: str, token_name: str,
+                                 tool_results: Dict[str, asyncio.Future]) -> Optional[Dict[str, Any]]:
+    """
+    Starts synthesis once every sub-agent's tool output exists, overlapping it with the
+    sub-agents' own explanation calls. Returns None when a sub-agent produced no tool output.
+    """
+    assumed = {name: await future for name, future in tool_results.items()}
+    if any(analysis_data is None for analysis_data in assumed.values()):
+        return None
+    agent_briefs = _agent_briefs(assumed, {})
+    logger.info("Manager: All tool results in; starting speculative synthesis.")
+    result = await synthesize(token_id, token_name, agent_briefs)
+    return None if result["synthesis_failed"] else {"agent_briefs": agent_briefs, **result}
+
+
+async def _settle_speculation(speculation: asyncio.Task, tool_results: Dict[str, asyncio.Future],
+                              final_briefs: str) -> Optional[Dict[str, Any]]:
+    """
+    Keeps the speculative synthesis if the briefs it assumed still match the sub-agents' final
+    results; otherwise cancels it so synthesize_results_node reissues the call.
+    """
+    assumed = {name: future.result() for name, future in tool_results.items() if future.done()}
+    if len(assumed) < len(SUB_AGENT_NAMES) or None in assumed.values():
+        speculation.cancel()
+        MANAGER_SPECULATIVE_SYNTHESIS.labels("skipped").inc()
+        return None
+    if _agent_briefs(assumed, {}) != final_briefs:
+        speculation.cancel()
+        MANAGER_SPECULATIVE_SYNTHESIS.labels("reissued").inc()
+        logger.info("Manager: Sub-agent results changed after speculative synthesis started; reissuing synthesis.")
+        return None
+    speculative = await speculation
+    MANAGER_SPECULATIVE_SYNTHESIS.labels("used" if speculative else "failed").inc()
+    return speculative
+
 
 # Node to run sub-agents in parallel
 async def run_sub_agents_node(state: ManagerAgentState):
@@ -236,67 +312,64 @@ async def run_sub_agents_node(state: ManagerAgentState):
              "final_summary": "Analysis halted due to missing token ID." # Prevent synthesis
          }
 
-    # Define tasks for asyncio.gather
-    tasks = [
-        invoke_sub_agent(sma_app, input_data, "sma_agent"),
-        invoke_sub_agent(bounce_hunter_app, input_data, "bounce_hunter_agent"),
-        invoke_sub_agent(crypto_oracle_app, input_data, "crypto_oracle_agent"),
-        invoke_sub_agent(momentum_quant_app, input_data, "momentum_quant_agent")
-    ]
+    # Each sub-agent resolves its future with the first tool output it produces (None if it never does)
+    loop = asyncio.get_running_loop()
+    tool_results = {agent_name: loop.create_future() for agent_name in SUB_AGENT_NAMES}
+
+    def resolver(future: asyncio.Future):
+        return lambda analysis_data: future.done() or future.set_result(analysis_data)
+
+    tasks = []
+    for agent_name in SUB_AGENT_NAMES:
+        task = asyncio.create_task(invoke_sub_agent(await load_agent_app(agent_name), input_data, agent_name,
+                                                    on_tool_result=resolver(tool_results[agent_name])))
+        task.add_done_callback(lambda _, future=tool_results[agent_name]: future.done() or future.set_result(None))
+        tasks.append(task)
+
+    speculation = None
+    if settings.MANAGER_SPECULATIVE_SYNTHESIS:
+        speculation = asyncio.create_task(_speculative_synthesis(token_id, token_name, tool_results))
 
     # Run tasks concurrently
-    results = await asyncio.gather(*tasks)
+    try:
+        outcomes = await asyncio.gather(*tasks)
+    except BaseException:
+        if speculation is not None:
+            speculation.cancel()
+        raise
+    results = [result for result, _ in outcomes]
     sma_result, bounce_result, oracle_result, momentum_result = results
+    sub_analysis_data = {name: analysis_data for name, (_, analysis_data) in zip(SUB_AGENT_NAMES, outcomes)}
 
     # Collect errors from results
     errors = [res for res in results if "Error:" in res]
-
     logger.info(f"Manager: Sub-agent results collected. Found {len(errors)} errors.")
-    return {
+
+    update = {
         "sma_result": sma_result,
         "bounce_result": bounce_result,
         "oracle_result": oracle_result,
         "momentum_result": momentum_result,
+        "sub_analysis_data": sub_analysis_data,
         "error_messages": errors # Store collected error strings
     }
+    if speculation is not None:
+        update["speculative_synthesis"] = await _settle_speculation(speculation, tool_results, _final_briefs(update))
+    return update
 
 
 # Node to synthesize results using LLM
-async def synthesize_results_node(state: ManagerAgentState):
-    logger.info("--- Manager: Synthesizing Results Node ---")
-
-    # If run_sub_agents_node already set a final_summary due to input error, skip synthesis
-    if state.get("final_summary"):
-        logger.warning("Skipping synthesis node due to prior fatal error (e.g., missing token_id).")
-        return {} # No changes needed
-
-    sma_result = state.get("sma_result", "Analysis unavailable.")
-    bounce_result = state.get("bounce_result", "Analysis unavailable.")
-    oracle_result = state.get("oracle_result", "Analysis unavailable.")
-    momentum_result = state.get("momentum_result", "Analysis unavailable.")
-    errors = state.get("error_messages", [])
-    token_id = state['input'].get('token_id', 'N/A')
-    token_name = state['input'].get('token_name', 'N/A')
-
-    if errors:
-        logger.warning(f"Synthesizing results based on potentially incomplete data due to {len(errors)} sub-agent errors.")
-        # LLM will see the errors embedded within the result strings
-
-    # Prepare prompt input
-    prompt_input = {
-        "token_id": token_id,
-        "token_name": token_name,
-        "sma_result": sma_result,
-        "bounce_result": bounce_result,
-        "oracle_result": oracle_result,
-        "momentum_result": momentum_result,
-    }
+async def synthesize(token_id: str, token_name: str, agent_briefs: str) -> Dict[str, Any]:
+    """Runs the synthesis LLM call; returns final_summary, final_signal and whether it failed."""
+    prompt_input = {"token_id": token_id, "token_name": token_name, "agent_briefs": agent_briefs}
+    log_payload(logger, "Synthesis prompt input", prompt_input)
 
     try:
         synthesis_chain = synthesis_prompt | llm
         logger.info("Manager: Invoking LLM for final synthesis...")
         # Use async invoke
-        llm_response = await synthesis_chain.ainvoke(prompt_input)
+        async with llm_gateway.slot(AGENT_NAME, LLMPriority.SYNTHESIS):
+            llm_response = await synthesis_chain.ainvoke(prompt_input)
 
         if hasattr(llm_response, 'content'):
              summary = llm_response.content
@@ -339,18 +412,46 @@ async def synthesize_results_node(state: ManagerAgentState):
                 final_signal = "HOLD"
             
         logger.info(f"Manager: Extracted final signal: {final_signal}")
-        return {"final_summary": summary.strip(), "final_signal": final_signal}
+        return {"final_summary": summary.strip(), "final_signal": final_signal, "synthesis_failed": False}
 
     except Exception as e:
         logger.exception("Manager: Error invoking LLM for synthesis")
         # Return an error summary, but also keep individual results
-        return {"final_summary": f"Error during final synthesis: {type(e).__name__} - {str(e)}", "final_signal": None}
+        return {"final_summary": f"Error during final synthesis: {type(e).__name__} - {str(e)}", "final_signal": None,
+                "synthesis_failed": True}
+
+
+
+async def synthesize_results_node(state: ManagerAgentState):
+    logger.info("--- Manager: Synthesizing Results Node ---")
+
+    # If run_sub_agents_node already set a final_summary due to input error, skip synthesis
+    if state.get("final_summary"):
+        logger.warning("Skipping synthesis node due to prior fatal error (e.g., missing token_id).")
+        return {} # No changes needed
+
+    errors = state.get("error_messages", [])
+    token_id = state['input'].get('token_id', 'N/A')
+    token_name = state['input'].get('token_name', 'N/A')
+
+    if errors:
+        logger.warning(f"Synthesizing results based on potentially incomplete data due to {len(errors)} sub-agent errors.")
+        # LLM will see the errors embedded within the briefs
+
+    agent_briefs = _final_briefs(state)
+    speculative = state.get("speculative_synthesis")
+    if speculative and speculative["agent_briefs"] == agent_briefs:
+        logger.info("Manager: Using speculative synthesis; sub-agent results matched what it assumed.")
+        result = speculative
+    else:
+        result = await synthesize(token_id, token_name, agent_briefs)
+    return {"final_summary": result["final_summary"], "final_signal": result["final_signal"]}
 
 
 # --- Build Graph ---
 workflow = StateGraph(ManagerAgentState)
-workflow.add_node("run_sub_agents", run_sub_agents_node)
-workflow.add_node("synthesize_results", synthesize_results_node)
+workflow.add_node("run_sub_agents", timed_node(AGENT_NAME, run_sub_agents_node))
+workflow.add_node("synthesize_results", timed_node(AGENT_NAME, synthesize_results_node))
 
 workflow.set_entry_point("run_sub_agents")
 workflow.add_edge("run_sub_agents", "synthesize_results")
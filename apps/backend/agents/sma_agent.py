@@ -5,7 +5,6 @@ from datetime import datetime, timedelta
 import statistics
 import requests
 
-from langchain_openai import ChatOpenAI
 from langchain_core.agents import AgentAction
 from langchain.agents import Tool
 from langchain.tools import StructuredTool
@@ -13,31 +12,54 @@ from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolExecutor
 from langgraph.checkpoint.memory import MemorySaver
 from langchain.prompts import PromptTemplate
-from core.config import settings
+from core.log_config import log_payload
+from core.token_metrics import fetch_token_metrics
+from core.tracing import start_span
+from core.metrics import timed_node
+from core.llm import EXPLANATION, get_chat_model
+from core.llm_gateway import llm_gateway
+from core.input_memo import input_digest, recall_analysis, remember_analysis, recall_reasoning, remember_reasoning
+from core.analysis_result import AnalysisResult, result_type
+
+AGENT_NAME = "sma_agent"
 
 # Logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+
+# --- Result ---
+@result_type
+class SMAResult(AnalysisResult):
+    token_name: Optional[str] = None
+    current_price: Optional[float] = None
+    sma20: Optional[float] = None
+    sma50: Optional[float] = None
+    comparison: Optional[str] = None
+
+    def reasoning_components(self) -> Dict[str, Any]:
+        if self.error_detail or self.signal is None:
+            return AnalysisResult.reasoning_components(self)
+        price = self.current_price
+        comps = {"current_price": price, "sma20": self.sma20, "sma50": self.sma50}
+        if self.signal == "BUY":
+            comps.update(buy_check=True, above_sma20=True, above_sma50=True)
+        elif self.signal == "SELL":
+            comps.update(sell_check=True, below_sma20=True, below_sma50=True)
+        else:
+            comps.update(hold_reason="mixed_signals", above_sma20=price > self.sma20, above_sma50=price > self.sma50)
+        return comps
+
 
 # --- SMA Tool ---
-def sma_analysis(token_id: str, token_name: str) -> Dict[str, Any]:
+def sma_analysis(token_id: str, token_name: str) -> SMAResult:
     """
     Calculates SMA data for a crypto coin based on its Token Metrics ID.
     Uses the provided token_name in the output.
-    Returns a dictionary containing: token_id, token_name, current_price, sma20, sma50, signal, and basic comparison info.
+    Returns an SMAResult with token_id, token_name, current_price, sma20, sma50, signal, and basic comparison info.
     Handles potential errors during data fetching or calculation.
     """
-    logger.info(f"--- sma_analysis Tool ---")
-    logger.info(f"Received token_id: {token_id}, token_name: {token_name}")
+    logger.debug("sma_analysis tool received token_id: %s, token_name: %s", token_id, token_name)
 
-    analysis_data = {
-        "token_id": token_id, 
-        "token_name": token_name, 
-        "error": None,
-        "reasoning_components": {},  # Add reasoning_components field to match other agents
-        "reason_string": None  # Add reason_string field for consistency
-    } # Initialize result dict
+    analysis_data = SMAResult(token_id=token_id, token_name=token_name)
 
     try:
         # Fetch data
@@ -45,20 +67,16 @@ def sma_analysis(token_id: str, token_name: str) -> Dict[str, Any]:
         start_date = end_date - timedelta(days=65)
         end_date_str = end_date.strftime('%Y-%m-%d')
         start_date_str = start_date.strftime('%Y-%m-%d')
-        url = f"https://api.tokenmetrics.com/v2/daily-ohlcv?token_id={token_id}&startDate={start_date_str}&endDate={end_date_str}&limit=60&page=0"
-        headers = {
-            "accept": "application/json",
-            "api_key": settings.TOKEN_METRICS_API_KEY
-        }
-        response = requests.get(url, headers=headers)
+        params = {"token_id": token_id, "startDate": start_date_str, "endDate": end_date_str, "limit": 60, "page": 0}
+        response = fetch_token_metrics("daily-ohlcv", params, timeout=None)
         response.raise_for_status()
         data = response.json()
 
         if not data.get("success", False) or not data.get("data"):
             error_msg = f"No data found for token_id {token_id}."
-            analysis_data["error"] = error_msg
-            analysis_data["reason_string"] = error_msg
-            analysis_data["reasoning_components"]["error"] = error_msg
+            analysis_data.error = error_msg
+            analysis_data.reason_string = error_msg
+            analysis_data.error_detail = error_msg
             return analysis_data
 
         # Sort data
@@ -66,109 +84,101 @@ def sma_analysis(token_id: str, token_name: str) -> Dict[str, Any]:
             daily_data = sorted(data["data"], key=lambda x: x["DATE"], reverse=False)
         except KeyError:
              error_msg = f"Data format error for token_id {token_id}: Missing 'DATE' key."
-             analysis_data["error"] = error_msg
-             analysis_data["reason_string"] = error_msg
-             analysis_data["reasoning_components"]["error"] = error_msg
+             analysis_data.error = error_msg
+             analysis_data.reason_string = error_msg
+             analysis_data.error_detail = error_msg
              return analysis_data
         except Exception as e:
              logger.exception(f"Error sorting data for token_id {token_id}: {e}")
              error_msg = f"Failed to process data for token_id {token_id}: Error during sorting."
-             analysis_data["error"] = error_msg
-             analysis_data["reason_string"] = error_msg
-             analysis_data["reasoning_components"]["error"] = error_msg
+             analysis_data.error = error_msg
+             analysis_data.reason_string = error_msg
+             analysis_data.error_detail = error_msg
              return analysis_data
 
         # Check data length and extract closes
         if len(daily_data) < 50:
             error_msg = f"Insufficient data for token_id {token_id}. Needed 50 days, got {len(daily_data)}."
-            analysis_data["error"] = error_msg
-            analysis_data["reason_string"] = error_msg
-            analysis_data["reasoning_components"]["error"] = error_msg
+            analysis_data.error = error_msg
+            analysis_data.reason_string = error_msg
+            analysis_data.error_detail = error_msg
             return analysis_data
         relevant_data = daily_data[-50:]
         try:
             closes = [day["CLOSE"] for day in relevant_data]
         except KeyError:
             error_msg = f"Data format error for token_id {token_id}: Missing 'CLOSE' key."
-            analysis_data["error"] = error_msg
-            analysis_data["reason_string"] = error_msg
-            analysis_data["reasoning_components"]["error"] = error_msg
+            analysis_data.error = error_msg
+            analysis_data.reason_string = error_msg
+            analysis_data.error_detail = error_msg
             return analysis_data
         if len(closes) < 50: # Failsafe
              error_msg = f"Data processing error for token_id {token_id}: Could not extract 50 closing prices."
-             analysis_data["error"] = error_msg
-             analysis_data["reason_string"] = error_msg
-             analysis_data["reasoning_components"]["error"] = error_msg
+             analysis_data.error = error_msg
+             analysis_data.reason_string = error_msg
+             analysis_data.error_detail = error_msg
              return analysis_data
 
+        # Same 50-day window as last time: reuse that result
+        digest = input_digest(token_name, [(day["DATE"], day["CLOSE"]) for day in relevant_data])
+        previous = recall_analysis(AGENT_NAME, token_id, digest)
+        if previous is not None:
+            logger.info(f"SMA inputs unchanged for {token_id}; reusing previous analysis")
+            return previous
+
         # Calculate metrics
         current_price = closes[-1]
-        analysis_data["current_price"] = current_price
+        analysis_data.current_price = current_price
         if len(closes) < 20: # Failsafe
            error_msg = f"Not enough data points ({len(closes)}) to calculate 20-day SMA for token_id {token_id}."
-           analysis_data["error"] = error_msg
-           analysis_data["reason_string"] = error_msg
-           analysis_data["reasoning_components"]["error"] = error_msg
+           analysis_data.error = error_msg
+           analysis_data.reason_string = error_msg
+           analysis_data.error_detail = error_msg
            return analysis_data
         sma20 = statistics.mean(closes[-20:])
         sma50 = statistics.mean(closes[-50:])
-        analysis_data["sma20"] = sma20
-        analysis_data["sma50"] = sma50
-
-        # Store all values in reasoning_components too
-        reasoning_comps = {
-            "current_price": current_price,
-            "sma20": sma20,
-            "sma50": sma50
-        }
+        analysis_data.sma20 = sma20
+        analysis_data.sma50 = sma50
 
         # Determine signal and basic comparison
-        price = analysis_data["current_price"]
+        price = analysis_data.current_price
         if price > sma20 and price > sma50:
             signal = "BUY"
             comparison = f"Current price (${price:.2f}) > SMA20 (${sma20:.2f}) and > SMA50 (${sma50:.2f})"
-            reasoning_comps["buy_check"] = True
-            reasoning_comps["above_sma20"] = True
-            reasoning_comps["above_sma50"] = True
         elif price < sma20 and price < sma50:
             signal = "SELL"
             comparison = f"Current price (${price:.2f}) < SMA20 (${sma20:.2f}) and < SMA50 (${sma50:.2f})"
-            reasoning_comps["sell_check"] = True
-            reasoning_comps["below_sma20"] = True
-            reasoning_comps["below_sma50"] = True
         else:
             signal = "NO_SIGNAL"
             comparison = f"Current price (${price:.2f}) is not consistently above or below both SMAs (SMA20=${sma20:.2f}, SMA50=${sma50:.2f})"
-            reasoning_comps["hold_reason"] = "mixed_signals"
-            reasoning_comps["above_sma20"] = price > sma20
-            reasoning_comps["above_sma50"] = price > sma50
             
-        analysis_data["signal"] = signal
-        analysis_data["comparison"] = comparison
-        analysis_data["reason_string"] = comparison
-        analysis_data["reasoning_components"] = reasoning_comps
+        analysis_data.signal = signal
+        analysis_data.comparison = comparison
+        analysis_data.reason_string = comparison
 
-        logger.info(f"Calculated analysis data for {token_id}: {analysis_data}")
+        remember_analysis(AGENT_NAME, token_id, digest, analysis_data)
+        logger.info(f"SMA analysis complete for {token_id}: Signal={signal}")
+        log_payload(logger, f"Calculated analysis data for {token_id}", analysis_data)
         return analysis_data
 
     except requests.exceptions.RequestException as e:
          error_msg = f"API request failed for token_id {token_id}: {str(e)}"
-         analysis_data["error"] = error_msg
-         analysis_data["reason_string"] = error_msg
-         analysis_data["reasoning_components"]["error"] = error_msg
+         analysis_data.error = error_msg
+         analysis_data.reason_string = error_msg
+         analysis_data.error_detail = error_msg
          return analysis_data
     except statistics.StatisticsError as e:
          error_msg = f"Calculation error for token_id {token_id}: {str(e)}"
-         analysis_data["error"] = error_msg
-         analysis_data["reason_string"] = error_msg
-         analysis_data["reasoning_components"]["error"] = error_msg
+         analysis_data.error = error_msg
+         analysis_data.reason_string = error_msg
+         analysis_data.error_detail = error_msg
          return analysis_data
     except Exception as e:
         logger.exception(f"Unexpected error analyzing token_id {token_id}: {str(e)}")
         error_msg = f"Failed to analyze token_id {token_id}: An unexpected error occurred ({type(e).__name__})."
-        analysis_data["error"] = error_msg
-        analysis_data["reason_string"] = error_msg
-        analysis_data["reasoning_components"]["error"] = error_msg
+        analysis_data.error = error_msg
+        analysis_data.reason_string = error_msg
+        analysis_data.error_detail = error_msg
         return analysis_data
 
 # --- Tool & Executor ---
@@ -180,11 +190,7 @@ sma_tool = StructuredTool.from_function(
 tool_executor = ToolExecutor([sma_tool])
 
 # --- LLM for Reasoning ---
-llm = ChatOpenAI(
-    temperature=0.1,
-    api_key=settings.OPENAI_API_KEY,
-    model="gpt-4-0125-preview"
-)
+llm = get_chat_model(AGENT_NAME, EXPLANATION)
 
 # --- Reasoning Prompt ---
 reasoning_prompt = PromptTemplate.from_template(
@@ -212,10 +218,10 @@ Explanation:"""
 class AgentState(TypedDict):
     input: Dict[str, str] # Expects {"token_id": "...", "token_name": "..."}
     action: Optional[AgentAction]
-    analysis_data: Optional[Dict[str, Any]] # Result from sma_analysis tool
+    analysis_data: Optional[SMAResult] # Result from sma_analysis tool
     reason_string: Optional[str] # Pre-LLM reason string from tool
     llm_reasoning: Optional[str] # Final explanation from LLM
-    intermediate_steps: Annotated[list[tuple[AgentAction, Dict[str, Any]]], operator.add]
+    intermediate_steps: Annotated[list[tuple[AgentAction, SMAResult]], operator.add]
 
 # --- Nodes (Renamed for consistency) ---
 def prepare_tool_call(state: AgentState):
@@ -223,24 +229,24 @@ def prepare_tool_call(state: AgentState):
     input_data = state['input']
     token_id = input_data.get('token_id')
     token_name = input_data.get('token_name', 'Unknown Token') # Default name if missing
-    logger.info(f"Input token_id: {token_id}, token_name: {token_name}")
+    logger.debug("Input token_id: %s, token_name: %s", token_id, token_name)
 
     if not token_id:
         logger.error("Missing 'token_id' in input for prepare_tool_call node")
         # Return error state that skips tool execution
         return {
-            "analysis_data": { # Store error info here
-                 "token_id": token_id, 
-                 "token_name": token_name, 
-                 "error": "Missing 'token_id' in input.",
-                 "reason_string": "Input error: Token ID was not provided.",
-                 "reasoning_components": {"error": "Input error: Token ID was not provided."}
-            }
+            "analysis_data": SMAResult( # Store error info here
+                 token_id=token_id,
+                 token_name=token_name,
+                 error="Missing 'token_id' in input.",
+                 reason_string="Input error: Token ID was not provided.",
+                 error_detail="Input error: Token ID was not provided."
+            )
         }
 
     tool_input = {"token_id": token_id, "token_name": token_name}
     action = AgentAction(tool="sma_analysis_calculator", tool_input=tool_input, log=f"Preparing SMA calculation for {token_name} (ID: {token_id})")
-    logger.info(f"Prepared action: {action}")
+    logger.debug("Prepared action: %s", action)
     # Initialize intermediate_steps for consistency
     return {"action": action, "intermediate_steps": []}
 
@@ -251,20 +257,20 @@ def execute_tool(state: AgentState):
     token_name_for_error = state.get("input", {}).get("token_name", "Unknown Token")
 
     # Check if prepare_node already put an error in analysis_data
-    if state.get("analysis_data") and state["analysis_data"].get("error"):
-         logger.warning(f"Skipping tool execution due to error in prepare step: {state['analysis_data']['error']}")
+    if state.get("analysis_data") and state["analysis_data"].error:
+         logger.warning(f"Skipping tool execution due to error in prepare step: {state['analysis_data'].error}")
          return {} # No changes needed, error already in analysis_data
 
     if not isinstance(action, AgentAction):
          logger.error(f"execute_tool_node received non-action: {action}")
          error_message = f"Internal error: Tool execution step received invalid action state."
-         analysis_result_data = {
-             "error": error_message,
-             "reason_string": error_message,
-             "token_id": state.get("input", {}).get("token_id"),
-             "token_name": token_name_for_error,
-             "reasoning_components": {"error": error_message} # Add error to reasoning_components
-         }
+         analysis_result_data = SMAResult(
+             error=error_message,
+             reason_string=error_message,
+             token_id=state.get("input", {}).get("token_id"),
+             token_name=token_name_for_error,
+             error_detail=error_message
+         )
          # Log a dummy action/error pair
          dummy_action = AgentAction(tool="error_state", tool_input={}, log=error_message)
          return {
@@ -274,31 +280,29 @@ def execute_tool(state: AgentState):
          }
 
     try:
-        output_dict = tool_executor.invoke(action)
-        logger.info(f"Tool output dictionary: {output_dict}")
+        with start_span(f"tool.{action.tool}", **action.tool_input):
+            output_dict = tool_executor.invoke(action)
+        log_payload(logger, "Tool output", output_dict)
         analysis_result_data = output_dict
 
-        if isinstance(output_dict, dict) and output_dict.get("error"):
-            logger.warning(f"SMA calculation tool reported an error: {output_dict['error']}")
+        if isinstance(output_dict, SMAResult) and output_dict.error:
+            logger.warning(f"SMA calculation tool reported an error: {output_dict.error}")
 
     except Exception as e:
         logger.exception(f"Error executing tool {action.tool}")
         error_message = f"Tool execution failed: {type(e).__name__}"
-        analysis_result_data = {
-             "error": error_message,
-             "reason_string": f"Internal error during tool execution: {str(e)}",
-             "token_id": action.tool_input.get("token_id"),
-             "token_name": action.tool_input.get("token_name"),
-             "reasoning_components": {"error": f"Internal error during tool execution: {str(e)}"} # Add error to reasoning_components
-        }
+        analysis_result_data = SMAResult(
+             error=error_message,
+             reason_string=f"Internal error during tool execution: {str(e)}",
+             token_id=action.tool_input.get("token_id"),
+             token_name=action.tool_input.get("token_name"),
+             error_detail=f"Internal error during tool execution: {str(e)}"
+        )
 
     # Extract reason_string (for SMA, use comparison field as reason_string)
     reason_string = None
-    if isinstance(analysis_result_data, dict):
-        reason_string = analysis_result_data.get("reason_string") or analysis_result_data.get("comparison")
-        # Also store the reason_string in the analysis_data for consistency if not already there
-        if reason_string and "reason_string" not in analysis_result_data:
-            analysis_result_data["reason_string"] = reason_string
+    if isinstance(analysis_result_data, SMAResult):
+        reason_string = analysis_result_data.reason_string or analysis_result_data.comparison
 
     # Create intermediate_steps with the actual action/result
     intermediate_steps = [(action, analysis_result_data)]
@@ -309,7 +313,7 @@ def execute_tool(state: AgentState):
         "intermediate_steps": intermediate_steps
     }
 
-def generate_llm_reasoning(state: AgentState):
+async def generate_llm_reasoning(state: AgentState):
     logger.info("--- SMA Agent: Generating LLM Reasoning Node ---")
     analysis_data = state.get("analysis_data")
     reason_string = state.get("reason_string") # Get pre-calculated reason
@@ -319,30 +323,23 @@ def generate_llm_reasoning(state: AgentState):
         return {"llm_reasoning": "Error: Analysis data was missing."}
 
     # Extract token information
-    token_id = analysis_data.get("token_id", "N/A")
-    token_name = analysis_data.get("token_name", f"Token ID {token_id}")
+    token_id = analysis_data.token_id or "N/A"
+    token_name = analysis_data.token_name or f"Token ID {token_id}"
 
     # If tool execution resulted in an error stored in analysis_data
-    if analysis_data.get("error"):
-        error_msg = analysis_data["error"]
+    if analysis_data.error:
+        error_msg = analysis_data.error
         # Use the reason_string which should contain the error details now
-        reasoning_error = reason_string or analysis_data.get("reason_string", "Unknown calculation error")
-        # Also check reasoning_components for error message
-        if reasoning_error == "Unknown calculation error" and isinstance(analysis_data.get("reasoning_components"), dict):
-            reasoning_error = analysis_data["reasoning_components"].get("error", reasoning_error)
+        reasoning_error = reason_string or analysis_data.reason_string or analysis_data.error_detail or "Unknown calculation error"
         logger.warning(f"Skipping LLM reasoning due to previous error: {error_msg}")
         final_explanation = f"Analysis Error for {token_name} (ID: {token_id}): {reasoning_error}"
         return {"llm_reasoning": final_explanation}
 
-    # Get data from reasoning_components if available
-    reasoning_comps = analysis_data.get("reasoning_components", {})
-    
-    # Get values from reasoning_components if available, otherwise from analysis_data directly
-    current_price = reasoning_comps.get("current_price") or analysis_data.get("current_price")
-    sma20 = reasoning_comps.get("sma20") or analysis_data.get("sma20")
-    sma50 = reasoning_comps.get("sma50") or analysis_data.get("sma50")
-    signal = analysis_data.get("signal", "UNKNOWN")
-    comparison = analysis_data.get("comparison") or reason_string
+    current_price = analysis_data.current_price
+    sma20 = analysis_data.sma20
+    sma50 = analysis_data.sma50
+    signal = analysis_data.signal or "UNKNOWN"
+    comparison = analysis_data.comparison or reason_string
 
     # Check for required keys
     if current_price is None or sma20 is None or sma50 is None or signal is None or comparison is None:
@@ -355,6 +352,11 @@ def generate_llm_reasoning(state: AgentState):
         if comparison is None: missing_values.append("comparison")
         return {"llm_reasoning": f"Error: Analysis data incomplete, missing values: {missing_values}"}
 
+    previous_reasoning = await recall_reasoning(AGENT_NAME, analysis_data)
+    if previous_reasoning is not None:
+        logger.info(f"Reusing LLM reasoning for {token_name}; analysis inputs unchanged")
+        return {"llm_reasoning": previous_reasoning}
+
     # Prepare prompt input
     prompt_input = {
         "token_name": token_name,
@@ -367,15 +369,18 @@ def generate_llm_reasoning(state: AgentState):
 
     try:
         reasoning_chain = reasoning_prompt | llm
-        logger.info(f"Invoking LLM with data for {token_name}: {prompt_input}")
-        llm_response = reasoning_chain.invoke(prompt_input)
+        logger.info(f"Invoking LLM for {token_name}")
+        log_payload(logger, "LLM prompt input", prompt_input)
+        async with llm_gateway.slot(AGENT_NAME):
+            llm_response = await reasoning_chain.ainvoke(prompt_input)
 
         if hasattr(llm_response, 'content'):
              reasoning_text = llm_response.content
         else:
              reasoning_text = str(llm_response)
 
-        logger.info(f"LLM generated reasoning for {token_name}: {reasoning_text}")
+        log_payload(logger, f"LLM generated reasoning for {token_name}", reasoning_text)
+        await remember_reasoning(AGENT_NAME, analysis_data, reasoning_text.strip())
         return {"llm_reasoning": reasoning_text.strip()}
 
     except Exception as e:
@@ -384,9 +389,9 @@ def generate_llm_reasoning(state: AgentState):
 
 # --- Build Graph ---
 workflow = StateGraph(AgentState)
-workflow.add_node("prepare_tool_call", prepare_tool_call)
-workflow.add_node("execute_tool", execute_tool)
-workflow.add_node("generate_llm_reasoning", generate_llm_reasoning)
+workflow.add_node("prepare_tool_call", timed_node(AGENT_NAME, prepare_tool_call))
+workflow.add_node("execute_tool", timed_node(AGENT_NAME, execute_tool))
+workflow.add_node("generate_llm_reasoning", timed_node(AGENT_NAME, generate_llm_reasoning))
 workflow.set_entry_point("prepare_tool_call")
 workflow.add_edge("prepare_tool_call", "execute_tool")
 workflow.add_edge("execute_tool", "generate_llm_reasoning")
@@ -398,12 +403,13 @@ app = workflow.compile(checkpointer=memory)
 
 # --- Manual Test ---
 if __name__ == "__main__":
+    import asyncio
     from uuid import uuid4
     config = {"configurable": {"thread_id": str(uuid4())}}
     token_id_to_test = "3306" # Example Token ID for ETH on Token Metrics
     token_name_to_test = "Ethereum"
     test_input = {"token_id": token_id_to_test, "token_name": token_name_to_test}
-    result = app.invoke({"input": test_input}, config=config)
+    result = asyncio.run(app.ainvoke({"input": test_input}, config=config))
 
     final_output = result.get("llm_reasoning", "No LLM reasoning found in state.")
     print(f"--- Final LLM Explanation for {token_name_to_test} (ID: {token_id_to_test}) ---")
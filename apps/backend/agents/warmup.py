@@ -0,0 +1,108 @@
+"""
+Cache warming for the most requested tokens.
+
+At startup, and again after each daily rollover of the upstream data, the sub-agents listed in
+CACHE_WARMUP_AGENTS are run for the top CACHE_WARMUP_TOKENS tokens: the ones requested most
+since the worker started, padded with the first tokens of the dataset (market-cap order).
+That fills the Token Metrics response cache and the input memo, and publishes fresh signals
+for the consensus ranking. Every chat model call made while warming runs at BACKGROUND
+priority, so live requests are always served first.
+"""
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import List
+from uuid import uuid4
+
+from agents.loader import load_agent_app
+from core.analysis_result import AnalysisResult
+from core.config import settings
+from core.llm_gateway import background_priority
+from core.signal_events import signal_broadcaster
+from core.token_index import TokenInfo, get_token_index
+
+logger = logging.getLogger(__name__)
+
+# token_id -> agent requests seen by this worker
+_requests: Counter = Counter()
+
+
+def record_token_request(token_id):
+    """Counts an agent request for the token, so the next warm-up covers it."""
+    if settings.CACHE_WARMUP_TOKENS > 0:
+        _requests[str(token_id)] += 1
+
+
+def _warm_tokens(count: int) -> List[TokenInfo]:
+    index = get_token_index()
+    tokens, seen = [], set()
+    for token_id, _ in _requests.most_common():
+        token = index.get(token_id)
+        if token is not None:
+            tokens.append(token)
+            seen.add(token.token_id)
+        if len(tokens) >= count:
+            return tokens
+    for position in range(len(index)):
+        token = index.at(position)
+        if token.token_id not in seen:
+            tokens.append(token)
+        if len(tokens) >= count:
+            break
+    return tokens
+
+
+def _seconds_until_rollover(now: datetime) -> float:
+    hour, minute = (int(part) for part in settings.CACHE_WARMUP_ROLLOVER_UTC.split(":"))
+    rollover = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if rollover <= now:
+        rollover += timedelta(days=1)
+    return (rollover - now).total_seconds()
+
+
+async def _warm(agent: str, token: TokenInfo) -> bool:
+    app = await load_agent_app(agent)
+    # Same shape as the agent routes, which take token_id as a string
+    input_data = {"token_id": str(token.token_id), "token_name": token.token_name, "token_symbol": token.token_symbol}
+    final_state = await app.ainvoke({"input": input_data}, config={"configurable": {"thread_id": str(uuid4())}})
+    analysis_data = final_state.get("analysis_data")
+    if not isinstance(analysis_data, AnalysisResult) or analysis_data.error:
+        return False
+    signal = analysis_data.signal
+    if signal == "NO_SIGNAL":  # SMA agent; the routes report it as HOLD
+        signal = "HOLD"
+    await signal_broadcaster.publish(token.token_id, agent, signal, analysis_data)
+    return True
+
+
+async def warm_caches():
+    """Runs the warm-up agents for the top tokens, CACHE_WARMUP_CONCURRENCY at a time."""
+    tokens = _warm_tokens(settings.CACHE_WARMUP_TOKENS)
+    semaphore = asyncio.Semaphore(max(settings.CACHE_WARMUP_CONCURRENCY, 1))
+
+    async def run(agent: str, token: TokenInfo) -> bool:
+        async with semaphore:
+            try:
+                return await _warm(agent, token)
+            except Exception as e:
+                logger.warning(f"Cache warming failed for {agent} on token {token.token_id}: {e!r}")
+                return False
+
+    started = asyncio.get_running_loop().time()
+    background = background_priority.set(True)  # inherited by the tasks gather starts
+    try:
+        results = await asyncio.gather(*(run(agent, token) for token in tokens for agent in settings.CACHE_WARMUP_AGENTS))
+    finally:
+        background_priority.reset(background)
+    logger.info(f"Warmed {sum(results)}/{len(results)} agent runs for {len(tokens)} tokens "
+                f"in {asyncio.get_running_loop().time() - started:.1f}s")
+
+
+async def run_cache_warming():
+    """Warms the caches now, then again after every daily rollover. Meant to run as a background task."""
+    if settings.CACHE_WARMUP_TOKENS <= 0 or not settings.CACHE_WARMUP_AGENTS:
+        return
+    while True:
+        await warm_caches()
+        await asyncio.sleep(_seconds_until_rollover(datetime.now(timezone.utc)))
@@ -0,0 +1,219 @@
+"""
+End-to-end benchmark of the API against local Token Metrics / OpenAI stand-ins.
+
+Starts stub_server.py and the app (see harness.local_stack), then for every scenario and
+concurrency level sends a fixed number of requests from that many concurrent clients and
+records throughput, error rate, p50/p95/p99 latency and the average prompt/completion tokens
+per LLM call by agent (from /metrics). Nothing leaves the machine, so runs
+are reproducible and cost no API quota or OpenAI credits.
+
+Requests cycle through a handful of tokens, so with the caches on nearly every request after the
+first few is a cache hit. By default the suite runs twice: "warm" with the caches as configured and
+"cold" with every response cache off (harness.COLD_CACHE_ENV), and the two are reported separately.
+A request only counts as successful if it returns a 2xx/3xx without an `error` field.
+
+Usage (from apps/backend):
+    python benchmarks/e2e.py [--concurrency 1 4 16] [--requests 40] [--scenarios analysis_manager wallet_get]
+                             [--llm-latency-ms 800] [--tm-latency-ms 80] [--caches warm cold]
+                             [--output e2e.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from harness import BACKEND_DIR, COLD_CACHE_ENV, local_stack, response_ok, summarize
+
+API = "/api/v1"
+
+# The first tokens of frontend/data/tokens.json
+TOKENS = [
+    ("3306", "Ethereum"), ("3369", "XRP"), ("3312", "BNB"), ("3988", "Solana"),
+    ("3393", "Dogecoin"), ("3119", "TRON"), ("3315", "Cardano"),
+]
+RISK_PROFILES = ["HIGH_RISK", "BALANCED", "SAFE"]
+
+# Addresses created during setup so read/update scenarios hit existing rows
+SEEDED_WALLETS = [f"0xbench{index:035x}" for index in range(200)]
+
+_sequence = itertools.count()
+
+
+def _token_body():
+    token_id, token_name = random.choice(TOKENS)
+    return {"token_id": token_id, "token_name": token_name}
+
+
+def _new_address():
+    return f"0xnew{next(_sequence):037x}{random.getrandbits(16):04x}"
+
+
+# Scenario name -> function returning (method, path, json body)
+SCENARIOS = {
+    "crypto_sma_agent": lambda: ("POST", f"{API}/agents/crypto_sma_agent", _token_body()),
+    "bounce_hunter_agent": lambda: ("POST", f"{API}/agents/bounce_hunter_agent", _token_body()),
+    "crypto_oracle_agent": lambda: ("POST", f"{API}/agents/crypto_oracle_agent", _token_body()),
+    "momentum_quant_agent": lambda: ("POST", f"{API}/agents/momentum_quant_agent", _token_body()),
+    "analysis_manager": lambda: ("POST", f"{API}/agents/analysis_manager", _token_body()),
+    "wallet_create": lambda: ("POST", "/wallets/", {"address": _new_address(), "name": "bench",
+                                                    "risk_profile": random.choice(RISK_PROFILES)}),
+    "wallet_bulk": lambda: ("POST", "/wallets/bulk", [{"address": _new_address(), "risk_profile": random.choice(RISK_PROFILES)}
+                                                      for _ in range(50)]),
+    "wallet_get": lambda: ("GET", f"/wallets/{random.choice(SEEDED_WALLETS)}", None),
+    "wallet_update_risk_profile": lambda: ("PUT", "/wallets/risk-profile", {"address": random.choice(SEEDED_WALLETS),
+                                                                             "risk_profile": random.choice(RISK_PROFILES)}),
+}
+
+
+async def _send(client: httpx.AsyncClient, request):
+    method, path, body = request
+    response = await client.request(method, path, json=body)
+    return response_ok(response)
+
+
+async def scrape_llm_tokens(client: httpx.AsyncClient):
+    """(agent, kind) -> [token sum, call count] from the llm_call_tokens histogram."""
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    totals = {}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            if sample.name in ("llm_call_tokens_sum", "llm_call_tokens_count"):
+                entry = totals.setdefault((sample.labels["agent"], sample.labels["kind"]), [0.0, 0.0])
+                entry[sample.name.endswith("_count")] += sample.value
+    return totals
+
+
+def tokens_per_call(before, after):
+    """Average tokens per call by agent and kind between two scrapes."""
+    averages = {}
+    for (agent, kind), (total, calls) in after.items():
+        previous_total, previous_calls = before.get((agent, kind), (0.0, 0.0))
+        if calls > previous_calls:
+            averages.setdefault(agent, {})[kind] = round((total - previous_total) / (calls - previous_calls), 1)
+    return averages
+
+
+async def seed_wallets(client: httpx.AsyncClient):
+    response = await client.post("/wallets/bulk", json=[{"address": address, "risk_profile": "BALANCED"}
+                                                        for address in SEEDED_WALLETS])
+    response.raise_for_status()
+
+
+async def run_level(client: httpx.AsyncClient, scenario: str, concurrency: int, total: int):
+    """Sends `total` requests of one scenario from `concurrency` concurrent clients."""
+    make_request = SCENARIOS[scenario]
+    remaining = itertools.count()
+    latencies, errors = [], 0
+
+    async def client_loop():
+        nonlocal errors
+        while next(remaining) < total:
+            request = make_request()
+            started = time.perf_counter()
+            try:
+                ok = await _send(client, request)
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_suite(base_url: str, scenarios, levels, total: int, timeout: float):
+    limits = httpx.Limits(max_connections=max(levels) * 2, max_keepalive_connections=max(levels) * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        await seed_wallets(client)
+        results = []
+        for scenario in scenarios:
+            await _send(client, SCENARIOS[scenario]())  # warm-up: loads the agent graph, fills pools
+            for concurrency in levels:
+                tokens_before = await scrape_llm_tokens(client)
+                summary = await run_level(client, scenario, concurrency, total)
+                summary["llm_tokens_per_call"] = tokens_per_call(tokens_before, await scrape_llm_tokens(client))
+                results.append({"scenario": scenario, "concurrency": concurrency, **summary})
+                print(f"{scenario:<28} c={concurrency:<3} {summary['throughput_rps'] or 0:8.2f} req/s  "
+                      f"p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  p99 {summary['p99_ms']} ms  "
+                      f"errors {summary['errors']}/{summary['requests']}")
+                for agent, tokens in summary["llm_tokens_per_call"].items():
+                    print(f"{'':<28} {agent}: {tokens.get('prompt', 0):.0f} prompt / {tokens.get('completion', 0):.0f} "
+                          f"completion tokens per call")
+        return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario and concurrency level")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--tm-latency-ms", type=float, default=80)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app under test")
+    parser.add_argument("--cache-backend", choices=["memory", "sqlite", "redis"], default="sqlite",
+                        help="shared cache the workers use (redis runs on a local resp_server.py)")
+    parser.add_argument("--caches", nargs="+", choices=["warm", "cold"], default=["warm", "cold"],
+                        help="run with the caches on (warm) and/or every response cache off (cold)")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request client timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--responses", help="JSON file of {prompt substring: reply} overrides for the fake LLM")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for caches in args.caches:
+        random.seed(args.seed)
+        print(f"--- caches {caches} ---")
+        with local_stack(args.llm_latency_ms, args.llm_jitter_ms, args.tm_latency_ms, workers=args.workers,
+                         responses=args.responses, cache_backend=args.cache_backend,
+                         app_env=COLD_CACHE_ENV if caches == "cold" else None) as base_url:
+            results[caches] = asyncio.run(run_suite(base_url, args.scenarios, args.concurrency, args.requests,
+                                                    args.timeout))
+
+    report = {
+        "benchmark": "e2e",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests_per_level": args.requests,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "tm_latency_ms": args.tm_latency_ms,
+            "workers": args.workers,
+            "cache_backend": args.cache_backend,
+            "caches": args.caches,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
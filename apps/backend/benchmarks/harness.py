@@ -0,0 +1,159 @@
+"""
+Process and statistics helpers shared by the benchmark scripts.
+
+`local_stack()` starts the Token Metrics / OpenAI stub (stub_server.py) and the API itself
+under uvicorn, wired to each other through TOKEN_METRICS_BASE_URL and OPENAI_BASE_URL and
+backed by a throwaway SQLite database, so runs never touch real APIs or credits. With
+cache_backend="redis" the app's shared cache runs on an in-process resp_server.py, and with
+app_env=COLD_CACHE_ENV every request misses the caches. `response_ok()` is the success check
+both benchmarks count errors with.
+"""
+import contextlib
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from resp_server import serve_in_thread
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+
+# App settings that turn off every response cache (Token Metrics responses, input memo, wallets)
+COLD_CACHE_ENV = {
+    "CACHE_BACKEND": "memory",
+    "TOKEN_METRICS_CACHE_TTLS": "{}",
+    "TOKEN_METRICS_CACHE_MAX_ENTRIES": "0",
+    "INPUT_MEMO_MAX_ENTRIES": "0",
+    "WALLET_CACHE_MAX_ENTRIES": "0",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process serving {url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"{url} did not become ready within {timeout:.0f}s")
+
+
+def _stop(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@contextlib.contextmanager
+def local_stack(llm_latency_ms: float, llm_jitter_ms: float, tm_latency_ms: float, workers: int = 1,
+                responses: Optional[str] = None, app_env: Optional[Dict[str, str]] = None, log_dir: Optional[Path] = None,
+                cache_backend: str = "sqlite"):
+    """Yields the base URL of an API instance running against the local stub server."""
+    stub_port, app_port = free_port(), free_port()
+    log_dir = Path(log_dir or tempfile.mkdtemp(prefix="benchmark-"))
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    stub_cmd = [sys.executable, str(BENCHMARKS_DIR / "stub_server.py"), "--port", str(stub_port),
+                "--llm-latency-ms", str(llm_latency_ms), "--llm-jitter-ms", str(llm_jitter_ms),
+                "--tm-latency-ms", str(tm_latency_ms)]
+    if responses:
+        stub_cmd += ["--responses", responses]
+
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{log_dir / 'benchmark.db'}",
+        "DISK_CACHE_PATH": str(log_dir / "disk_cache.sqlite3"),  # start cold; never reuse a previous run's cache
+        "CACHE_WARMUP_TOKENS": "0",  # warming would make background upstream and LLM calls during the run
+        "TOKEN_METRICS_API_KEY": "benchmark",
+        "TOKEN_METRICS_BASE_URL": f"http://127.0.0.1:{stub_port}/v2",
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        "OPENAI_API_BASE": f"http://127.0.0.1:{stub_port}/v1",
+        "CACHE_BACKEND": cache_backend,
+    })
+    cache_server = None
+    if cache_backend == "redis":
+        cache_server, cache_port = serve_in_thread()
+        env["CACHE_REDIS_URL"] = f"redis://127.0.0.1:{cache_port}/0"
+    env.update(app_env or {})
+    app_cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(app_port),
+               "--workers", str(workers), "--log-level", "warning"]
+
+    with open(log_dir / "stub.log", "w") as stub_log, open(log_dir / "app.log", "w") as app_log:
+        stub = subprocess.Popen(stub_cmd, cwd=BACKEND_DIR, stdout=stub_log, stderr=subprocess.STDOUT)
+        app = None
+        try:
+            wait_until_ready(f"http://127.0.0.1:{stub_port}/v2/price?token_id=1", stub)
+            app = subprocess.Popen(app_cmd, cwd=BACKEND_DIR, env=env, stdout=app_log, stderr=subprocess.STDOUT)
+            wait_until_ready(f"http://127.0.0.1:{app_port}/health", app)
+            yield f"http://127.0.0.1:{app_port}"
+        finally:
+            if app is not None:
+                _stop(app)
+            _stop(stub)
+            if cache_server is not None:
+                cache_server.shutdown()
+
+
+def response_ok(response: httpx.Response) -> bool:
+    """Whether a request succeeded; agent endpoints report failures as a 200 with a non-empty `error`."""
+    if response.status_code >= 400:
+        return False
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return True
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return not (isinstance(body, dict) and body.get("error"))
+
+
+# --- Statistics ---
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_s: List[float], errors: int, elapsed_s: float) -> Dict[str, Optional[float]]:
+    latencies_ms = sorted(latency * 1000 for latency in latencies_s)
+    completed = len(latencies_ms) + errors
+
+    def rounded(value):
+        return None if value is None else round(value, 2)
+
+    return {
+        "requests": completed,
+        "errors": errors,
+        "error_rate": round(errors / completed, 4) if completed else 0.0,
+        "elapsed_seconds": round(elapsed_s, 3),
+        "throughput_rps": round(len(latencies_ms) / elapsed_s, 3) if elapsed_s > 0 else None,
+        "mean_ms": rounded(sum(latencies_ms) / len(latencies_ms)) if latencies_ms else None,
+        "p50_ms": rounded(percentile(latencies_ms, 50)),
+        "p95_ms": rounded(percentile(latencies_ms, 95)),
+        "p99_ms": rounded(percentile(latencies_ms, 99)),
+        "max_ms": rounded(latencies_ms[-1]) if latencies_ms else None,
+    }
@@ -0,0 +1,102 @@
+"""
+Import-time benchmark for the API process.
+
+Measures how long a fresh interpreter takes to `import main` (what every uvicorn
+worker and every --reload pays before serving) and fails when the median exceeds
+the budget. Also lists the slowest modules from `python -X importtime`.
+
+Usage (from apps/backend):
+    python benchmarks/import_time.py [--runs 5] [--budget 1.5] [--output import_time.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Budget in seconds for `import main`; override with --budget or IMPORT_TIME_BUDGET_SECONDS
+DEFAULT_BUDGET_SECONDS = float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", "1.5"))
+
+# Settings needs these to exist; the import must not touch any of them
+PLACEHOLDER_ENV = {
+    "DATABASE_URL": "sqlite:///./import_time_benchmark.db",
+    "TOKEN_METRICS_API_KEY": "benchmark",
+    "OPENAI_API_KEY": "benchmark",
+}
+
+
+def _env():
+    env = dict(os.environ)
+    for key, value in PLACEHOLDER_ENV.items():
+        env.setdefault(key, value)
+    return env
+
+
+def measure_once(env) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def interpreter_baseline(env) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], cwd=BACKEND_DIR, env=env, check=True)
+    return time.perf_counter() - started
+
+
+def slowest_modules(env, top: int):
+    """Parses `-X importtime` output into the top-level modules with the largest cumulative time."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR, env=env,
+                          check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({"module": name.strip(), "cumulative_ms": int(cumulative_us) / 1000, "self_ms": int(self_us) / 1000})
+    modules.sort(key=lambda m: m["cumulative_ms"], reverse=True)
+    return modules[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS, help="seconds allowed for `import main` (median)")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to report")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    env = _env()
+    measure_once(env)  # warm the filesystem and bytecode caches
+    samples = [measure_once(env) for _ in range(args.runs)]
+    median = statistics.median(samples)
+    result = {
+        "runs": args.runs,
+        "median_seconds": round(median, 4),
+        "min_seconds": round(min(samples), 4),
+        "max_seconds": round(max(samples), 4),
+        "interpreter_baseline_seconds": round(interpreter_baseline(env), 4),
+        "budget_seconds": args.budget,
+        "within_budget": median <= args.budget,
+        "slowest_modules": slowest_modules(env, args.top),
+    }
+
+    print(f"import main: median {median:.3f}s (min {min(samples):.3f}s, max {max(samples):.3f}s) over {args.runs} runs; budget {args.budget:.3f}s")
+    for module in result["slowest_modules"]:
+        print(f"  {module['cumulative_ms']:9.1f} ms  {module['module']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+    if not result["within_budget"]:
+        print(f"FAIL: import time {median:.3f}s exceeds budget {args.budget:.3f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
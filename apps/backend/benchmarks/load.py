@@ -0,0 +1,291 @@
+"""
+Open-loop load generator for this service.
+
+Replays a realistic traffic mix at a fixed arrival rate (Poisson), stepping the rate up until
+the worker saturates:
+  - token page:   POST /api/v1/agents/analysis_manager
+  - agent page:   POST /api/v1/agents/<single agent>
+  - wallet reads: GET /wallets/{address}
+  - wallet writes: POST /wallets/ and PUT /wallets/risk-profile
+Tokens are drawn from frontend/data/tokens.json with a Zipf distribution over its (market-cap)
+order, so a few large caps dominate like on the real site.
+
+For each step it reports achieved vs. target rate, in-flight requests, error rate, latency
+percentiles, and the server's event-loop lag and resident memory (scraped from /metrics).
+A step is saturated when the worker completes less than --saturation-ratio of the offered
+load, errors exceed --max-error-rate, or p95 exceeds --slo-ms. Agent failures count as errors
+even though they come back as 200s (see harness.response_ok).
+
+Usage (from apps/backend):
+    python benchmarks/load.py --local [--rates 0.5 1 2 4 8] [--step-seconds 30]
+    python benchmarks/load.py --base-url http://127.0.0.1:8000 --rates 1 2 4 --output load.json
+    python benchmarks/load.py --local --mix analysis_manager=1   # manager calls only
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from harness import BACKEND_DIR, local_stack, response_ok, summarize
+
+API = "/api/v1"
+TOKENS_FILE = BACKEND_DIR.parent / "frontend" / "data" / "tokens.json"
+
+SINGLE_AGENTS = ["crypto_sma_agent", "bounce_hunter_agent", "crypto_oracle_agent", "momentum_quant_agent"]
+RISK_PROFILES = ["HIGH_RISK", "BALANCED", "SAFE"]
+
+# Share of requests per kind when --mix is not given
+DEFAULT_MIX = {
+    "analysis_manager": 0.35,
+    "single_agent": 0.25,
+    "wallet_read": 0.30,
+    "wallet_write": 0.10,
+}
+
+SEEDED_WALLETS = [f"0xload{index:036x}" for index in range(500)]
+
+
+class TokenSampler:
+    """Samples tokens with probability proportional to 1 / rank^exponent."""
+
+    def __init__(self, path: Path, exponent: float):
+        with open(path) as f:
+            self.tokens = json.load(f)
+        cumulative, total = [], 0.0
+        for rank in range(1, len(self.tokens) + 1):
+            total += 1.0 / rank ** exponent
+            cumulative.append(total)
+        self._cumulative = cumulative
+        self._total = total
+
+    def sample(self) -> Dict:
+        index = bisect.bisect_left(self._cumulative, random.random() * self._total)
+        return self.tokens[min(index, len(self.tokens) - 1)]
+
+
+def _parse_mix(value: Optional[str]) -> Dict[str, float]:
+    if not value:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown traffic kind '{kind}'; expected one of {', '.join(DEFAULT_MIX)}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def make_request(kind: str, tokens: TokenSampler, sequence):
+    """Returns (label, method, path, json body) for one request of the given kind."""
+    if kind in ("analysis_manager", "single_agent"):
+        token = tokens.sample()
+        agent = "analysis_manager" if kind == "analysis_manager" else random.choice(SINGLE_AGENTS)
+        body = {"token_id": str(token["token_id"]), "token_name": token["token_name"]}
+        return agent, "POST", f"{API}/agents/{agent}", body
+    if kind == "wallet_read":
+        return "wallet_get", "GET", f"/wallets/{random.choice(SEEDED_WALLETS)}", None
+    if random.random() < 0.5:
+        address = f"0xloadnew{next(sequence):033x}"
+        return "wallet_create", "POST", "/wallets/", {"address": address, "risk_profile": random.choice(RISK_PROFILES)}
+    return "wallet_update_risk_profile", "PUT", "/wallets/risk-profile", {
+        "address": random.choice(SEEDED_WALLETS), "risk_profile": random.choice(RISK_PROFILES)}
+
+
+# --- Server metrics ---
+async def scrape(client: httpx.AsyncClient) -> Dict[str, Dict]:
+    """Pulls the event-loop lag histogram and resident memory from /metrics."""
+    try:
+        response = await client.get("/metrics")
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    lag_buckets, snapshot = {}, {}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            if sample.name == "event_loop_lag_seconds_bucket":
+                lag_buckets[float(sample.labels["le"])] = sample.value
+            elif sample.name == "event_loop_lag_seconds_sum":
+                snapshot["lag_sum"] = sample.value
+            elif sample.name == "event_loop_lag_seconds_count":
+                snapshot["lag_count"] = sample.value
+            elif sample.name == "process_resident_memory_bytes":
+                snapshot["rss_bytes"] = sample.value
+    snapshot["lag_buckets"] = lag_buckets
+    return snapshot
+
+
+def lag_between(before: Dict, after: Dict) -> Dict[str, Optional[float]]:
+    """Mean and bucket-estimated p99/max event-loop lag between two scrapes."""
+    count = after.get("lag_count", 0) - before.get("lag_count", 0)
+    if count <= 0:
+        return {"event_loop_lag_mean_ms": None, "event_loop_lag_p99_ms": None, "event_loop_lag_max_ms": None}
+    mean = (after.get("lag_sum", 0) - before.get("lag_sum", 0)) / count
+    deltas = sorted((le, after["lag_buckets"].get(le, 0) - before.get("lag_buckets", {}).get(le, 0))
+                    for le in after["lag_buckets"])
+    p99 = next((le for le, cumulative in deltas if cumulative >= 0.99 * count), None)
+    # Smallest bucket bound that holds every sample; inf means "beyond the largest bucket"
+    worst = next((le for le, cumulative in deltas if cumulative >= count), None)
+    return {
+        "event_loop_lag_mean_ms": round(mean * 1000, 2),
+        "event_loop_lag_p99_ms": p99 * 1000 if p99 is not None else None,
+        "event_loop_lag_max_ms": worst * 1000 if worst is not None else None,
+    }
+
+
+# --- Load steps ---
+async def run_step(client: httpx.AsyncClient, rate: float, duration: float, mix: Dict[str, float],
+                   tokens: TokenSampler, sequence):
+    kinds, weights = list(mix), list(mix.values())
+    latencies, errors, per_label = [], 0, {}
+    in_flight, peak_in_flight = 0, 0
+    pending = set()
+
+    async def one(label, method, path, body):
+        nonlocal errors, in_flight
+        in_flight += 1
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = await client.request(method, path, json=body)
+            ok = response_ok(response)
+        except httpx.HTTPError:
+            pass
+        finally:
+            in_flight -= 1
+        stats = per_label.setdefault(label, {"latencies": [], "errors": 0})
+        if ok:
+            latency = time.perf_counter() - started
+            latencies.append(latency)
+            stats["latencies"].append(latency)
+        else:
+            errors += 1
+            stats["errors"] += 1
+
+    before = await scrape(client)
+    started = time.perf_counter()
+    next_arrival = started
+    while next_arrival - started < duration:
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        request = make_request(random.choices(kinds, weights)[0], tokens, sequence)
+        task = asyncio.create_task(one(*request))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        peak_in_flight = max(peak_in_flight, in_flight)
+        next_arrival += random.expovariate(rate)
+    offered = time.perf_counter() - started
+    if pending:
+        await asyncio.wait(set(pending))
+    elapsed = time.perf_counter() - started
+    after = await scrape(client)
+
+    summary = summarize(latencies, errors, elapsed)
+    return {
+        "target_rps": rate,
+        "offered_rps": round(summary["requests"] / offered, 3) if offered > 0 else None,
+        "peak_in_flight": peak_in_flight,
+        "drain_seconds": round(elapsed - offered, 3),
+        **summary,
+        **lag_between(before, after),
+        "rss_mb": round(after["rss_bytes"] / 2 ** 20, 1) if "rss_bytes" in after else None,
+        "by_request": {label: summarize(stats["latencies"], stats["errors"], elapsed)
+                       for label, stats in sorted(per_label.items())},
+    }
+
+
+def saturated(step: Dict, args) -> Optional[str]:
+    if step["error_rate"] > args.max_error_rate:
+        return f"error rate {step['error_rate']:.1%} > {args.max_error_rate:.1%}"
+    if step["throughput_rps"] is not None and step["throughput_rps"] < args.saturation_ratio * step["target_rps"]:
+        return f"throughput {step['throughput_rps']:.2f} req/s < {args.saturation_ratio:.0%} of target"
+    if args.slo_ms and step["p95_ms"] is not None and step["p95_ms"] > args.slo_ms:
+        return f"p95 {step['p95_ms']:.0f} ms > SLO {args.slo_ms:.0f} ms"
+    return None
+
+
+async def run_load(base_url: str, args):
+    tokens = TokenSampler(Path(args.tokens), args.zipf)
+    mix = _parse_mix(args.mix)
+    sequence = itertools.count()
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    steps, saturation = [], None
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        response = await client.post("/wallets/bulk", json=[{"address": address, "risk_profile": "BALANCED"}
+                                                            for address in SEEDED_WALLETS])
+        response.raise_for_status()
+        for rate in args.rates:
+            step = await run_step(client, rate, args.step_seconds, mix, tokens, sequence)
+            reason = saturated(step, args)
+            step["saturated"] = reason
+            steps.append(step)
+            print(f"target {rate:6.2f} req/s -> {step['throughput_rps'] or 0:6.2f} req/s  "
+                  f"errors {step['error_rate']:.1%}  p50 {step['p50_ms']} ms  p95 {step['p95_ms']} ms  "
+                  f"in-flight<= {step['peak_in_flight']}  loop lag mean {step['event_loop_lag_mean_ms']} ms "
+                  f"p99 {step['event_loop_lag_p99_ms']} ms  rss {step['rss_mb']} MB"
+                  + (f"  SATURATED: {reason}" if reason else ""))
+            if reason and saturation is None:
+                saturation = {"target_rps": rate, "reason": reason,
+                              "last_healthy_rps": steps[-2]["target_rps"] if len(steps) > 1 else None}
+                if not args.keep_going:
+                    break
+    return {"mix": mix, "steps": steps, "saturation": saturation}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="load an already running instance")
+    target.add_argument("--local", action="store_true", help="start the app against the local stub server")
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.5, 1, 2, 4, 8, 16], help="target req/s per step")
+    parser.add_argument("--step-seconds", type=float, default=30)
+    parser.add_argument("--mix", help="comma-separated kind=weight, kinds: " + ", ".join(DEFAULT_MIX))
+    parser.add_argument("--tokens", default=str(TOKENS_FILE), help="tokens.json to draw token ids from")
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity skew over the token list order")
+    parser.add_argument("--slo-ms", type=float, default=0, help="p95 latency above this counts as saturated (0 = off)")
+    parser.add_argument("--max-error-rate", type=float, default=0.05)
+    parser.add_argument("--saturation-ratio", type=float, default=0.9)
+    parser.add_argument("--keep-going", action="store_true", help="run every rate even after saturation")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="--local only")
+    parser.add_argument("--llm-jitter-ms", type=float, default=200, help="--local only")
+    parser.add_argument("--tm-latency-ms", type=float, default=80, help="--local only")
+    parser.add_argument("--workers", type=int, default=1, help="--local only")
+    parser.add_argument("--cache-backend", choices=["memory", "sqlite", "redis"], default="sqlite", help="--local only")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.local:
+        with local_stack(args.llm_latency_ms, args.llm_jitter_ms, args.tm_latency_ms, workers=args.workers,
+                         cache_backend=args.cache_backend) as base_url:
+            result = asyncio.run(run_load(base_url, args))
+    else:
+        result = asyncio.run(run_load(args.base_url, args))
+
+    if result["saturation"]:
+        print(f"Saturated at {result['saturation']['target_rps']} req/s ({result['saturation']['reason']}); "
+              f"last healthy step: {result['saturation']['last_healthy_rps']} req/s")
+    else:
+        print("No saturation within the tested rates")
+
+    if args.output:
+        report = {
+            "benchmark": "load",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+            **result,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
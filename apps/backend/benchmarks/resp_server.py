@@ -0,0 +1,128 @@
+"""
+Local stand-in for a Redis server, for CACHE_BACKEND=redis in benchmarks and tests.
+
+Implements the commands the cache backend uses (PING, AUTH, SELECT, GET, SET with EX/PX, PTTL,
+DEL) plus DBSIZE and FLUSHALL, with millisecond expiry, over the Redis protocol. Other commands
+(e.g. the CLIENT SETINFO redis-py sends on connect) get an error reply, which the client ignores. Everything is
+kept in memory in one dict; there is no persistence. Point the app at it with
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://127.0.0.1:<port>/0
+
+In-process (e.g. from a test):
+    server, port = serve_in_thread()
+    ...
+    server.shutdown()
+
+Usage (from apps/backend):
+    python benchmarks/resp_server.py [--port 6390]
+"""
+import argparse
+import socketserver
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class Store:
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}  # key -> (value, expires_at)
+        self.lock = threading.Lock()
+
+    def _live(self, key: bytes):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def execute(self, args):
+        command = args[0].upper()
+        with self.lock:
+            if command == b"PING":
+                return b"+PONG\r\n"
+            if command in (b"AUTH", b"SELECT"):
+                return b"+OK\r\n"
+            if command == b"GET" and len(args) == 2:
+                entry = self._live(args[1])
+                return bulk(entry[0] if entry else None)
+            if command == b"SET" and len(args) in (3, 5):
+                expires_at = None
+                if len(args) == 5:
+                    unit = {b"EX": 1.0, b"PX": 0.001}.get(args[3].upper())
+                    if unit is None:
+                        return b"-ERR syntax error\r\n"
+                    expires_at = time.monotonic() + int(args[4]) * unit
+                self.data[args[1]] = (args[2], expires_at)
+                return b"+OK\r\n"
+            if command == b"PTTL" and len(args) == 2:
+                entry = self._live(args[1])
+                if entry is None:
+                    return b":-2\r\n"
+                if entry[1] is None:
+                    return b":-1\r\n"
+                return b":%d\r\n" % int((entry[1] - time.monotonic()) * 1000)
+            if command == b"DEL" and len(args) >= 2:
+                return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in args[1:])
+            if command == b"DBSIZE":
+                return b":%d\r\n" % len(self.data)
+            if command == b"FLUSHALL":
+                self.data.clear()
+                return b"+OK\r\n"
+        return b"-ERR unknown command or wrong number of arguments for '%s'\r\n" % args[0]
+
+
+def bulk(value: Optional[bytes]) -> bytes:
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def read_command(reader) -> Optional[list]:
+    """One RESP array of bulk strings, or None when the client has disconnected."""
+    line = reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()  # inline command, e.g. from telnet
+    args = []
+    for _ in range(int(line[1:])):
+        length = int(reader.readline()[1:])
+        args.append(reader.read(length + 2)[:-2])
+    return args
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            args = read_command(self.rfile)
+            if args is None:
+                return
+            if args:
+                self.wfile.write(self.server.store.execute(args))
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, Handler)
+        self.store = Store()
+
+
+def serve_in_thread(host: str = "127.0.0.1", port: int = 0) -> Tuple[Server, int]:
+    """Starts a server on a background thread; port 0 picks a free one. Returns the server and its port."""
+    server = Server((host, port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    with Server((args.host, args.port)) as server:
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Local stand-in for the Token Metrics API and the OpenAI chat completions API.
+
+Serves deterministic per-token fixtures for daily-ohlcv, price, trader-grades,
+resistance-support and ai-reports under /v2, and an OpenAI-compatible
+POST /v1/chat/completions that answers after a configurable latency. Point the app at it with
+    TOKEN_METRICS_BASE_URL=http://127.0.0.1:<port>/v2
+    OPENAI_BASE_URL=http://127.0.0.1:<port>/v1
+
+Chat replies echo the "The signal determined for X is Y." sentence the agent prompts ask
+for, and add a "FINAL RECOMMENDATION" line for the manager's synthesis prompt. A JSON file of
+{"prompt substring": "reply"} pairs (--responses) overrides that.
+
+Usage (from apps/backend):
+    python benchmarks/stub_server.py [--port 8900] [--llm-latency-ms 800] [--llm-jitter-ms 200]
+                                     [--tm-latency-ms 80] [--responses replies.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+app = FastAPI(title="Token Metrics / OpenAI stub")
+
+# Tunables; overwritten from the command line in main()
+config = {
+    "llm_latency_ms": 800.0,
+    "llm_jitter_ms": 200.0,
+    "tm_latency_ms": 80.0,
+    "responses": {},
+}
+
+SIGNAL_SENTENCE = re.compile(r'"(The signal determined for [^"{}]+ is [A-Z_ ]+\.)"')
+
+
+# --- Token Metrics fixtures ---
+def _rng(token_id: str, salt: str) -> random.Random:
+    return random.Random(f"{token_id}:{salt}")
+
+
+def _base_price(token_id: str) -> float:
+    return round(_rng(token_id, "price").uniform(0.05, 4000), 4)
+
+
+def _days(count: int):
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return [today - timedelta(days=offset) for offset in range(count - 1, -1, -1)]
+
+
+def ohlcv_fixture(token_id: str, limit: int):
+    rng = _rng(token_id, "ohlcv")
+    close = _base_price(token_id)
+    rows = []
+    for day in _days(limit):
+        open_ = close
+        close = max(open_ * (1 + rng.gauss(0.002, 0.03)), 0.0001)
+        rows.append({
+            "TOKEN_ID": int(token_id),
+            "DATE": day.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "OPEN": round(open_, 6),
+            "HIGH": round(max(open_, close) * 1.01, 6),
+            "LOW": round(min(open_, close) * 0.99, 6),
+            "CLOSE": round(close, 6),
+            "VOLUME": round(rng.uniform(1e5, 1e9), 2),
+        })
+    return rows
+
+
+def trader_grades_fixture(token_id: str, limit: int):
+    rng = _rng(token_id, "grades")
+    grade = rng.uniform(20, 80)
+    rows = []
+    for day in _days(limit):
+        previous, grade = grade, min(max(grade + rng.gauss(0, 4), 0), 100)
+        rows.append({
+            "TOKEN_ID": int(token_id),
+            "DATE": day.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "TM_TRADER_GRADE": round(grade, 2),
+            "TM_TRADER_GRADE_24H_PCT_CHANGE": round((grade - previous) / previous * 100, 2) if previous else 0.0,
+            "TA_GRADE": round(rng.uniform(10, 90), 2),
+            "QUANT_GRADE": round(rng.uniform(10, 90), 2),
+        })
+    return rows[::-1]  # newest first, like the real API
+
+
+def levels_fixture(token_id: str):
+    rng = _rng(token_id, "levels")
+    price = _base_price(token_id)
+    levels = [
+        {"level": round(price * rng.uniform(0.7, 1.3), 6), "date": day.strftime("%Y-%m-%d")}
+        for day in _days(12)
+    ]
+    return [{"TOKEN_ID": int(token_id), "HISTORICAL_RESISTANCE_SUPPORT_LEVELS": levels}]
+
+
+def _token_id(request: Request) -> Optional[str]:
+    token_id = request.query_params.get("token_id", "")
+    return token_id if token_id.isdigit() else None
+
+
+async def _tm_delay():
+    await asyncio.sleep(config["tm_latency_ms"] / 1000)
+
+
+def _ok(data):
+    return {"success": True, "message": "Data fetched successfully", "length": len(data), "data": data}
+
+
+@app.get("/v2/daily-ohlcv")
+async def daily_ohlcv(request: Request):
+    await _tm_delay()
+    token_id = _token_id(request)
+    return _ok(ohlcv_fixture(token_id, int(request.query_params.get("limit", 60))) if token_id else [])
+
+
+@app.get("/v2/price")
+async def price(request: Request):
+    await _tm_delay()
+    token_id = _token_id(request)
+    if not token_id:
+        return _ok([])
+    return _ok([{"TOKEN_ID": int(token_id), "CURRENT_PRICE": ohlcv_fixture(token_id, 60)[-1]["CLOSE"]}])
+
+
+@app.get("/v2/trader-grades")
+@app.get("/v2/trader-grades/")
+async def trader_grades(request: Request):
+    await _tm_delay()
+    token_id = _token_id(request)
+    return _ok(trader_grades_fixture(token_id, int(request.query_params.get("limit", 5))) if token_id else [])
+
+
+@app.get("/v2/resistance-support")
+async def resistance_support(request: Request):
+    await _tm_delay()
+    token_id = _token_id(request)
+    return _ok(levels_fixture(token_id) if token_id else [])
+
+
+@app.get("/v2/ai-reports")
+async def ai_reports(request: Request):
+    await _tm_delay()
+    token_id = _token_id(request)
+    if not token_id:
+        return _ok([])
+    return _ok([{
+        "TOKEN_ID": int(token_id),
+        "TRADER_REPORT": f"Stub trader report for token {token_id}. " * 40,
+        "FUNDAMENTAL_REPORT": f"Stub fundamental report for token {token_id}. " * 40,
+        "TECHNOLOGY_REPORT": f"Stub technology report for token {token_id}. " * 40,
+    }])
+
+
+# --- OpenAI chat completions ---
+def _reply(prompt: str) -> str:
+    for needle, reply in config["responses"].items():
+        if needle in prompt:
+            return reply
+    match = SIGNAL_SENTENCE.search(prompt)
+    if match:
+        signal = match.group(1).rsplit(" is ", 1)[1].rstrip(".")
+        return f"{match.group(1)} This is a canned explanation from the benchmark stub.\n\nFINAL RECOMMENDATION: {signal}"
+    if "FINAL RECOMMENDATION" in prompt:
+        return "The specialist agents broadly agree.\n\nFINAL RECOMMENDATION: Buy"
+    return "Canned reply from the benchmark stub."
+
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "stub", "object": "model", "created": 0, "owned_by": "benchmark"}]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+    latency_ms = max(0.0, random.gauss(config["llm_latency_ms"], config["llm_jitter_ms"]))
+    await asyncio.sleep(latency_ms / 1000)
+
+    content = _reply(prompt)
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-stub-{random.getrandbits(48):012x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--llm-latency-ms", type=float, default=config["llm_latency_ms"])
+    parser.add_argument("--llm-jitter-ms", type=float, default=config["llm_jitter_ms"])
+    parser.add_argument("--tm-latency-ms", type=float, default=config["tm_latency_ms"])
+    parser.add_argument("--responses", help="JSON file of {prompt substring: reply} overrides")
+    args = parser.parse_args()
+
+    config["llm_latency_ms"] = args.llm_latency_ms
+    config["llm_jitter_ms"] = args.llm_jitter_ms
+    config["tm_latency_ms"] = args.tm_latency_ms
+    if args.responses:
+        with open(args.responses) as f:
+            config["responses"] = json.load(f)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Token Metrics AI reports, stored in the database.
+
+A report is downloaded from the upstream API once, then served from the ai_reports table.
+Reports older than AI_REPORT_REFRESH_SECONDS are still served as stored while one background
+task per token checks upstream; the stored version only changes when the content does.
+"""
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.metrics import CACHE_REQUESTS
+from core.token_metrics import fetch_token_metrics
+from models.ai_report import AIReport
+
+logger = logging.getLogger(__name__)
+
+
+class ReportUnavailable(Exception):
+    """The upstream API had no usable report and none is stored."""
+
+
+class ReportMeta(NamedTuple):
+    token_id: str
+    version: int
+    content_hash: str
+    updated_at: datetime
+    fetched_at: datetime
+
+
+_hits = CACHE_REQUESTS.labels("ai_report", "hit")
+_misses = CACHE_REQUESTS.labels("ai_report", "miss")
+
+# token_id -> in-flight upstream refresh, so concurrent requests share one download
+_refreshing: Dict[str, "asyncio.Task[Optional[ReportMeta]]"] = {}
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _meta(report) -> ReportMeta:
+    return ReportMeta(report.token_id, report.version, report.content_hash,
+                      _utc(report.updated_at), _utc(report.fetched_at))
+
+
+def _download(token_id: str) -> bytes:
+    response = fetch_token_metrics("ai-reports", {"token_id": token_id, "page": 0})
+    response.raise_for_status()
+    body = response.content
+    if orjson.loads(body).get("success") is False:
+        raise ReportUnavailable(f"Token Metrics returned no AI report for token {token_id}")
+    return body
+
+
+async def _store(token_id: str, body: bytes) -> ReportMeta:
+    content_hash = hashlib.sha256(body).hexdigest()
+    now = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        report = await db.get(AIReport, token_id)
+        if report is None:
+            report = AIReport(token_id=token_id, version=1, content_hash=content_hash, body=body,
+                              updated_at=now, fetched_at=now)
+            db.add(report)
+        elif report.content_hash != content_hash:
+            report.version += 1
+            report.content_hash = content_hash
+            report.body = body
+            report.updated_at = now
+        report.fetched_at = now
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker stored it first; theirs is just as fresh
+            await db.rollback()
+            report = await db.get(AIReport, token_id, populate_existing=True)
+        return _meta(report)
+
+
+async def _refresh(token_id: str) -> Optional[ReportMeta]:
+    try:
+        body = await asyncio.to_thread(_download, token_id)
+        meta = await _store(token_id, body)
+        logger.info(f"AI report for token {token_id}: version {meta.version} ({len(body)} bytes)")
+        return meta
+    except Exception as e:
+        logger.warning(f"AI report refresh failed for token {token_id}: {e!r}")
+        return None
+
+
+def _schedule_refresh(token_id: str) -> "asyncio.Task[Optional[ReportMeta]]":
+    task = _refreshing.get(token_id)
+    if task is None:
+        task = _refreshing[token_id] = asyncio.create_task(_refresh(token_id))
+        task.add_done_callback(lambda _: _refreshing.pop(token_id, None))
+    return task
+
+
+async def get_report_meta(db: AsyncSession, token_id: str) -> ReportMeta:
+    """
+    Version info of the stored report, downloading it first if there is none.
+    A stale report is returned as is and refreshed in the background.
+    """
+    row = (await db.execute(
+        select(AIReport.token_id, AIReport.version, AIReport.content_hash, AIReport.updated_at, AIReport.fetched_at)
+        .where(AIReport.token_id == token_id)
+    )).one_or_none()
+    if row is None:
+        _misses.inc()
+        meta = await asyncio.shield(_schedule_refresh(token_id))
+        if meta is None:
+            raise ReportUnavailable(f"No AI report available for token {token_id}")
+        return meta
+
+    _hits.inc()
+    meta = _meta(row)
+    age = (datetime.now(timezone.utc) - meta.fetched_at).total_seconds()
+    if age > settings.AI_REPORT_REFRESH_SECONDS:
+        _schedule_refresh(token_id)
+    return meta
+
+
+async def read_report(db: AsyncSession, token_id: str) -> Optional[Tuple[ReportMeta, bytes]]:
+    """The stored report with its version info, read together so the two always match."""
+    report = await db.get(AIReport, token_id)
+    if report is None:
+        return None
+    return _meta(report), report.body
@@ -0,0 +1,54 @@
+"""
+Typed results of the strategy tools.
+
+Each agent's tool returns a slotted dataclass (a subclass of AnalysisResult, defined next to the
+tool) instead of a nested dict. The same object travels through graph state, intermediate_steps
+and the checkpointer; the dict shape with `reasoning_components` and per-level entries that the
+step traces show is only built by to_dict() when a trace is actually formatted.
+"""
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional, Type
+
+# Class name -> result type, for unpacking results stored by the input memo
+_RESULT_TYPES: Dict[str, Type["AnalysisResult"]] = {}
+
+
+def result_type(cls):
+    """Class decorator: makes `cls` a slotted dataclass and registers it for unpack_result()."""
+    cls = dataclass(slots=True)(cls)
+    _RESULT_TYPES[cls.__name__] = cls
+    return cls
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    token_id: Optional[str] = None
+    signal: Optional[str] = None
+    reason_string: Optional[str] = None
+    error: Optional[str] = None  # short error code; set means the analysis failed
+    error_detail: Optional[str] = None  # user-facing error message
+    input_digest: Optional[str] = None  # set by the input memo
+
+    def reasoning_components(self) -> Dict[str, Any]:
+        """The values the signal was derived from, as shown in step traces."""
+        return {"error": self.error_detail} if self.error_detail else {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field.name: getattr(self, field.name) for field in fields(self) if field.name != "error_detail"}
+        data["reasoning_components"] = self.reasoning_components()
+        return data
+
+    def pack(self) -> Dict[str, Any]:
+        """JSON-serializable form for caches; unpack_result() restores it."""
+        data = {field.name: getattr(self, field.name) for field in fields(self)}
+        data["type"] = type(self).__name__
+        return data
+
+    @classmethod
+    def unpack(cls, data: Dict[str, Any]) -> "AnalysisResult":
+        return cls(**data)
+
+
+def unpack_result(data: Dict[str, Any]) -> AnalysisResult:
+    data = dict(data)
+    return _RESULT_TYPES[data.pop("type")].unpack(data)
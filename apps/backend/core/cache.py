@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import orjson
+
+from core.cache_backend import cache_backend
+from core.metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after a TTL.
+    Safe to share between the event loop and worker threads.
+    Lookups are counted in cache_requests_total under `name`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = "default"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._hits = CACHE_REQUESTS.labels(name, "hit")
+        self._misses = CACHE_REQUESTS.labels(name, "miss")
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self._misses.inc()
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._misses.inc()
+                return default
+            self._data.move_to_end(key)
+        self._hits.inc()
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    TTLCache in front of the shared cache backend (core.cache_backend). Values are kept as objects
+    in memory and as encode()d bytes in the backend; a backend hit is decoded and promoted to memory.
+    With the in-process backend it behaves like the TTLCache alone.
+    Backend I/O blocks, so code on the event loop uses aget()/aset(), which run it in a thread.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str, encode: Callable[[Any], bytes] = orjson.dumps,
+                 decode: Callable[[bytes], Any] = orjson.loads):
+        self.name = name
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize, ttl, name)
+        self.shared = cache_backend if cache_backend.shared else None
+        self._encode = encode
+        self._decode = decode
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.shared is None:
+            return default
+        return self._get_shared(key, default)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.shared is None:
+            return default
+        return await asyncio.to_thread(self._get_shared, key, default)
+
+    def _get_shared(self, key: str, default: Any) -> Any:
+        entry = self.shared.get_entry(self._shared_key(key), f"{self.name}_shared")
+        if entry is None:
+            return default
+        data, remaining_ttl = entry
+        try:
+            value = self._decode(data)
+        except (ValueError, KeyError, TypeError):
+            # Written in an older format (e.g. by a previous release); drop it
+            self.shared.delete(self._shared_key(key))
+            return default
+        self.memory.set(key, value, min(self.ttl, remaining_ttl))
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        self.memory.set(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key), self._encode(value), ttl)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        self.memory.set(key, value, ttl)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.set, self._shared_key(key), self._encode(value), ttl)
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
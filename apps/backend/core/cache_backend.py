@@ -0,0 +1,96 @@
+"""
+Cache backends shared between workers.
+
+A backend stores bytes under string keys with a TTL per entry. CACHE_BACKEND picks the one the
+Token Metrics response cache, the input memo (analyses and LLM explanations) and the step trace
+store sit on:
+    memory  in-process LRU; nothing is shared between workers
+    sqlite  one SQLite WAL file shared by the workers on a host (core.disk_cache)
+    redis   any Redis-protocol server, shared by every host (core.redis_cache)
+A backend that cannot be opened is logged and replaced by the memory backend, so a missing cache
+never stops the API from starting. TieredCache (core.cache) keeps its own in-memory tier in front
+of a shared backend and skips a non-shared one.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from core.config import settings
+from core.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Byte-level key/value store with per-entry TTL. Failures are treated as misses."""
+
+    shared = True  # visible to other workers
+
+    def get_entry(self, key: str, name: str = "shared") -> Optional[Tuple[bytes, float]]:
+        """The stored value and its remaining TTL in seconds, or None on a miss."""
+        raise NotImplementedError
+
+    def get(self, key: str, name: str = "shared") -> Optional[bytes]:
+        entry = self.get_entry(key, name)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU, for single-worker deployments and tests."""
+
+    shared = False
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: str, name: str = "shared") -> Optional[Tuple[bytes, float]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._data[key]
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+        CACHE_REQUESTS.labels(name, "hit" if entry is not None else "miss").inc()
+        return (entry[1], entry[0] - now) if entry is not None else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+def open_cache_backend(kind: str) -> CacheBackend:
+    """Opens the configured backend, falling back to the memory backend if it is unavailable."""
+    backend = None
+    if kind == "sqlite":
+        from core.disk_cache import open_disk_cache
+        backend = open_disk_cache()
+    elif kind == "redis":
+        from core.redis_cache import open_redis_cache
+        backend = open_redis_cache()
+    elif kind != "memory":
+        logger.warning(f"Unknown CACHE_BACKEND {kind!r}; using the in-process cache")
+    return backend or MemoryBackend()
+
+
+cache_backend = open_cache_backend(settings.CACHE_BACKEND)
@@ -1,6 +1,6 @@
 from pydantic import AnyHttpUrl
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 import secrets
 
 class Settings(BaseSettings):
@@ -9,6 +9,9 @@ class Settings(BaseSettings):
     # API
     API_V1_STR: str = "/api/v1"
     
+    # Responses
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller responses are sent uncompressed
+
     # CORS
     CORS_ORIGINS: List[AnyHttpUrl] = ["http://localhost:3000"]
     
@@ -19,9 +22,83 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a pooled connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a pooled connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # prepared statements cached per connection (asyncpg)
+
+    # Wallet profile cache
+    WALLET_CACHE_TTL_SECONDS: int = 300
+    WALLET_CACHE_MAX_ENTRIES: int = 10000
+    WALLET_CACHE_INVALIDATION_CHANNEL: Optional[str] = None  # Postgres NOTIFY channel shared by workers
     
+    # Agents
+    PRELOAD_AGENTS: List[str] = []  # agents to build at startup; all others are built on first request
+    MANAGER_SPECULATIVE_SYNTHESIS: bool = True  # start synthesis from tool results, before sub-agent explanations finish
+    STEP_TRACE_TTL_SECONDS: int = 900  # how long step traces stay fetchable via /agents/steps/{id}
+    STEP_TRACE_MAX_ENTRIES: int = 2000  # 0 disables storing traces
+    INPUT_MEMO_TTL_SECONDS: int = 86400  # how long a result is reused while its upstream inputs stay the same
+    INPUT_MEMO_MAX_ENTRIES: int = 20000  # (agent, token) results kept for reuse; 0 disables change detection
+    INPUT_MEMO_PRICE_BUCKET: float = 0.002  # relative price step below which bounce hunter treats the price as unchanged
+    CONSENSUS_WEIGHTS: Dict[str, float] = {}  # per-agent weight in the consensus score (default 1.0)
+    CONSENSUS_RANK_SIZE: int = 200  # tokens kept in each precomputed consensus ranking
+    CONSENSUS_SYNC_SECONDS: float = 2.0  # how often a worker pulls other workers' signals from the database
+    SIGNAL_WS_QUEUE_SIZE: int = 100  # unsent signal events per WebSocket before the client is dropped
+
+    # Tokens
+    TOKENS_DATA_PATH: str = "../frontend/data/tokens.json"  # token metadata shared with the frontend; relative to apps/backend
+
+    # Cache warming
+    CACHE_WARMUP_TOKENS: int = 10  # most requested tokens (then dataset order) warmed at startup and daily; 0 disables
+    CACHE_WARMUP_AGENTS: List[str] = ["sma_agent", "bounce_hunter_agent", "crypto_oracle_agent", "momentum_quant_agent"]
+    CACHE_WARMUP_CONCURRENCY: int = 2  # agent runs in flight while warming
+    CACHE_WARMUP_ROLLOVER_UTC: str = "00:15"  # HH:MM (UTC) after the upstream daily data has rolled over
+
+    # LLM
+    LLM_MAX_CONCURRENCY: int = 8  # chat model calls in flight per worker; 0 removes the cap
+    LLM_BACKGROUND_MAX_CONCURRENCY: int = 2  # of those, at most this many for background work (cache warming)
+    LLM_EXPLANATION_MODEL: str = "gpt-4-0125-preview"  # per-agent explanations
+    LLM_SYNTHESIS_MODEL: str = "gpt-4-0125-preview"  # manager synthesis
+    LLM_MODELS: Dict[str, str] = {}  # per-agent overrides, e.g. {"bounce_hunter_agent": "gpt-4o-mini"}
+    LLM_FALLBACK_MODEL: Optional[str] = None  # answers calls that run past LLM_LATENCY_SLO_SECONDS
+    LLM_LATENCY_SLO_SECONDS: float = 20.0
+    LLM_WARMUP_CONNECTIONS: int = 2  # connections opened to the OpenAI API at startup; 0 disables
+
+    # Shared cache backend for Token Metrics responses, the input memo and step traces
+    CACHE_BACKEND: str = "sqlite"  # "memory" (per worker), "sqlite" (per host, DISK_CACHE_*) or "redis" (CACHE_REDIS_*)
+    DISK_CACHE_PATH: Optional[str] = "cache/disk_cache.sqlite3"  # relative to apps/backend; empty falls back to memory
+    DISK_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    CACHE_REDIS_URL: str = "redis://127.0.0.1:6379/0"  # redis://[:password@]host:port/db
+    CACHE_REDIS_PREFIX: str = "ethbucharest:"
+    CACHE_REDIS_TIMEOUT_SECONDS: float = 0.5  # connect and per-command; a slow cache counts as a miss
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: Dict[str, str] = {"httpx": "WARNING"}  # per-logger overrides, e.g. {"agents": "DEBUG"}
+    LOG_FORMAT: str = "text"  # "text" or "json"
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.0  # fraction of full payloads (graph state, tool output) logged at INFO
+
+    # Tracing
+    TRACE_EXPORTERS: List[str] = ["memory"]  # any of "memory", "file", "otlp"
+    TRACE_BUFFER_SIZE: int = 200  # traces kept in memory for /debug/traces
+    TRACE_FILE_PATH: str = "traces.jsonl"
+    OTLP_ENDPOINT: Optional[str] = None  # e.g. http://localhost:4318; enables the otlp exporter
+    TRACE_SERVICE_NAME: str = "ethbucharest-backend"
+    DEBUG_TRACES_ENABLED: bool = False  # serves /debug/traces, which has no auth; keep off in production
+
     # Token Metrics
     TOKEN_METRICS_API_KEY: str
+    TOKEN_METRICS_BASE_URL: str = "https://api.tokenmetrics.com/v2"
+    TOKEN_METRICS_CACHE_TTLS: Dict[str, int] = {  # seconds per endpoint; endpoints not listed are never cached
+        "price": 60,
+        "daily-ohlcv": 3600,
+        "trader-grades": 3600,
+        "resistance-support": 3600,
+    }
+    TOKEN_METRICS_CACHE_MAX_ENTRIES: int = 5000  # in-memory tier; the disk tier is bounded by DISK_CACHE_MAX_BYTES
+    AI_REPORT_REFRESH_SECONDS: int = 6 * 3600  # stored AI reports older than this are re-checked in the background
     
     # OpenAI
     OPENAI_API_KEY: str
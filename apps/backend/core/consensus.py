@@ -0,0 +1,224 @@
+"""
+Cross-agent consensus ranking.
+
+Every signal a sub-agent publishes lands in a token x agent matrix (one signed byte per cell,
+rows in token index order) and the token's weighted consensus score is updated right away.
+The ranking itself is rebuilt lazily: the first request after a change takes the top
+CONSENSUS_RANK_SIZE rows with a heap, and later requests only slice that list.
+
+The matrix itself is per process; the agent_signals table is what workers share. Published signals
+are written there in the background and recorded locally once stored, and each worker pulls the
+rows changed since its last look (at most every CONSENSUS_SYNC_SECONDS) before ranking, so every
+worker serves the same consensus and a restarted one rebuilds it from the table.
+"""
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.token_index import TokenIndex, TokenInfo, get_token_index
+from models.agent_signal import AgentSignal
+
+logger = logging.getLogger(__name__)
+
+# Agents whose signals make up the consensus (the manager's own signal is a synthesis of these)
+CONSENSUS_AGENTS = (
+    "sma_agent",
+    "bounce_hunter_agent",
+    "crypto_oracle_agent",
+    "momentum_quant_agent",
+)
+
+# Signal codes stored in the matrix; the score of a code is code - 2 (STRONG SELL -2 ... STRONG BUY +2)
+SIGNALS = ("STRONG SELL", "SELL", "HOLD", "BUY", "STRONG BUY")
+_CODES = {signal: code for code, signal in enumerate(SIGNALS)}
+MISSING = -1
+
+BUY = "buy"
+SELL = "sell"
+
+# Rows stamped up to this long before the newest one seen are read again, so a worker whose clock
+# lags behind does not have its signals skipped (re-recording a signal is a no-op)
+SYNC_OVERLAP_SECONDS = 60
+
+# Dialect-native INSERT constructs that support ON CONFLICT ... DO UPDATE
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def signal_code(signal: str) -> int:
+    """Matrix code for an agent signal; anything that is not a buy or sell (e.g. NO_SIGNAL) counts as HOLD."""
+    return _CODES.get(signal.strip().upper(), _CODES["HOLD"])
+
+
+class ConsensusEntry(NamedTuple):
+    token: TokenInfo
+    score: float  # weighted mean of agent scores; agents without a signal count as 0
+    agreeing: int  # agents whose signal points the ranked direction
+    reporting: int  # agents with a signal
+    signals: Dict[str, str]
+
+
+class ConsensusMatrix:
+    """Token x agent signal matrix with per-token scores and a lazily rebuilt top-N ranking."""
+
+    def __init__(self, index: TokenIndex, agents: Tuple[str, ...] = CONSENSUS_AGENTS,
+                 weights: Optional[Dict[str, float]] = None):
+        self.index = index
+        self.agents = agents
+        self._agent_columns = {agent: column for column, agent in enumerate(agents)}
+        self._weights = array("d", ((weights or {}).get(agent, 1.0) for agent in agents))
+        self._total_weight = sum(self._weights) or 1.0
+        self._cells = array("b", [MISSING]) * (len(index) * len(agents))
+        self._scores = array("d", bytes(8 * len(index)))
+        self._reporting = array("B", bytes(len(index)))
+        self._rows: set = set()  # positions with at least one signal
+        self._rankings: Dict[str, List[int]] = {}  # direction -> ranked positions; dropped on change
+        self._lock = threading.Lock()
+
+    def record(self, token_id, agent: str, signal: Optional[str]) -> bool:
+        """Stores the agent's latest signal for the token. Returns False for tokens or agents outside the matrix."""
+        column = self._agent_columns.get(agent)
+        position = self.index.position(token_id)
+        if column is None or position is None or not signal:
+            return False
+        code = signal_code(signal)
+        width = len(self.agents)
+        with self._lock:
+            cell = position * width + column
+            if self._cells[cell] == code:
+                return True
+            self._cells[cell] = code
+            row = self._cells[position * width:(position + 1) * width]
+            known = [(self._weights[i], c) for i, c in enumerate(row) if c != MISSING]
+            self._scores[position] = sum(w * (c - 2) for w, c in known) / self._total_weight
+            self._reporting[position] = len(known)
+            self._rows.add(position)
+            self._rankings.clear()
+        return True
+
+    def _ranking(self, direction: str) -> List[int]:
+        ranking = self._rankings.get(direction)
+        if ranking is None:
+            sign = 1 if direction == BUY else -1
+            candidates = [p for p in self._rows if sign * self._scores[p] > 0]
+            # Highest score first; more agents reporting, then dataset (market-cap) order break ties
+            ranking = heapq.nsmallest(
+                settings.CONSENSUS_RANK_SIZE, candidates,
+                key=lambda p: (-sign * self._scores[p], -self._reporting[p], p),
+            )
+            self._rankings[direction] = ranking
+        return ranking
+
+    def _entry(self, position: int, direction: str) -> ConsensusEntry:
+        width = len(self.agents)
+        row = self._cells[position * width:(position + 1) * width]
+        signals = {agent: SIGNALS[code] for agent, code in zip(self.agents, row) if code != MISSING}
+        agreeing = sum(1 for code in row if code != MISSING and (code > 2 if direction == BUY else code < 2))
+        return ConsensusEntry(self.index.at(position), self._scores[position], agreeing,
+                              self._reporting[position], signals)
+
+    def top(self, limit: int, direction: str = BUY, unanimous: bool = False) -> List[ConsensusEntry]:
+        """
+        Tokens with the strongest buy (or sell) consensus, best first. With `unanimous`, only tokens
+        where every agent has reported and all of them point that way.
+        """
+        with self._lock:
+            ranking = self._ranking(direction)
+            entries = []
+            for position in ranking:
+                entry = self._entry(position, direction)
+                if unanimous and entry.agreeing < len(self.agents):
+                    continue
+                entries.append(entry)
+                if len(entries) >= limit:
+                    break
+            return entries
+
+
+_matrix: Optional[ConsensusMatrix] = None
+
+
+def get_consensus_matrix() -> ConsensusMatrix:
+    global _matrix
+    if _matrix is None:
+        _matrix = ConsensusMatrix(get_token_index(), weights=settings.CONSENSUS_WEIGHTS)
+    return _matrix
+
+
+# --- Shared state (agent_signals table) ---
+_writes: Set["asyncio.Task[None]"] = set()  # keeps background writes referenced until they finish
+_sync_lock: Optional[asyncio.Lock] = None
+_synced_at = float("-inf")  # monotonic time of the last sync
+_watermark: Optional[datetime] = None  # newest updated_at seen in the table
+
+
+async def _store_signal(token_id: str, agent: str, signal: str, published_at: datetime):
+    try:
+        async with AsyncSessionLocal() as db:
+            dialect_name = db.get_bind().dialect.name
+            insert = _INSERT_BY_DIALECT.get(dialect_name)
+            if insert is None:
+                raise RuntimeError(f"Signal upserts are not supported on the '{dialect_name}' dialect.")
+            stmt = insert(AgentSignal).values(token_id=token_id, agent=agent, signal=signal, updated_at=published_at)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AgentSignal.token_id, AgentSignal.agent],
+                set_={"signal": stmt.excluded.signal, "updated_at": stmt.excluded.updated_at},
+                where=AgentSignal.updated_at <= stmt.excluded.updated_at,  # a late write never undoes a newer one
+            )
+            stored = (await db.execute(stmt.returning(AgentSignal.signal))).scalar_one_or_none()
+            await db.commit()
+        if stored is None:
+            return  # another worker stored a newer signal; the next sync picks it up
+    except Exception as e:
+        # Still counts for this worker; the others only see it once a later signal is stored
+        logger.warning(f"Could not store {agent} signal for token {token_id}: {e!r}")
+    get_consensus_matrix().record(token_id, agent, signal)
+
+
+def persist_signal(token_id, agent: str, signal: Optional[str]):
+    """Writes the agent's latest signal to the shared table in the background, then records it locally."""
+    if not signal or agent not in CONSENSUS_AGENTS:
+        return
+    task = asyncio.create_task(_store_signal(str(token_id), agent, signal, datetime.now(timezone.utc)))
+    _writes.add(task)
+    task.add_done_callback(_writes.discard)
+
+
+async def sync_consensus():
+    """Records signals other workers stored since the last sync; a no-op within CONSENSUS_SYNC_SECONDS of it."""
+    global _sync_lock, _synced_at, _watermark
+    if time.monotonic() - _synced_at < settings.CONSENSUS_SYNC_SECONDS:
+        return
+    if _sync_lock is None:
+        _sync_lock = asyncio.Lock()
+    async with _sync_lock:
+        if time.monotonic() - _synced_at < settings.CONSENSUS_SYNC_SECONDS:
+            return  # another request synced while this one waited
+        query = select(AgentSignal.token_id, AgentSignal.agent, AgentSignal.signal, AgentSignal.updated_at)
+        if _watermark is not None:
+            query = query.where(AgentSignal.updated_at >= _watermark - timedelta(seconds=SYNC_OVERLAP_SECONDS))
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(query.order_by(AgentSignal.updated_at))).all()
+        except Exception as e:
+            logger.warning(f"Consensus sync failed; ranking from this worker's signals only: {e!r}")
+            return
+        finally:
+            _synced_at = time.monotonic()
+        matrix = get_consensus_matrix()
+        for token_id, agent, signal, updated_at in rows:
+            matrix.record(token_id, agent, signal)
+        if rows:
+            _watermark = rows[-1].updated_at
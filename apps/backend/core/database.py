@@ -1,24 +1,52 @@
-from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 
 from core.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# --- Async engine (used by request handlers and background tasks so DB I/O stays off the threadpool) ---
+def _async_database_url(url: str) -> URL:
+    """Maps the configured sync URL onto its async driver (asyncpg / aiosqlite)."""
+    async_url = make_url(url)
+    backend = async_url.get_backend_name()
+    if backend == "postgresql":
+        async_url = async_url.set(drivername="postgresql+asyncpg").update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+        )
+    elif backend == "sqlite":
+        async_url = async_url.set(drivername="sqlite+aiosqlite")
+    return async_url
+
+def _async_engine_options(url: URL) -> dict:
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        # SQLite has no server connections to size a queue pool for
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if url.get_backend_name() == "postgresql":
+        options["connect_args"] = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+async_database_url = _async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(async_database_url, **_async_engine_options(async_database_url))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-# Function to create all tables defined in models
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+# Function to create all tables defined in models (called from the app's startup hook)
+async def create_tables():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+async def dispose_engine():
+    await async_engine.dispose()
 
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
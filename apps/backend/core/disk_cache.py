@@ -0,0 +1,135 @@
+"""
+SQLite cache backend (CACHE_BACKEND=sqlite).
+
+One SQLite file (WAL mode, so every worker on the host can read and write it at once) holds
+serialized cache values with an expiry time. Once the stored bytes pass DISK_CACHE_MAX_BYTES,
+the least recently read entries are deleted. Anything that goes wrong in SQLite is logged
+and treated as a miss, so the cache can never fail a request.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from core.cache_backend import CacheBackend
+from core.config import settings
+from core.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Reads only refresh an entry's recency when it is older than this, so hot keys don't write on every hit
+TOUCH_INTERVAL_SECONDS = 60
+# Eviction brings the file down to this fraction of the limit, leaving headroom for new writes
+EVICT_TARGET_RATIO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+class DiskCache(CacheBackend):
+    """Size-bounded key/value store in SQLite, shared by the processes that open the same file."""
+
+    def __init__(self, path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._written = 0  # bytes written since the last size check
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute(_SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_entry(self, key: str, name: str = "shared") -> Optional[Tuple[bytes, float]]:
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT value, expires_at, accessed_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] <= now:
+                conn.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now))
+                row = None
+            if row is not None and now - row[2] > TOUCH_INTERVAL_SECONDS:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache read failed for {key!r}: {e}")
+            row = None
+        CACHE_REQUESTS.labels(name, "hit" if row is not None else "miss").inc()
+        return (row[0], row[1] - now) if row is not None else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if ttl <= 0:
+            return
+        now = time.time()
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + ttl, now),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache write failed for {key!r}: {e}")
+            return
+        with self._lock:
+            self._written += len(value)
+            check = self._written > self.max_bytes // 20
+            if check:
+                self._written = 0
+        if check:
+            self.evict()
+
+    def delete(self, key: str):
+        try:
+            self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache delete failed for {key!r}: {e}")
+
+    def evict(self):
+        """Drops expired entries, then the least recently read ones until the file is under its size limit."""
+        try:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            excess = total - int(self.max_bytes * EVICT_TARGET_RATIO)
+            if total <= self.max_bytes or excess <= 0:
+                return
+            deleted = conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM (SELECT key, size, SUM(size) OVER (ORDER BY accessed_at, key) AS running FROM entries)"
+                " WHERE running - size < ?)",
+                (excess,),
+            ).rowcount
+            logger.info(f"Disk cache over {self.max_bytes} bytes ({total}); evicted {deleted} entries")
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache eviction failed: {e}")
+
+
+def open_disk_cache() -> Optional[DiskCache]:
+    if not settings.DISK_CACHE_PATH or settings.DISK_CACHE_MAX_BYTES <= 0:
+        return None
+    path = Path(settings.DISK_CACHE_PATH)
+    if not path.is_absolute():
+        path = BACKEND_DIR / path
+    try:
+        return DiskCache(path, settings.DISK_CACHE_MAX_BYTES)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Disk cache disabled; could not open {path}: {e}")
+        return None
@@ -0,0 +1,85 @@
+"""
+Change detection for agent tools.
+
+Each tool hashes the upstream inputs its calculation depends on (the OHLCV window, the
+price bucket and levels, the trader-grade rows). When the digest matches the last run for
+that agent and token, the tool returns the stored analysis and the LLM node returns the
+stored explanation, so neither the calculation nor the chat model call is repeated.
+"""
+import copy
+import hashlib
+import math
+from typing import Any, Dict, Optional
+
+import orjson
+
+from core.analysis_result import AnalysisResult, unpack_result
+from core.cache import TieredCache
+from core.config import settings
+from core.metrics import UNCHANGED_INPUT_REUSE
+
+
+def _encode(entry: Dict[str, Any]) -> bytes:
+    return orjson.dumps({**entry, "analysis": entry["analysis"].pack()})
+
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    entry = orjson.loads(data)
+    entry["analysis"] = unpack_result(entry["analysis"])
+    return entry
+
+
+# "agent:token_id" -> {"digest", "analysis", "reasoning"}; the shared cache tier keeps them across restarts
+_memo = TieredCache(maxsize=settings.INPUT_MEMO_MAX_ENTRIES, ttl=settings.INPUT_MEMO_TTL_SECONDS, name="input_memo",
+                    encode=_encode, decode=_decode)
+
+
+def _key(agent: str, token_id: Any) -> str:
+    return f"{agent}:{token_id}"
+
+
+def input_digest(*inputs: Any) -> str:
+    """Stable digest of JSON-serializable tool inputs."""
+    payload = orjson.dumps(inputs, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def price_bucket(price: float) -> int:
+    """Index of the INPUT_MEMO_PRICE_BUCKET-sized (relative) step the price falls in."""
+    if not price or price <= 0:
+        return 0
+    return math.floor(math.log(price) / math.log1p(settings.INPUT_MEMO_PRICE_BUCKET))
+
+
+def recall_analysis(agent: str, token_id: Any, digest: str) -> Optional[AnalysisResult]:
+    """A copy of the analysis stored for these inputs, or None if they changed or were never seen."""
+    entry = _memo.get(_key(agent, token_id))
+    if entry is None or entry["digest"] != digest:
+        return None
+    UNCHANGED_INPUT_REUSE.labels(agent, "analysis").inc()
+    return copy.copy(entry["analysis"])  # fields are immutable values, so a shallow copy is enough
+
+
+def remember_analysis(agent: str, token_id: Any, digest: str, analysis: AnalysisResult):
+    """Tags the analysis with its input digest and stores it; errors are never stored."""
+    analysis.input_digest = digest
+    if analysis.error or settings.INPUT_MEMO_MAX_ENTRIES <= 0:
+        return
+    _memo.set(_key(agent, token_id), {"digest": digest, "analysis": copy.copy(analysis), "reasoning": None})
+
+
+async def recall_reasoning(agent: str, analysis: AnalysisResult) -> Optional[str]:
+    """The LLM explanation already written for this analysis's inputs, if any."""
+    digest = analysis.input_digest
+    entry = await _memo.aget(_key(agent, analysis.token_id)) if digest else None
+    if entry is None or entry["digest"] != digest or entry["reasoning"] is None:
+        return None
+    UNCHANGED_INPUT_REUSE.labels(agent, "llm").inc()
+    return entry["reasoning"]
+
+
+async def remember_reasoning(agent: str, analysis: AnalysisResult, reasoning: str):
+    digest = analysis.input_digest
+    entry = await _memo.aget(_key(agent, analysis.token_id)) if digest else None
+    if entry is not None and entry["digest"] == digest:
+        await _memo.aset(_key(agent, analysis.token_id), {**entry, "reasoning": reasoning})
@@ -0,0 +1,130 @@
+"""
+Shared chat model clients.
+
+Agents get their model from get_chat_model(agent, role) instead of building ChatOpenAI
+themselves. The role picks the model (LLM_EXPLANATION_MODEL for the per-agent write-ups,
+LLM_SYNTHESIS_MODEL for the manager, LLM_MODELS for per-agent overrides), and every client
+shares one pair of HTTP connection pools, which warm_llm_clients() opens at startup.
+langchain_openai and openai are only imported, and the pools only built, on first use, so
+importing this module stays cheap.
+
+With LLM_FALLBACK_MODEL set, a call still running after LLM_LATENCY_SLO_SECONDS is
+abandoned and answered by the fallback model instead.
+"""
+import asyncio
+import logging
+import threading
+from typing import Dict, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import Runnable
+
+from core.config import settings
+from core.metrics import LLM_FALLBACKS, LLMMetricsCallback
+from core.tracing import LLMTracingCallback
+
+logger = logging.getLogger(__name__)
+
+# Roles
+EXPLANATION = "explanation"
+SYNTHESIS = "synthesis"
+
+TEMPERATURE = 0.1
+
+# One set of pooled connections shared by every agent's client, built by _http_clients()
+_http_client = None
+_http_async_client = None
+
+_models: Dict[Tuple[str, str], Runnable] = {}
+_lock = threading.RLock()
+
+
+def _http_clients():
+    global _http_client, _http_async_client
+    with _lock:
+        if _http_client is None:
+            import httpx
+            import openai
+            pool_size = settings.LLM_MAX_CONCURRENCY * 2 if settings.LLM_MAX_CONCURRENCY > 0 else 100
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            _http_client = openai.DefaultHttpxClient(limits=limits)
+            _http_async_client = openai.DefaultAsyncHttpxClient(limits=limits)
+    return _http_client, _http_async_client
+
+
+class _FallbackCounter(BaseCallbackHandler):
+    """Counts primary-model calls abandoned for breaching the latency SLO."""
+
+    run_inline = True
+
+    def __init__(self, agent: str):
+        self._fallbacks = LLM_FALLBACKS.labels(agent)
+
+    def on_llm_error(self, error: BaseException, **kwargs):
+        import openai
+        if isinstance(error, openai.APITimeoutError):
+            self._fallbacks.inc()
+
+
+def model_for(agent: str, role: str) -> str:
+    if agent in settings.LLM_MODELS:
+        return settings.LLM_MODELS[agent]
+    return settings.LLM_SYNTHESIS_MODEL if role == SYNTHESIS else settings.LLM_EXPLANATION_MODEL
+
+
+def _chat_model(agent: str, model: str, extra_callbacks=(), **kwargs) -> Runnable:
+    from langchain_openai import ChatOpenAI
+    http_client, http_async_client = _http_clients()
+    return ChatOpenAI(
+        temperature=TEMPERATURE,
+        api_key=settings.OPENAI_API_KEY,
+        model=model,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        callbacks=[LLMMetricsCallback(agent), LLMTracingCallback(agent), *extra_callbacks],
+        **kwargs,
+    )
+
+
+def _build(agent: str, role: str) -> Runnable:
+    import openai
+    model = model_for(agent, role)
+    fallback_model = settings.LLM_FALLBACK_MODEL
+    if not fallback_model or fallback_model == model:
+        return _chat_model(agent, model)
+
+    # No retries on the primary: a retry after a timeout would only push the call further past the SLO
+    primary = _chat_model(agent, model, timeout=settings.LLM_LATENCY_SLO_SECONDS, max_retries=0,
+                          extra_callbacks=[_FallbackCounter(agent)])
+    fallback = _chat_model(agent, fallback_model)
+    return primary.with_fallbacks([fallback], exceptions_to_handle=(openai.APITimeoutError,))
+
+
+def get_chat_model(agent: str, role: str = EXPLANATION) -> Runnable:
+    """Returns the shared chat model for this agent and role, building it on first use."""
+    key = (agent, role)
+    chat_model = _models.get(key)
+    if chat_model is None:
+        with _lock:
+            chat_model = _models.get(key)
+            if chat_model is None:
+                chat_model = _models[key] = _build(agent, role)
+                logger.info(f"LLM client for {agent}/{role}: {model_for(agent, role)}"
+                            + (f" (fallback {settings.LLM_FALLBACK_MODEL})" if settings.LLM_FALLBACK_MODEL else ""))
+    return chat_model
+
+
+async def warm_llm_clients():
+    """Opens LLM_WARMUP_CONNECTIONS pooled connections so the first requests skip TCP and TLS setup."""
+    if settings.LLM_WARMUP_CONNECTIONS <= 0:
+        return
+    import openai
+    client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=_http_clients()[1], max_retries=0)
+    results = await asyncio.gather(
+        *(client.models.list() for _ in range(settings.LLM_WARMUP_CONNECTIONS)), return_exceptions=True
+    )
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        logger.warning(f"LLM connection warmup: {len(failures)}/{len(results)} requests failed ({failures[0]!r})")
+    else:
+        logger.info(f"Warmed {len(results)} LLM connections")
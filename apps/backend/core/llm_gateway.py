@@ -0,0 +1,133 @@
+"""
+Process-wide gate in front of every chat model call.
+
+At most LLM_MAX_CONCURRENCY calls run at once. Waiting calls are served by priority first
+(manager synthesis before per-agent explanations, since a user is waiting on the synthesis
+and it needs the explanations already done, and background work such as cache warming
+last), then round-robin across agents so one busy agent cannot starve the others.
+Background calls never hold more than LLM_BACKGROUND_MAX_CONCURRENCY slots. Wait time,
+queue depth and in-flight calls are exported as llm_gateway_* metrics.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, Optional
+
+from core.config import settings
+from core.metrics import LLM_IN_FLIGHT, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT
+
+
+class LLMPriority(IntEnum):
+    """Lower values are served first."""
+    SYNTHESIS = 0
+    EXPLANATION = 1
+    BACKGROUND = 2
+
+
+# Set to True in a background task (e.g. cache warming) to run all of its calls at BACKGROUND priority
+background_priority: ContextVar[bool] = ContextVar("llm_background_priority", default=False)
+
+
+class LLMGateway:
+    """Concurrency cap with per-priority, per-agent fair queuing. Must be used from the event loop."""
+
+    def __init__(self, max_concurrency: int, max_background: int = 0):
+        self.max_concurrency = max_concurrency
+        self.max_background = max_background
+        self._in_flight = 0
+        self._background_in_flight = 0
+        # priority -> agent -> waiting futures; agents rotate to the back after each grant
+        self._waiting: Dict[LLMPriority, "OrderedDict[str, deque[asyncio.Future]]"] = {
+            priority: OrderedDict() for priority in LLMPriority
+        }
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queued(self) -> int:
+        return sum(len(queue) for agents in self._waiting.values() for queue in agents.values())
+
+    @asynccontextmanager
+    async def slot(self, agent: str, priority: LLMPriority = LLMPriority.EXPLANATION):
+        """Holds one gateway slot for the duration of the block."""
+        if background_priority.get():
+            priority = LLMPriority.BACKGROUND
+        started = time.perf_counter()
+        await self._acquire(agent, priority)
+        LLM_QUEUE_WAIT.labels(agent, priority.name.lower()).observe(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def _has_capacity(self, priority: Optional[LLMPriority] = None) -> bool:
+        if priority == LLMPriority.BACKGROUND and self._background_in_flight >= max(self.max_background, 1):
+            return False
+        return self.max_concurrency <= 0 or self._in_flight < self.max_concurrency
+
+    async def _acquire(self, agent: str, priority: LLMPriority):
+        if self._has_capacity(priority) and not self.queued():
+            self._take(priority)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[priority].setdefault(agent, deque()).append(future)
+        LLM_QUEUE_DEPTH.labels(priority.name.lower()).inc()
+        # Waiting background calls can leave free slots behind them; let this call take one
+        self._grant_waiting()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a slot in the same tick we were cancelled; hand it on
+                self._release(priority)
+            else:
+                self._forget(agent, priority, future)
+            raise
+
+    def _take(self, priority: LLMPriority):
+        self._in_flight += 1
+        if priority == LLMPriority.BACKGROUND:
+            self._background_in_flight += 1
+        LLM_IN_FLIGHT.inc()
+
+    def _release(self, priority: LLMPriority):
+        self._in_flight -= 1
+        if priority == LLMPriority.BACKGROUND:
+            self._background_in_flight -= 1
+        LLM_IN_FLIGHT.dec()
+        self._grant_waiting()
+
+    def _forget(self, agent: str, priority: LLMPriority, future: asyncio.Future):
+        queue = self._waiting[priority].get(agent)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        if not queue:
+            del self._waiting[priority][agent]
+        LLM_QUEUE_DEPTH.labels(priority.name.lower()).dec()
+
+    def _grant_waiting(self):
+        for priority in LLMPriority:
+            agents = self._waiting[priority]
+            while agents and self._has_capacity(priority):
+                agent, queue = next(iter(agents.items()))
+                future = queue.popleft()
+                if queue:
+                    agents.move_to_end(agent)
+                else:
+                    del agents[agent]
+                LLM_QUEUE_DEPTH.labels(priority.name.lower()).dec()
+                if future.done():
+                    continue
+                self._take(priority)
+                future.set_result(None)
+            if not self._has_capacity():
+                return
+
+
+llm_gateway = LLMGateway(settings.LLM_MAX_CONCURRENCY, settings.LLM_BACKGROUND_MAX_CONCURRENCY)
@@ -0,0 +1,71 @@
+"""
+Logging setup for the API process.
+
+Levels come from settings: LOG_LEVEL for the root logger and LOG_LEVELS for per-module
+overrides (e.g. {"agents.bounce_hunter": "DEBUG", "httpx": "WARNING"}). LOG_FORMAT picks
+plain text or one JSON object per line; both include the current trace id.
+
+Hot paths log one-line summaries at INFO and hand full payloads (graph state, tool output,
+LLM prompts) to log_payload(), which only formats them when DEBUG is enabled for that logger
+or the record is picked by LOG_PAYLOAD_SAMPLE_RATE.
+"""
+import json
+import logging
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Any
+
+from core.config import settings
+from core.tracing import current_trace_id
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s"
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and goes into the JSON output
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "trace_id"}
+
+
+class TraceIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "trace_id": getattr(record, "trace_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    handler = logging.StreamHandler(sys.stderr)
+    handler.addFilter(TraceIdFilter())
+    handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Any):
+    """Logs `message: payload` at DEBUG, or at INFO for a sampled fraction of calls; formats nothing otherwise."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s: %s", message, payload)
+    elif settings.LOG_PAYLOAD_SAMPLE_RATE and random.random() < settings.LOG_PAYLOAD_SAMPLE_RATE:
+        logger.info("%s (sampled): %s", message, payload)
@@ -0,0 +1,200 @@
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+
+from core.tracing import start_span
+
+# Buckets sized for this service: sub-millisecond cache hits up to multi-second LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+# --- Metric Definitions ---
+GRAPH_NODE_LATENCY = Histogram(
+    "agent_graph_node_seconds",
+    "Time spent in each LangGraph node",
+    ["agent", "node"],
+    buckets=LATENCY_BUCKETS,
+)
+TOKEN_METRICS_LATENCY = Histogram(
+    "token_metrics_request_seconds",
+    "Latency of Token Metrics API requests by endpoint and HTTP status",
+    ["endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "llm_call_seconds",
+    "Latency of chat model calls by agent",
+    ["agent", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens consumed by chat model calls",
+    ["agent", "kind"],  # kind: prompt | completion
+)
+LLM_CALL_TOKENS = Histogram(
+    "llm_call_tokens",
+    "Tokens per chat model call; sum / count gives the average prompt or completion size",
+    ["agent", "kind"],  # kind: prompt | completion
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result; hit ratio = hit / (hit + miss)",
+    ["cache", "result"],  # result: hit | miss
+)
+SUB_AGENT_RETRIES = Counter(
+    "manager_sub_agent_retries_total",
+    "Retries issued by the manager's invoke_sub_agent",
+    ["agent"],
+)
+LLM_FALLBACKS = Counter(
+    "llm_fallbacks_total",
+    "Chat model calls that breached the latency SLO and were answered by the fallback model",
+    ["agent"],
+)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_gateway_queue_wait_seconds",
+    "Time a chat model call waited for an LLM gateway slot",
+    ["agent", "priority"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_gateway_queued_calls",
+    "Chat model calls waiting for an LLM gateway slot",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+LLM_IN_FLIGHT = Gauge(
+    "llm_gateway_in_flight_calls",
+    "Chat model calls currently holding an LLM gateway slot",
+    multiprocess_mode="livesum",
+)
+MANAGER_SPECULATIVE_SYNTHESIS = Counter(
+    "manager_speculative_synthesis_total",
+    "Speculative manager syntheses by outcome",
+    ["outcome"],  # used | reissued (sub-agent results changed) | skipped (a tool produced no output) | failed
+)
+UNCHANGED_INPUT_REUSE = Counter(
+    "agent_unchanged_input_reuse_total",
+    "Agent runs whose upstream inputs matched the previous run, so earlier work was reused",
+    ["agent", "stage"],  # stage: analysis | llm
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke a sleeping task; sustained lag means something is blocking the loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# How often the event-loop lag monitor samples
+EVENT_LOOP_LAG_INTERVAL_SECONDS = 0.1
+
+
+def _node_label(func: Callable) -> str:
+    name = func.__name__
+    return name[:-len("_node")] if name.endswith("_node") else name
+
+
+def timed_node(agent: str, func: Callable) -> Callable:
+    """
+    Wraps a LangGraph node so its duration lands in GRAPH_NODE_LATENCY (sync or async nodes)
+    and the node runs inside a trace span.
+    """
+    node = _node_label(func)
+    histogram = GRAPH_NODE_LATENCY.labels(agent, node)
+    span_name = f"{agent}.{node}"
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                with start_span(span_name, agent=agent, node=node):
+                    return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with start_span(span_name, agent=agent, node=node):
+                return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+    return wrapper
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Records chat model latency and token usage for one agent."""
+
+    run_inline = True  # cheap bookkeeping; no need to hop to an executor from async runs
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._started: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id: UUID, outcome: str):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is not None:
+            LLM_LATENCY.labels(self.agent, outcome).observe(time.perf_counter() - started)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, "success")
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        for kind in ("prompt", "completion"):
+            tokens = usage.get(f"{kind}_tokens")
+            if tokens:
+                LLM_TOKENS.labels(self.agent, kind).inc(tokens)
+                LLM_CALL_TOKENS.labels(self.agent, kind).observe(tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, "error")
+
+
+async def monitor_event_loop_lag(interval: float = EVENT_LOOP_LAG_INTERVAL_SECONDS):
+    """Runs for the lifetime of the worker, recording how far each wake-up overshoots `interval`."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - expected))
+
+
+def render_metrics():
+    """Returns (body, content_type) for the /metrics endpoint, aggregating workers in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,98 @@
+"""
+Redis cache backend (CACHE_BACKEND=redis).
+
+Uses redis-py's pooled client (an optional dependency: `pip install redis`), so it works against
+Redis, Valkey, KeyDB or the stand-in server in benchmarks/resp_server.py. Keys are prefixed with
+CACHE_REDIS_PREFIX so several deployments can share a server. The client calls block, so callers
+on the event loop go through TieredCache.aget()/aset() or asyncio.to_thread(). A failed command
+is retried once on a fresh connection and then counts as a miss; after a connection failure,
+commands miss without trying for RECONNECT_BACKOFF_SECONDS so an unreachable server does not add
+its timeout to every request.
+"""
+import logging
+import time
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+from core.cache_backend import CacheBackend
+from core.config import settings
+from core.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_BACKOFF_SECONDS = 5.0
+
+
+class RedisCache(CacheBackend):
+    """Cache backend on a Redis-protocol server, through a redis-py connection pool."""
+
+    def __init__(self, url: str, prefix: str = "", timeout: float = 0.5):
+        import redis
+        from redis.backoff import ExponentialBackoff
+        from redis.retry import Retry
+
+        self._errors = (redis.RedisError, OSError)
+        self._connection_errors = (redis.ConnectionError, redis.TimeoutError, OSError)
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+            retry=Retry(ExponentialBackoff(cap=timeout), retries=1),
+            retry_on_timeout=True,
+            health_check_interval=30,
+            protocol=2,
+        )
+        self.prefix = prefix
+        self._retry_at = 0.0
+        self.client.ping()  # fail at startup rather than on the first request
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._retry_at
+
+    def _failed(self, action: str, key: str, error: Exception):
+        if isinstance(error, self._connection_errors):
+            self._retry_at = time.monotonic() + RECONNECT_BACKOFF_SECONDS
+        logger.warning(f"Redis cache {action} failed for {key!r}: {error}")
+
+    def get_entry(self, key: str, name: str = "shared") -> Optional[Tuple[bytes, float]]:
+        key = self.prefix + key
+        value = ttl_ms = None
+        if self._available():
+            try:
+                value, ttl_ms = self.client.pipeline(transaction=False).get(key).pttl(key).execute()
+            except self._errors as e:
+                self._failed("read", key, e)
+                value = None
+        hit = value is not None and ttl_ms != -2
+        CACHE_REQUESTS.labels(name, "hit" if hit else "miss").inc()
+        if not hit:
+            return None
+        return value, ttl_ms / 1000 if ttl_ms >= 0 else float("inf")
+
+    def set(self, key: str, value: bytes, ttl: float):
+        ttl_ms = int(ttl * 1000)
+        if ttl_ms <= 0 or not self._available():
+            return
+        try:
+            self.client.set(self.prefix + key, value, px=ttl_ms)
+        except self._errors as e:
+            self._failed("write", key, e)
+
+    def delete(self, key: str):
+        if not self._available():
+            return
+        try:
+            self.client.delete(self.prefix + key)
+        except self._errors as e:
+            self._failed("delete", key, e)
+
+
+def open_redis_cache() -> Optional[RedisCache]:
+    parsed = urlparse(settings.CACHE_REDIS_URL)  # logged without the password
+    try:
+        return RedisCache(settings.CACHE_REDIS_URL, settings.CACHE_REDIS_PREFIX, settings.CACHE_REDIS_TIMEOUT_SECONDS)
+    except ImportError:
+        logger.warning("Redis cache disabled; CACHE_BACKEND=redis needs the redis package (pip install redis)")
+    except Exception as e:  # connection refused, bad URL, auth failure
+        logger.warning(f"Redis cache disabled; could not connect to {parsed.hostname}:{parsed.port or 6379}: {e}")
+    return None
@@ -0,0 +1,31 @@
+from typing import Any, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any):
+    """orjson fallback for the odd non-JSON object in agent state (e.g. an AgentAction in a step)."""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson-backed JSON response that tolerates non-JSON values instead of failing the request."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def trusted_response(response_model: Type[BaseModel], **fields) -> FastJSONResponse:
+    """
+    Serializes data the agents built themselves straight to JSON, skipping pydantic validation
+    (returning a Response makes FastAPI bypass response_model, which stays for the OpenAPI schema).
+    Fields not passed take the model's defaults.
+    """
+    content = {name: fields.get(name, field.default) for name, field in response_model.model_fields.items()}
+    return FastJSONResponse(content)
@@ -4,10 +4,11 @@ import jwt
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
-from core.database import get_db
+from core.database import get_async_db
 from apps.backend.models.wallet import User, TokenData
 
 # Password hashing
@@ -53,10 +54,11 @@ def decode_token(token: str):
         )
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ):
     token_data = decode_token(token)
-    user = db.query(User).filter(User.username == token_data.username).first()
+    result = await db.execute(select(User).where(User.username == token_data.username))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from core.analysis_result import AnalysisResult
+from core.config import settings
+from core.consensus import persist_signal
+
+logger = logging.getLogger(__name__)
+
+# Agent keys clients can subscribe to ("*" subscribes to every agent of a token)
+SIGNAL_AGENTS = (
+    "sma_agent",
+    "bounce_hunter_agent",
+    "crypto_oracle_agent",
+    "momentum_quant_agent",
+    "analysis_manager",
+)
+ALL_AGENTS = "*"
+
+# Metrics per agent whose change is worth a push even when the signal stays the same
+KEY_METRICS = {
+    "sma_agent": ("current_price", "sma20", "sma50"),
+    "bounce_hunter_agent": ("current_price",),
+    "crypto_oracle_agent": ("latest_tg", "tgc_24h", "avg_tg_5d"),
+    "momentum_quant_agent": ("latest_tg", "pct_change_tg", "quant_grade"),
+    "analysis_manager": (),
+}
+
+# Relative change below which a metric is considered unchanged (float noise, tiny ticks)
+METRIC_TOLERANCE = 0.001
+
+
+def _metric_changed(old: Any, new: Any) -> bool:
+    if old is None or new is None:
+        return old is not new
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        scale = max(abs(old), abs(new))
+        return scale != 0 and abs(new - old) / scale > METRIC_TOLERANCE
+    return old != new
+
+
+class SignalBroadcaster:
+    """
+    Keeps the last known signal per (token_id, agent) and pushes a change event
+    to every subscribed WebSocket when the signal or one of its key metrics moves.
+    Each event is serialized once and the same text frame is sent to all subscribers.
+    Every socket has a bounded outbox drained by its own writer task, so publishing never waits
+    on a client; a client whose outbox fills up is closed and dropped.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[Tuple[str, str], Set[WebSocket]] = {}
+        self._socket_keys: Dict[WebSocket, Set[Tuple[str, str]]] = {}
+        self._outboxes: Dict[WebSocket, Tuple[asyncio.Queue, asyncio.Task]] = {}
+        self._latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._latest_text: Dict[Tuple[str, str], str] = {}
+
+    def connect(self, websocket: WebSocket):
+        """Starts the writer for an accepted socket; everything sent to it goes through send()."""
+        outbox = asyncio.Queue(maxsize=max(settings.SIGNAL_WS_QUEUE_SIZE, 1))
+        self._outboxes[websocket] = (outbox, asyncio.create_task(self._write(websocket, outbox)))
+
+    def send(self, websocket: WebSocket, text: str):
+        """Queues a text frame for the socket; drops the socket if it is too far behind."""
+        entry = self._outboxes.get(websocket)
+        if entry is None:
+            return
+        try:
+            entry[0].put_nowait(text)
+        except asyncio.QueueFull:
+            logger.info(f"Dropping WebSocket subscriber: {entry[0].qsize()} messages unsent")
+            self.disconnect(websocket)
+            asyncio.create_task(self._close(websocket))
+
+    async def _write(self, websocket: WebSocket, outbox: asyncio.Queue):
+        while True:
+            text = await outbox.get()
+            try:
+                await websocket.send_text(text)
+            except Exception as e:
+                logger.info(f"Dropping WebSocket subscriber after failed send: {type(e).__name__}")
+                self.disconnect(websocket)
+                return
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await websocket.close(code=1013)  # try again later
+        except Exception:
+            pass
+
+    def subscribe(self, websocket: WebSocket, token_id: str, agent: str) -> list[str]:
+        """Registers a subscription and returns the already-known events to replay to the client."""
+        key = (token_id, agent)
+        self._subscribers.setdefault(key, set()).add(websocket)
+        self._socket_keys.setdefault(websocket, set()).add(key)
+        if agent == ALL_AGENTS:
+            return [text for (tid, _), text in self._latest_text.items() if tid == token_id]
+        snapshot = self._latest_text.get(key)
+        return [snapshot] if snapshot else []
+
+    def unsubscribe(self, websocket: WebSocket, token_id: str, agent: str):
+        key = (token_id, agent)
+        subscribers = self._subscribers.get(key)
+        if subscribers:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self._subscribers[key]
+        keys = self._socket_keys.get(websocket)
+        if keys:
+            keys.discard(key)
+
+    def disconnect(self, websocket: WebSocket):
+        entry = self._outboxes.pop(websocket, None)
+        if entry is not None and entry[1] is not asyncio.current_task():
+            entry[1].cancel()
+        for token_id, agent in list(self._socket_keys.pop(websocket, ())):
+            subscribers = self._subscribers.get((token_id, agent))
+            if subscribers:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self._subscribers[(token_id, agent)]
+
+    def subscriber_count(self) -> int:
+        return len(self._socket_keys)
+
+    async def publish(self, token_id: str, agent: str, signal: Optional[str], analysis_data: Optional[AnalysisResult] = None) -> bool:
+        """
+        Records a freshly computed signal. Broadcasts a change event only if the signal
+        or a key metric differs from the last published state. Returns True if an event was sent.
+        """
+        if not signal:
+            return False
+        persist_signal(token_id, agent, signal)
+        key = (str(token_id), agent)
+        previous = self._latest.get(key)
+
+        # Without the analysis result there are no metrics for this signal; the previous ones would be stale
+        metrics = None
+        if isinstance(analysis_data, AnalysisResult):
+            metrics = {name: getattr(analysis_data, name, None) for name in KEY_METRICS.get(agent, ())}
+
+        if previous is None:
+            changed = ["signal"]
+        else:
+            changed = []
+            if previous.get("signal") != signal:
+                changed.append("signal")
+            old_metrics = previous.get("metrics") or {}
+            for name, value in (metrics or {}).items():
+                if _metric_changed(old_metrics.get(name), value):
+                    changed.append(name)
+            if not changed:
+                return False
+
+        event = {
+            "type": "signal_change",
+            "token_id": key[0],
+            "agent": agent,
+            "signal": signal,
+            "previous_signal": previous.get("signal") if previous else None,
+            "metrics": metrics,
+            "changed": changed,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        text = json.dumps(event)
+        self._latest[key] = event
+        self._latest_text[key] = text
+
+        targets = self._subscribers.get(key, set()) | self._subscribers.get((key[0], ALL_AGENTS), set())
+        for websocket in targets:
+            self.send(websocket, text)
+        logger.info(f"Signal change for {agent} on token {key[0]}: {changed} -> {len(targets)} subscriber(s)")
+        return True
+
+
+signal_broadcaster = SignalBroadcaster()
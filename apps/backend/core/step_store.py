@@ -0,0 +1,110 @@
+"""
+Server-side store for agent execution traces.
+
+Agent endpoints only ship the formatted `steps` payload when asked for verbosity="full".
+Otherwise they save the formatter and the graph state it needs here and return the id,
+and GET /agents/steps/{steps_id} builds the steps on demand while the entry is alive.
+When the cache backend is shared, the formatter's arguments (not the formatted steps) are also
+written there off the request path, so a follow-up request that lands on another worker can
+format them; that only works for formatters registered with @step_formatter.
+"""
+import asyncio
+import logging
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import orjson
+from langchain_core.agents import AgentAction
+
+from core.analysis_result import AnalysisResult, unpack_result
+from core.cache import TTLCache
+from core.cache_backend import cache_backend
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+StepFormatter = Callable[..., List[Dict[str, Any]]]
+
+_store = TTLCache(maxsize=settings.STEP_TRACE_MAX_ENTRIES, ttl=settings.STEP_TRACE_TTL_SECONDS, name="step_traces")
+
+# Formatter name -> formatter, for traces saved by another worker
+_formatters: Dict[str, StepFormatter] = {}
+
+
+def step_formatter(formatter: StepFormatter) -> StepFormatter:
+    """Registers a formatter so traces it was saved with can be formatted by any worker."""
+    _formatters[formatter.__name__] = formatter
+    return formatter
+
+
+def _shared_key(steps_id: str) -> str:
+    return f"step_traces:{steps_id}"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, AnalysisResult):
+        return {"__result__": value.pack()}
+    if isinstance(value, AgentAction):
+        return {"__action__": {"tool": value.tool, "tool_input": value.tool_input, "log": value.log}}
+    return str(value)
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if len(value) == 1 and "__result__" in value:
+        return unpack_result(value["__result__"])
+    if len(value) == 1 and "__action__" in value:
+        return AgentAction(**value["__action__"])
+    return {key: _decode_value(item) for key, item in value.items()}
+
+
+def _share(steps_id: str, formatter: StepFormatter, args: tuple):
+    try:
+        entry = orjson.dumps({"formatter": formatter.__name__, "args": args}, default=_encode_value,
+                             option=orjson.OPT_PASSTHROUGH_DATACLASS)
+    except Exception as e:
+        logger.warning(f"Could not store steps {steps_id} in the shared cache: {e!r}")
+        return
+    cache_backend.set(_shared_key(steps_id), entry, settings.STEP_TRACE_TTL_SECONDS)
+
+
+def _load_shared(steps_id: str) -> Optional[List[Dict[str, Any]]]:
+    data = cache_backend.get(_shared_key(steps_id), "step_traces_shared")
+    if data is None:
+        return None
+    try:
+        entry = orjson.loads(data)
+        formatter = _formatters[entry["formatter"]]
+        args = _decode_value(entry["args"])
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Could not read steps {steps_id} from the shared cache: {e!r}")
+        return None
+    return formatter(*args)
+
+
+def save_steps(formatter: StepFormatter, *args) -> Optional[str]:
+    """Keeps `formatter(*args)` for later and returns its id, or None when the store is disabled."""
+    if settings.STEP_TRACE_MAX_ENTRIES <= 0:
+        return None
+    steps_id = uuid4().hex
+    _store.set(steps_id, partial(formatter, *args))
+    if cache_backend.shared and _formatters.get(formatter.__name__) is formatter:
+        try:
+            asyncio.get_running_loop().run_in_executor(None, _share, steps_id, formatter, args)
+        except RuntimeError:  # no event loop (called from a worker thread)
+            _share(steps_id, formatter, args)
+    return steps_id
+
+
+async def load_steps(steps_id: str) -> Optional[List[Dict[str, Any]]]:
+    """Formats the stored trace, or returns None if it expired or never existed."""
+    build = _store.get(steps_id)
+    if build is not None:
+        return build()
+    if not cache_backend.shared:
+        return None
+    return await asyncio.to_thread(_load_shared, steps_id)
@@ -0,0 +1,192 @@
+"""
+In-memory index of the tokens the app knows about (TOKENS_DATA_PATH, by default the frontend's
+data/tokens.json, so both apps read one dataset). Loaded once at startup into parallel arrays
+in dataset order, with hash maps from id and upper-cased symbol to array positions.
+
+search() runs over one sorted array of lower-cased search keys (symbol, full name and each
+word of the name): a prefix query is two binary searches, and only when nothing matches
+does it fall back to fuzzy matching. That looks up the keys sharing the most trigrams with the
+query in a precomputed trigram index and scores only those with difflib.
+"""
+import difflib
+import heapq
+import json
+import logging
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Keys (by shared trigrams) scored with difflib per fuzzy query
+FUZZY_CANDIDATES = 500
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class TokenInfo(NamedTuple):
+    token_id: int
+    token_name: str
+    token_symbol: str
+
+
+class TokenIndex:
+    def __init__(self, tokens: List[dict]):
+        self.ids = array("q")
+        self.names: List[str] = []
+        self.symbols: List[str] = []
+        self._by_id: Dict[int, int] = {}
+        self._by_symbol: Dict[str, Tuple[int, ...]] = {}
+
+        for token in tokens:
+            token_id = int(token["token_id"])
+            if token_id in self._by_id:
+                continue  # first entry wins; the dataset has the odd duplicate id
+            position = len(self.ids)
+            self.ids.append(token_id)
+            self.names.append(token["token_name"] or "")
+            self.symbols.append(token["token_symbol"] or "")
+            self._by_id[token_id] = position
+            if self.symbols[-1]:
+                key = self.symbols[-1].upper()
+                self._by_symbol[key] = self._by_symbol.get(key, ()) + (position,)
+
+        entries = sorted(
+            (key, position)
+            for position in range(len(self.ids))
+            for key in self._search_keys(position)
+        )
+        self._keys: List[str] = [key for key, _ in entries]
+        self._key_positions = array("l", (position for _, position in entries))
+        self._distinct_keys: List[str] = sorted(set(self._keys))
+        self._trigrams: Dict[str, array] = {}
+        self._trigram_counts = array("l")
+        for key_number, key in enumerate(self._distinct_keys):
+            trigrams = _trigrams(key)
+            self._trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                self._trigrams.setdefault(trigram, array("l")).append(key_number)
+
+    def _search_keys(self, position: int):
+        name = self.names[position].lower()
+        keys = {name, *name.split()}
+        if self.symbols[position]:
+            keys.add(self.symbols[position].lower())
+        keys.discard("")
+        return keys
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TokenIndex":
+        path = Path(path)
+        if not path.is_absolute():
+            path = BACKEND_DIR / path
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            index = cls(json.load(f))
+        logger.info(f"Loaded {len(index)} tokens from {path} in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, token_id) -> bool:
+        return self.position(token_id) is not None
+
+    def position(self, token_id) -> Optional[int]:
+        """Array position of the token (int or numeric string id), or None if unknown."""
+        try:
+            return self._by_id.get(int(token_id))
+        except (TypeError, ValueError):
+            return None
+
+    def at(self, position: int) -> TokenInfo:
+        return TokenInfo(self.ids[position], self.names[position], self.symbols[position])
+
+    def get(self, token_id) -> Optional[TokenInfo]:
+        """Looks up a token by id (int or numeric string)."""
+        position = self.position(token_id)
+        return self.at(position) if position is not None else None
+
+    def by_symbol(self, symbol: str) -> List[TokenInfo]:
+        """All tokens with this symbol (case-insensitive), in dataset order."""
+        return [self.at(position) for position in self._by_symbol.get(symbol.upper(), ())]
+
+    def _rank(self, query: str, position: int) -> Tuple[int, int]:
+        """Sort key: exact symbol, exact name, symbol prefix, name prefix, word prefix; then dataset order."""
+        symbol, name = self.symbols[position].lower(), self.names[position].lower()
+        if symbol == query:
+            tier = 0
+        elif name == query:
+            tier = 1
+        elif symbol.startswith(query):
+            tier = 2
+        elif name.startswith(query):
+            tier = 3
+        else:
+            tier = 4
+        return tier, position
+
+    def _prefix_positions(self, query: str) -> set:
+        start = bisect_left(self._keys, query)
+        end = bisect_left(self._keys, query + "\uffff", lo=start)
+        return set(self._key_positions[start:end])
+
+    def _fuzzy_candidates(self, query: str) -> List[str]:
+        """The keys most similar to the query by shared trigrams (Dice coefficient)."""
+        trigrams = _trigrams(query)
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self._trigrams.get(trigram, ()))
+        counts = self._trigram_counts
+        best = heapq.nlargest(FUZZY_CANDIDATES, shared.items(),
+                              key=lambda item: item[1] / (counts[item[0]] + len(trigrams)))
+        return [self._distinct_keys[key_number] for key_number, _ in best]
+
+    def search(self, query: str, limit: int = 10) -> List[TokenInfo]:
+        """
+        Top `limit` tokens whose symbol, name or a word of the name starts with `query`, else fuzzy
+        matches. An empty query returns the first tokens in dataset order.
+        """
+        query = " ".join(query.lower().split())
+        if not query:
+            return [self.at(position) for position in range(min(max(limit, 0), len(self)))]
+        if limit <= 0:
+            return []
+        positions = self._prefix_positions(query)
+        if positions:
+            best = heapq.nsmallest(limit, positions, key=lambda position: self._rank(query, position))
+            return [self.at(position) for position in best]
+
+        # Fuzzy fallback: closest keys first, each key's tokens in dataset order
+        results, seen = [], set()
+        for key in difflib.get_close_matches(query, self._fuzzy_candidates(query), n=limit, cutoff=0.7):
+            for position in sorted(self._prefix_positions(key)):
+                if position not in seen and len(results) < limit:
+                    seen.add(position)
+                    results.append(self.at(position))
+        return results
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+_index: Optional[TokenIndex] = None
+
+
+def load_token_index() -> TokenIndex:
+    """Loads the index from TOKENS_DATA_PATH (once); call at startup to keep it off the request path."""
+    global _index
+    if _index is None:
+        _index = TokenIndex.load(settings.TOKENS_DATA_PATH)
+    return _index
+
+
+def get_token_index() -> TokenIndex:
+    return _index if _index is not None else load_token_index()
@@ -1,15 +1,78 @@
+import time
+from typing import Any, Dict, Optional
+
+import orjson
 import requests
+from core.cache import TieredCache
 from core.config import settings
-
-url = "https://api.tokenmetrics.com/v2/ai-reports?token_id=3306&page=0"
+from core.metrics import TOKEN_METRICS_LATENCY
+from core.tracing import start_span
 
 headers = {
     "accept": "application/json",
     "api_key": settings.TOKEN_METRICS_API_KEY
 }
-## Token ID for Ethereum is 3306
-def get_token_metrics(token_id: str):
-    print(settings.TOKEN_METRICS_API_KEY)
-    url = f"https://api.tokenmetrics.com/v2/ai-reports?token_id={token_id}&page=0"
-    response = requests.get(url, headers=headers)
-    return response.json()
+
+# Shared session so agent tools reuse pooled connections to the Token Metrics API
+session = requests.Session()
+session.headers.update(headers)
+
+# Successful response bodies per (endpoint, params), kept for TOKEN_METRICS_CACHE_TTLS[endpoint] seconds
+_responses = TieredCache(
+    maxsize=settings.TOKEN_METRICS_CACHE_MAX_ENTRIES, ttl=0, name="token_metrics",
+    encode=bytes, decode=bytes,
+)
+
+
+def _cache_key(endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+    return f"{endpoint}?" + orjson.dumps(params or {}, option=orjson.OPT_SORT_KEYS, default=str).decode()
+
+
+def _cacheable(response: requests.Response) -> bool:
+    """Only 200s the API itself reports as successful; error payloads come back as 200 too."""
+    if response.status_code != 200:
+        return False
+    try:
+        payload = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return False
+    return isinstance(payload, dict) and payload.get("success") is not False
+
+
+def _cached_response(url: str, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.headers["Content-Type"] = "application/json"
+    response._content = body
+    return response
+
+
+def fetch_token_metrics(endpoint: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = 15) -> requests.Response:
+    """
+    GETs a Token Metrics v2 endpoint (e.g. "daily-ohlcv") and records its latency per endpoint and status.
+    Returns the raw response; callers keep their own raise_for_status()/json() handling.
+    Successful responses from endpoints listed in TOKEN_METRICS_CACHE_TTLS are served from cache.
+    """
+    url = f"{settings.TOKEN_METRICS_BASE_URL}/{endpoint}"
+    label = endpoint.strip("/")
+    ttl = settings.TOKEN_METRICS_CACHE_TTLS.get(label, 0)
+    key = _cache_key(label, params)
+    if ttl > 0:
+        body = _responses.get(key)
+        if body is not None:
+            return _cached_response(url, body)
+
+    started = time.perf_counter()
+    status = "error"
+    with start_span(f"token_metrics.{label}", endpoint=label, params=params) as span:
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+            status = str(response.status_code)
+            span.set_attribute("status", response.status_code)
+            span.set_attribute("bytes", len(response.content))
+            if ttl > 0 and _cacheable(response):
+                _responses.set(key, response.content, ttl)
+            return response
+        finally:
+            TOKEN_METRICS_LATENCY.labels(label, status).observe(time.perf_counter() - started)
@@ -0,0 +1,298 @@
+"""
+Request-scoped tracing.
+
+A root span is opened per HTTP request (see main.py) and the current span lives in a
+contextvar, so it follows the request through awaits, asyncio.gather fan-out and the
+executor threads LangGraph runs sync nodes in. Finished spans go to the exporters named
+in settings.TRACE_EXPORTERS: "memory" (ring buffer behind /debug/traces, kept only when
+DEBUG_TRACES_ENABLED serves it), "file" (JSON lines) and "otlp" (OTLP/HTTP JSON, enabled
+automatically when OTLP_ENDPOINT is set). The file and OTLP exporters write from background
+threads, so ending a span never does I/O on the request path.
+"""
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import requests
+from langchain_core.callbacks import BaseCallbackHandler
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# --- Spans ---
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_time", "end_time", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_time is None else (self.end_time - self.start_time) * 1000
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        for exporter in _exporters:
+            try:
+                exporter.export(self)
+            except Exception:
+                logger.exception(f"Trace exporter {type(exporter).__name__} failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def valid_trace_id(value: Optional[str]) -> Optional[str]:
+    """Returns `value` if it is a 32-char hex trace id (e.g. from an X-Trace-Id header), else None."""
+    if value and len(value) == 32 and all(c in "0123456789abcdef" for c in value.lower()):
+        return value.lower()
+    return None
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def open_span(name: str, parent: Optional[Span] = None, trace_id: Optional[str] = None, **attributes) -> Span:
+    """Creates a span without making it current (for callback-style start/end pairs)."""
+    parent = parent if parent is not None else _current_span.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, attributes)
+    return Span(name, trace_id or new_trace_id(), None, attributes)
+
+
+@contextmanager
+def start_span(name: str, trace_id: Optional[str] = None, **attributes):
+    """
+    Opens a child of the current span (or a new trace when there is none) for the duration of the block.
+    `trace_id` only applies to a new root span, e.g. one propagated from an incoming request.
+    """
+    span = open_span(name, trace_id=trace_id, **attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.end(error=e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+class LLMTracingCallback(BaseCallbackHandler):
+    """Records each chat model call as a span under whatever span is current when it starts."""
+
+    run_inline = True
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._spans: Dict[UUID, Span] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        params = kwargs.get("invocation_params") or {}
+        self._spans[run_id] = open_span("llm.chat", agent=self.agent, model=params.get("model_name") or params.get("model"))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        span.set_attribute("prompt_tokens", usage.get("prompt_tokens"))
+        span.set_attribute("completion_tokens", usage.get("completion_tokens"))
+        span.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.end(error=error)
+
+
+# --- Exporters ---
+class InMemoryExporter:
+    """Keeps the spans of the most recent `max_traces` traces for /debug/traces."""
+
+    def __init__(self, max_traces: int):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+
+    def get_trace(self, trace_id: str) -> Optional[List[Span]]:
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            return list(spans) if spans is not None else None
+
+    def recent_traces(self, limit: int) -> List[Span]:
+        """Root spans of the most recent finished traces, newest first."""
+        with self._lock:
+            traces = list(self._traces.values())
+        roots = [span for spans in traces for span in spans if span.parent_id is None]
+        return roots[::-1][:limit]
+
+
+class JsonFileExporter:
+    """Appends one JSON object per finished span to a file from a background thread."""
+
+    def __init__(self, path: str, batch_size: int = 256):
+        self.path = path
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        threading.Thread(target=self._run, name="trace-file-exporter", daemon=True).start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # drop rather than block the request path
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in batch)
+            try:
+                with open(self.path, "a") as f:
+                    f.write(lines)
+            except OSError as e:
+                logger.warning(f"Writing {len(batch)} spans to {self.path} failed: {e}")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPExporter:
+    """Batches spans and POSTs them as OTLP/HTTP JSON to {endpoint}/v1/traces from a background thread."""
+
+    def __init__(self, endpoint: str, service_name: str, batch_size: int = 256, flush_interval: float = 2.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self._session = requests.Session()
+        threading.Thread(target=self._run, name="otlp-exporter", daemon=True).start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # drop rather than block the request path
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._session.post(self.url, json=self._payload(batch), timeout=10)
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"OTLP export of {len(batch)} spans failed: {e}")
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(int(span.start_time * 1e9)),
+                    "endTimeUnixNano": str(int(span.end_time * 1e9)),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items() if v is not None],
+                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                } for span in spans],
+            }],
+        }]}
+
+
+def _build_exporters():
+    names = set(settings.TRACE_EXPORTERS)
+    if settings.OTLP_ENDPOINT:
+        names.add("otlp")
+    exporters = []
+    memory = None
+    if "memory" in names and settings.DEBUG_TRACES_ENABLED:
+        memory = InMemoryExporter(settings.TRACE_BUFFER_SIZE)
+        exporters.append(memory)
+    if "file" in names:
+        exporters.append(JsonFileExporter(settings.TRACE_FILE_PATH))
+    if "otlp" in names:
+        if settings.OTLP_ENDPOINT:
+            exporters.append(OTLPExporter(settings.OTLP_ENDPOINT, settings.TRACE_SERVICE_NAME))
+        else:
+            logger.warning("'otlp' trace exporter requested but OTLP_ENDPOINT is not set; skipping it")
+    return exporters, memory
+
+
+_exporters, memory_exporter = _build_exporters()
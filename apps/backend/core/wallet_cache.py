@@ -0,0 +1,109 @@
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import TTLCache
+from core.config import settings
+from core.database import async_database_url
+from models.wallet import WalletResponse
+
+logger = logging.getLogger(__name__)
+
+# Read-through cache of wallet profiles keyed by address
+wallet_cache = TTLCache(maxsize=settings.WALLET_CACHE_MAX_ENTRIES, ttl=settings.WALLET_CACHE_TTL_SECONDS, name="wallet")
+
+# Address -> [database reads in flight, writes/invalidations seen while any was]. A read only fills
+# the cache if no write came in while it was in flight, so a slow read cannot overwrite a newer
+# profile. Entries go away with their last read, so this holds only addresses being read right now.
+_reads: Dict[str, List[int]] = {}
+
+_listener_connection = None
+
+
+def get_cached_wallet(address: str) -> Optional[WalletResponse]:
+    return wallet_cache.get(address)
+
+
+@contextmanager
+def wallet_read(address: str) -> Iterator[int]:
+    """Wraps a database read of the wallet; yields the generation to pass to cache_wallet() with the result."""
+    entry = _reads.setdefault(address, [0, 0])
+    entry[0] += 1
+    try:
+        yield entry[1]
+    finally:
+        entry[0] -= 1
+        if entry[0] == 0:
+            del _reads[address]
+
+
+def _bump(address: str):
+    entry = _reads.get(address)
+    if entry is not None:  # nothing to guard when no read is in flight
+        entry[1] += 1
+
+
+def cache_wallet(wallet: WalletResponse, read_generation: Optional[int] = None):
+    """
+    Caches a wallet. Writers call it after committing, without read_generation, which also makes
+    any read still in flight skip its fill; readers pass the generation wallet_read() yielded.
+    """
+    if read_generation is None:
+        _bump(wallet.address)
+    else:
+        entry = _reads.get(wallet.address)
+        if entry is None or entry[1] != read_generation:
+            return
+    wallet_cache.set(wallet.address, wallet)
+
+
+def _cross_worker_enabled() -> bool:
+    return bool(settings.WALLET_CACHE_INVALIDATION_CHANNEL) and async_database_url.get_backend_name() == "postgresql"
+
+
+async def invalidate_wallets(db: AsyncSession, addresses: Iterable[str]):
+    """
+    Drops the addresses from this worker's cache and, when a cross-worker channel is configured,
+    queues a NOTIFY in the caller's transaction so other workers drop them once it commits.
+    """
+    addresses = list(addresses)
+    for address in addresses:
+        _bump(address)
+        wallet_cache.delete(address)
+    if addresses and _cross_worker_enabled():
+        await db.execute(
+            text("SELECT pg_notify(:channel, address) FROM unnest(CAST(:addresses AS text[])) AS address"),
+            {"channel": settings.WALLET_CACHE_INVALIDATION_CHANNEL, "addresses": addresses},
+        )
+
+
+def _on_invalidation(connection, pid, channel, payload):
+    _bump(payload)
+    wallet_cache.delete(payload)
+
+
+async def start_invalidation_listener():
+    """LISTENs on the configured channel so writes in other workers evict entries here."""
+    global _listener_connection
+    if not _cross_worker_enabled() or _listener_connection is not None:
+        return
+    import asyncpg
+
+    dsn = async_database_url.set(drivername="postgresql", query={}).render_as_string(hide_password=False)
+    try:
+        _listener_connection = await asyncpg.connect(dsn)
+        await _listener_connection.add_listener(settings.WALLET_CACHE_INVALIDATION_CHANNEL, _on_invalidation)
+        logger.info(f"Listening for wallet cache invalidations on '{settings.WALLET_CACHE_INVALIDATION_CHANNEL}'")
+    except Exception:
+        logger.exception("Could not start wallet cache invalidation listener; relying on TTL expiry only")
+        _listener_connection = None
+
+
+async def stop_invalidation_listener():
+    global _listener_connection
+    if _listener_connection is not None:
+        await _listener_connection.close()
+        _listener_connection = None
@@ -1,18 +1,58 @@
+import asyncio
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 
 from routes import token_metrics
 from core.config import settings
-from core.database import create_tables
+from core.log_config import configure_logging
+from core.database import create_tables, dispose_engine
+from core.token_index import load_token_index
+from core.metrics import monitor_event_loop_lag, render_metrics
+from core.responses import FastJSONResponse
+from core.tracing import start_span, valid_trace_id
+from agents.loader import preload_agents
+from agents.warmup import run_cache_warming
+from core.wallet_cache import start_invalidation_listener, stop_invalidation_listener
 from routes.wallet import router as wallet_router
 from routes.token_metrics import router as token_metrics
 from routes.agents import router as agents_router
+from routes.signals import router as signals_router
+from routes.tokens import router as tokens_router
+from routes.debug import router as debug_router
+
+configure_logging()
+
+# Requests that are not worth a trace of their own
+UNTRACED_PATHS = ("/metrics", "/health", "/debug/")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables
+    await create_tables()
+    await start_invalidation_listener()
+    load_token_index()
+    await preload_agents(settings.PRELOAD_AGENTS)
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    from core.llm import warm_llm_clients  # imported here so `import main` skips the OpenAI client
+    llm_warmup = asyncio.create_task(warm_llm_clients())
+    cache_warming = asyncio.create_task(run_cache_warming())
+    yield
+    cache_warming.cancel()
+    llm_warmup.cancel()
+    lag_monitor.cancel()
+    await stop_invalidation_listener()
+    await dispose_engine()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="FastAPI backend for ETH Bucharest 2025",
     version="0.1.0",
-    redirect_slashes=False
+    redirect_slashes=False,
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -22,15 +62,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
-# Create database tables
-create_tables()
+# Compress large responses (agent steps carry full tool observations); brotli when installed, else gzip
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Opens the root span every agent, tool, HTTP and LLM span of this request hangs off."""
+    if request.url.path.startswith(UNTRACED_PATHS):
+        return await call_next(request)
+    with start_span(f"{request.method} {request.url.path}", trace_id=valid_trace_id(request.headers.get("x-trace-id")),
+                    method=request.method, path=request.url.path) as span:
+        response = await call_next(request)
+        span.set_attribute("status_code", response.status_code)
+    response.headers["X-Trace-Id"] = span.trace_id
+    return response
 
 # Include routers
 app.include_router(wallet_router)
 app.include_router(token_metrics)
 app.include_router(agents_router)
+app.include_router(signals_router)
+app.include_router(tokens_router)
+if settings.DEBUG_TRACES_ENABLED:  # unauthenticated, so development only
+    app.include_router(debug_router)
 
 @app.get("/")
 async def root():
@@ -40,5 +101,11 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, String
+
+from core.database import Base
+
+class AgentSignal(Base):
+    __tablename__ = "agent_signals"
+
+    token_id = Column(String, primary_key=True)
+    agent = Column(String, primary_key=True)
+    signal = Column(String, nullable=False)  # latest published signal, e.g. "STRONG BUY"
+    updated_at = Column(DateTime(timezone=True), nullable=False, index=True)  # when it was published
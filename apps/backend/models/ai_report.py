@@ -0,0 +1,13 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String
+
+from core.database import Base
+
+class AIReport(Base):
+    __tablename__ = "ai_reports"
+
+    token_id = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)  # bumped whenever the upstream report changes
+    content_hash = Column(String(64), nullable=False)  # sha256 of body; doubles as the ETag
+    body = Column(LargeBinary, nullable=False)  # upstream JSON exactly as received
+    updated_at = Column(DateTime(timezone=True), nullable=False)  # when this version was first seen
+    fetched_at = Column(DateTime(timezone=True), nullable=False)  # last successful upstream check
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from core.tracing import memory_exporter
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+)
+
+# Width of the bar column in the text waterfall
+WATERFALL_WIDTH = 60
+
+
+def _waterfall(spans):
+    """Orders spans depth-first under their parents and computes offsets relative to the trace start."""
+    by_parent = {}
+    span_ids = {span.span_id for span in spans}
+    for span in sorted(spans, key=lambda s: s.start_time):
+        parent_id = span.parent_id if span.parent_id in span_ids else None
+        by_parent.setdefault(parent_id, []).append(span)
+
+    trace_start = min(span.start_time for span in spans)
+    rows = []
+
+    def visit(parent_id, depth):
+        for span in by_parent.get(parent_id, []):
+            rows.append({
+                "name": span.name,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "depth": depth,
+                "offset_ms": round((span.start_time - trace_start) * 1000, 2),
+                "duration_ms": round(span.duration_ms, 2),
+                "attributes": span.attributes,
+                "error": span.error,
+            })
+            visit(span.span_id, depth + 1)
+
+    visit(None, 0)
+    return rows
+
+
+def _render_text(rows) -> str:
+    total_ms = max((row["offset_ms"] + row["duration_ms"] for row in rows), default=0) or 1
+    lines = []
+    for row in rows:
+        start = int(row["offset_ms"] / total_ms * WATERFALL_WIDTH)
+        length = max(1, int(row["duration_ms"] / total_ms * WATERFALL_WIDTH))
+        bar = " " * start + "█" * min(length, WATERFALL_WIDTH - start)
+        label = ("  " * row["depth"] + row["name"])[:48]
+        marker = " !" if row["error"] else ""
+        lines.append(f"{label:<48} |{bar:<{WATERFALL_WIDTH}}| {row['offset_ms']:>9.1f} +{row['duration_ms']:.1f} ms{marker}")
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/traces")
+async def list_traces(limit: int = 50):
+    """Most recent traces held in the in-memory buffer, newest first."""
+    if memory_exporter is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="In-memory trace exporter is not enabled")
+    return [
+        {"trace_id": span.trace_id, "name": span.name, "start_time": span.start_time,
+         "duration_ms": span.duration_ms, "attributes": span.attributes, "error": span.error}
+        for span in memory_exporter.recent_traces(limit)
+    ]
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, format: str = "json"):
+    """
+    Waterfall for one trace: spans in call order with offsets from the start of the request.
+    Use ?format=text for a plain-text timeline.
+    """
+    if memory_exporter is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="In-memory trace exporter is not enabled")
+    spans = memory_exporter.get_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Trace {trace_id} not found")
+
+    rows = _waterfall(spans)
+    if format == "text":
+        return PlainTextResponse(_render_text(rows))
+    return {"trace_id": trace_id, "span_count": len(rows), "spans": rows}
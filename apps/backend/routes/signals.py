@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+from typing import Dict, List, Literal
+import json
+import logging
+
+from core.config import settings
+from core.consensus import BUY, get_consensus_matrix, sync_consensus
+from core.responses import FastJSONResponse
+from core.signal_events import signal_broadcaster, SIGNAL_AGENTS, ALL_AGENTS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix=f"{settings.API_V1_STR}/signals",
+    tags=["signals"],
+)
+
+class ConsensusResponse(BaseModel):
+    token_id: int
+    token_name: str
+    token_symbol: str
+    score: float
+    agreeing: int
+    reporting: int
+    signals: Dict[str, str]
+
+@router.get("/consensus", response_model=List[ConsensusResponse])
+async def consensus_ranking(
+    limit: int = Query(20, ge=1, le=100),
+    direction: Literal["buy", "sell"] = BUY,
+    unanimous: bool = False,
+):
+    """
+    Tokens ranked by cross-agent consensus from the latest published sub-agent signals.
+    `score` is the weighted mean of the agents' signals (STRONG SELL -2 ... STRONG BUY +2, missing 0);
+    `unanimous=true` keeps only tokens where all four agents agree on the direction.
+    Signals come from every worker through the database, so the ranking may lag by up to
+    CONSENSUS_SYNC_SECONDS.
+    """
+    await sync_consensus()
+    entries = get_consensus_matrix().top(limit, direction, unanimous)
+    return FastJSONResponse([
+        {**entry.token._asdict(), "score": entry.score, "agreeing": entry.agreeing,
+         "reporting": entry.reporting, "signals": entry.signals}
+        for entry in entries
+    ])
+
+@router.websocket("/ws")
+async def signal_subscriptions(websocket: WebSocket):
+    """
+    Pushes signal change events for subscribed (token_id, agent) pairs.
+
+    Client messages:
+    {"action": "subscribe", "token_id": "3306", "agent": "sma_agent"}
+    {"action": "unsubscribe", "token_id": "3306", "agent": "sma_agent"}
+
+    Valid agent values: sma_agent, bounce_hunter_agent, crypto_oracle_agent,
+    momentum_quant_agent, analysis_manager, or "*" for all agents of the token.
+    On subscribe, the last known event for the pair (if any) is sent immediately.
+    A client that falls SIGNAL_WS_QUEUE_SIZE messages behind is disconnected.
+    """
+    await websocket.accept()
+    signal_broadcaster.connect(websocket)
+
+    def reply(message: dict):
+        signal_broadcaster.send(websocket, json.dumps(message))
+
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                reply({"type": "error", "detail": "Messages must be JSON objects."})
+                continue
+
+            if not isinstance(message, dict):
+                reply({"type": "error", "detail": "Messages must be JSON objects."})
+                continue
+
+            action = message.get("action")
+            token_id = message.get("token_id")
+            agent = message.get("agent") or ALL_AGENTS
+
+            if action not in ("subscribe", "unsubscribe") or token_id in (None, ""):
+                reply({"type": "error", "detail": "Expected an action of 'subscribe' or 'unsubscribe' with a token_id."})
+                continue
+            if agent != ALL_AGENTS and agent not in SIGNAL_AGENTS:
+                reply({"type": "error", "detail": f"Unknown agent '{agent}'."})
+                continue
+
+            token_id = str(token_id)
+            if action == "subscribe":
+                snapshots = signal_broadcaster.subscribe(websocket, token_id, agent)
+                reply({"type": "subscribed", "token_id": token_id, "agent": agent})
+                for snapshot in snapshots:
+                    signal_broadcaster.send(websocket, snapshot)
+            else:
+                signal_broadcaster.unsubscribe(websocket, token_id, agent)
+                reply({"type": "unsubscribed", "token_id": token_id, "agent": agent})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        signal_broadcaster.disconnect(websocket)
@@ -1,7 +1,13 @@
+from email.utils import format_datetime
+
 from pydantic import BaseModel
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.ai_reports import ReportUnavailable, get_report_meta, read_report
 from core.config import settings
-from core.token_metrics import get_token_metrics
+from core.database import get_async_db
+from core.token_index import get_token_index
 
 router = APIRouter(
     prefix=f"{settings.API_V1_STR}/token-metrics",
@@ -11,6 +17,40 @@ router = APIRouter(
 class TokenRequest(BaseModel):
     token_id: str
 
+def _report_headers(meta) -> dict:
+    return {
+        "ETag": f'"{meta.content_hash}"',
+        "Last-Modified": format_datetime(meta.updated_at, usegmt=True),
+        "X-Report-Version": str(meta.version),
+        "X-Report-Fetched-At": meta.fetched_at.isoformat(),
+        "Cache-Control": "no-cache",  # revalidate with If-None-Match; unchanged reports come back as 304
+    }
+
+async def _ai_report_response(token_id: str, request: Request, db: AsyncSession) -> Response:
+    if token_id not in get_token_index():
+        raise HTTPException(status_code=404, detail=f"Unknown token_id: {token_id}")
+    try:
+        meta = await get_report_meta(db, token_id)
+    except ReportUnavailable as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    if request.headers.get("if-none-match") == f'"{meta.content_hash}"':
+        return Response(status_code=304, headers=_report_headers(meta))
+
+    report = await read_report(db, token_id)
+    if report is None:
+        raise HTTPException(status_code=502, detail=f"No AI report available for token {token_id}")
+    meta, body = report
+    return Response(body, media_type="application/json", headers=_report_headers(meta))
+
+@router.get("/ai-report/{token_id}")
+async def get_ai_report(token_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Token Metrics AI report for the token, served from the database (downloaded on first request,
+    refreshed in the background once stale). Honors If-None-Match with the returned ETag.
+    """
+    return await _ai_report_response(token_id, request, db)
+
 @router.post("/ai-report")
-async def test(request: TokenRequest):
-    return get_token_metrics(request.token_id)
+async def ai_report(token_request: TokenRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await _ai_report_response(token_request.token_id, request, db)
@@ -0,0 +1,42 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from core.config import settings
+from core.responses import FastJSONResponse
+from core.token_index import get_token_index
+
+router = APIRouter(
+    prefix=f"{settings.API_V1_STR}/tokens",
+    tags=["tokens"],
+)
+
+SEARCH_MAX_LIMIT = 50
+
+
+class TokenResponse(BaseModel):
+    token_id: int
+    token_name: str
+    token_symbol: str
+
+
+@router.get("/search", response_model=List[TokenResponse])
+async def search_tokens(
+    q: str = Query("", max_length=100),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+):
+    """
+    Top `limit` tokens matching `q`: exact symbol or name first, then symbol, name and word
+    prefixes, each tier in dataset (market-cap) order. Falls back to fuzzy matches when no
+    token has a matching prefix. An empty `q` lists the top tokens.
+    """
+    return FastJSONResponse([token._asdict() for token in get_token_index().search(q, limit)])
+
+
+@router.get("/{token_id}", response_model=TokenResponse)
+async def get_token(token_id: int):
+    token = get_token_index().get(token_id)
+    if token is None:
+        raise HTTPException(status_code=404, detail=f"Unknown token_id: {token_id}")
+    return FastJSONResponse(token._asdict())
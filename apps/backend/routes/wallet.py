@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
+from typing import List
 
-from core.database import get_db
+from core.database import get_async_db
+from core.wallet_cache import get_cached_wallet, cache_wallet, invalidate_wallets, wallet_read
 from models.wallet import Wallet, WalletCreate, WalletResponse, RiskProfile
 
 router = APIRouter(
@@ -10,88 +14,138 @@ router = APIRouter(
     tags=["wallets"]
 )
 
+# Dialect-native INSERT constructs that support ON CONFLICT ... DO UPDATE
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Rows per statement for bulk upserts (keeps bound parameters under driver limits)
+BULK_UPSERT_CHUNK_SIZE = 1000
+
 class RiskProfileUpdate(BaseModel):
     address: str
     risk_profile: RiskProfile
 
+def _upsert_statement(db: AsyncSession, rows: List[dict]):
+    """
+    Builds one INSERT ... ON CONFLICT (address) DO UPDATE ... RETURNING statement.
+    Provided name/risk_profile values overwrite stored ones; omitted (None) values keep them,
+    so an address-only upsert returns the existing wallet unchanged.
+    """
+    dialect_name = db.get_bind().dialect.name
+    insert = _INSERT_BY_DIALECT.get(dialect_name)
+    if insert is None:
+        raise RuntimeError(f"Wallet upserts are not supported on the '{dialect_name}' dialect.")
+
+    stmt = insert(Wallet).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Wallet.address],
+        set_={
+            "name": func.coalesce(stmt.excluded.name, Wallet.name),
+            "risk_profile": func.coalesce(stmt.excluded.risk_profile, Wallet.risk_profile),
+        },
+    )
+    return stmt.returning(Wallet).execution_options(populate_existing=True)
+
+def _wallet_row(wallet: WalletCreate) -> dict:
+    return {"address": wallet.address, "name": wallet.name, "risk_profile": wallet.risk_profile}
+
 @router.post("/", response_model=WalletResponse)
-def create_wallet(wallet: WalletCreate, db: Session = Depends(get_db)):
+async def create_wallet(wallet: WalletCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new wallet or return existing one if the address already exists.
     If wallet exists and risk_profile or name is provided, updates those fields.
     """
-    # Check if wallet already exists
-    existing_wallet = db.query(Wallet).filter(Wallet.address == wallet.address).first()
-    
-    if existing_wallet:
-        # If risk_profile is provided, update the existing wallet
-        if hasattr(wallet, 'risk_profile') and wallet.risk_profile is not None:
-            existing_wallet.risk_profile = wallet.risk_profile
-        
-        # If name is provided, update the existing wallet
-        if hasattr(wallet, 'name') and wallet.name is not None:
-            existing_wallet.name = wallet.name
-            
-        db.commit()
-        db.refresh(existing_wallet)
-        # Return the existing wallet (updated if applicable)
-        return existing_wallet
-    
-    # Create new wallet if it doesn't exist
-    new_wallet = Wallet(address=wallet.address)
-    
-    # Set risk_profile if provided
-    if hasattr(wallet, 'risk_profile') and wallet.risk_profile is not None:
-        new_wallet.risk_profile = wallet.risk_profile
-    
-    # Set name if provided
-    if hasattr(wallet, 'name') and wallet.name is not None:
-        new_wallet.name = wallet.name
-    
-    db.add(new_wallet)
-    db.commit()
-    db.refresh(new_wallet)
-    
-    return new_wallet
+    result = await db.scalars(_upsert_statement(db, [_wallet_row(wallet)]))
+    saved_wallet = WalletResponse.model_validate(result.one())
+    await invalidate_wallets(db, [saved_wallet.address])
+    await db.commit()
+    cache_wallet(saved_wallet)
+    return saved_wallet
+
+@router.post("/bulk", response_model=List[WalletResponse])
+async def bulk_upsert_wallets(wallets: List[WalletCreate], db: AsyncSession = Depends(get_async_db)):
+    """
+    Create or update many wallets at once with the same rules as POST /wallets/.
+    Duplicate addresses in the request are merged (later non-null fields win).
+    """
+    # ON CONFLICT cannot touch the same row twice in one statement, so merge duplicates first
+    rows_by_address = {}
+    for wallet in wallets:
+        row = rows_by_address.setdefault(wallet.address, {"address": wallet.address, "name": None, "risk_profile": None})
+        if wallet.name is not None:
+            row["name"] = wallet.name
+        if wallet.risk_profile is not None:
+            row["risk_profile"] = wallet.risk_profile
+
+    rows = list(rows_by_address.values())
+    saved_wallets = []
+    for start in range(0, len(rows), BULK_UPSERT_CHUNK_SIZE):
+        result = await db.scalars(_upsert_statement(db, rows[start:start + BULK_UPSERT_CHUNK_SIZE]))
+        saved_wallets.extend(WalletResponse.model_validate(row) for row in result.all())
+    await invalidate_wallets(db, rows_by_address.keys())
+    await db.commit()
+    for saved_wallet in saved_wallets:
+        cache_wallet(saved_wallet)
+    return saved_wallets
 
 @router.get("/{address}", response_model=WalletResponse)
-def get_wallet(address: str, db: Session = Depends(get_db)):
+async def get_wallet(address: str, db: AsyncSession = Depends(get_async_db)):
     """
-    Get information about a specific wallet including risk profile if available
+    Get information about a specific wallet including risk profile if available.
+    Served from the in-process wallet cache when possible.
     """
-    wallet = db.query(Wallet).filter(Wallet.address == address).first()
-    if not wallet:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Wallet with address {address} not found"
-        )
-    return wallet
+    cached_wallet = get_cached_wallet(address)
+    if cached_wallet is not None:
+        return cached_wallet
+
+    with wallet_read(address) as generation:
+        result = await db.execute(select(Wallet).where(Wallet.address == address))
+        wallet = result.scalar_one_or_none()
+        if not wallet:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Wallet with address {address} not found"
+            )
+        wallet_response = WalletResponse.model_validate(wallet)
+        cache_wallet(wallet_response, generation)  # skipped if the wallet was written meanwhile
+    return wallet_response
 
 @router.put("/risk-profile", response_model=WalletResponse)
-def update_risk_profile(update_data: RiskProfileUpdate, db: Session = Depends(get_db)):
+async def update_risk_profile(update_data: RiskProfileUpdate, db: AsyncSession = Depends(get_async_db)):
     """
     Update the risk profile for a specific wallet
-    
+
     Example request body:
     {
         "address": "0xabc123...",
         "risk_profile": "High Risk, High Reward"
     }
-    
-    Valid risk_profile values: 
+
+    Valid risk_profile values:
     - "High Risk, High Reward" (for HIGH_RISK)
     - "Balanced & Strategic" (for BALANCED)
     - "Safe & Steady" (for SAFE)
     """
-    wallet = db.query(Wallet).filter(Wallet.address == update_data.address).first()
+    # Single UPDATE ... RETURNING; no row back means the wallet does not exist
+    stmt = (
+        update(Wallet)
+        .where(Wallet.address == update_data.address)
+        .values(risk_profile=update_data.risk_profile)
+        .returning(Wallet)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await db.scalars(stmt)
+    wallet = result.one_or_none()
     if not wallet:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Wallet with address {update_data.address} not found"
         )
-    
-    wallet.risk_profile = update_data.risk_profile
-    db.commit()
-    db.refresh(wallet)
-    
-    return wallet
+    wallet_response = WalletResponse.model_validate(wallet)
+    await invalidate_wallets(db, [wallet_response.address])
+    await db.commit()
+    cache_wallet(wallet_response)
+
+    return wallet_response
@@ -338,6 +338,7 @@ const AgentDetailPage = () => {
         const payload = {
           token_id: selectedToken.token_id.toString(),
           token_name: selectedToken.token_name,
+          verbosity: "full", // the stats below read the tool observation from steps
         };
         console.log(process.env.NEXT_PUBLIC_API_URL);
         // Get base API URL from environment variable
@@ -1,7 +1,7 @@
 import { useRouter } from "next/navigation";
 import { useParams } from "next/navigation";
-import { useState } from "react";
-import tokensData from "@/data/tokens.json";
+import { useEffect, useState } from "react";
+import { axiosInstance } from "@/axios";
 import { Button } from "@/components/ui/button";
 import {
     Command,
@@ -14,22 +14,45 @@ import {
 import { Popover, PopoverTrigger, PopoverContent } from "@/components/ui/popover";
 import { ChevronsUpDown } from "lucide-react";
 
+// Wait this long after the last keystroke before searching
+const SEARCH_DEBOUNCE_MS = 200;
+
+type Token = {
+    token_id: number;
+    token_name: string;
+    token_symbol: string;
+};
+
 const TokenRedirectSelect = () => {
     const router = useRouter();
     const params = useParams();
     const [openCombobox, setOpenCombobox] = useState(false);
     const [searchQuery, setSearchQuery] = useState("");
+    const [filteredTokens, setFilteredTokens] = useState<Token[]>([]);
 
-    // Filter tokens based on search query
-    const filteredTokens = tokensData.filter(
-        (token) =>
-            token.token_name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-            token.token_symbol.toLowerCase().includes(searchQuery.toLowerCase())
-    );
+    // Search tokens on the backend once typing pauses; ignore responses for queries the user has already typed past
+    useEffect(() => {
+        if (!openCombobox) return;
+        let cancelled = false;
+        const timer = setTimeout(() => {
+            axiosInstance
+                .get<Token[]>(`/api/v1/tokens/search`, { params: { q: searchQuery, limit: 50 } })
+                .then((res) => {
+                    if (!cancelled) setFilteredTokens(res.data);
+                })
+                .catch((error) => {
+                    console.error("Token search failed:", error);
+                });
+        }, SEARCH_DEBOUNCE_MS);
+        return () => {
+            cancelled = true;
+            clearTimeout(timer);
+        };
+    }, [searchQuery, openCombobox]);
 
     // Handle token selection and redirect
     const handleTokenSelect = (tokenId: string) => {
-        const selectedToken = tokensData.find(t => t.token_id.toString() === tokenId);
+        const selectedToken = filteredTokens.find(t => t.token_id.toString() === tokenId);
 
         if (selectedToken) {
             // Close the combobox
@@ -70,7 +93,7 @@ const TokenRedirectSelect = () => {
                                 <CommandList className="w-full">
                                     <CommandEmpty>No tokens found.</CommandEmpty>
                                     <CommandGroup>
-                                        {filteredTokens.slice(0, 50).map((token) => (
+                                        {filteredTokens.map((token) => (
                                             <CommandItem
                                                 key={token.token_id}
                                                 value={token.token_id.toString()}